@@ -0,0 +1,258 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Union
+
+import pytz
+from aiogram import Bot
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramNotFound, TelegramRetryAfter
+from aiogram.types import InlineKeyboardMarkup
+
+from app.core.metrics import DELIVERY_LAG, SENDS
+from app.services.scheduler import as_utc
+
+logger: logging.Logger = logging.getLogger(name="app_logger")
+
+# Фрагменты описаний ошибок Telegram, после которых писать в чат бессмысленно
+UNDELIVERABLE_MESSAGES = ("chat not found", "user is deactivated", "bot was blocked", "bot was kicked")
+
+
+def is_undeliverable(error: Exception) -> bool:
+    """Ошибка означает, что чат недоступен навсегда: бот заблокирован, чат не найден или аккаунт удалён."""
+    if isinstance(error, TelegramForbiddenError):
+        return True
+    if isinstance(error, (TelegramBadRequest, TelegramNotFound)):
+        return any(fragment in error.message.lower() for fragment in UNDELIVERABLE_MESSAGES)
+    return False
+
+
+class TokenBucket:
+    """Token bucket: не более `rate` операций в секунду с допустимым всплеском `capacity`."""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate: float = rate
+        self.capacity: float = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens: float = self.capacity
+        self._updated_at: float = time.monotonic()
+        self._paused_until: float = 0.0
+        self._lock: Optional[asyncio.Lock] = None
+
+    def pause(self, seconds: float) -> None:
+        """Приостанавливает выдачу токенов (например, по `retry_after` от Telegram)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self._tokens = 0.0
+
+    def is_idle(self) -> bool:
+        """Корзина полна и не на паузе — её можно безопасно выбросить."""
+        now = time.monotonic()
+        return now >= self._paused_until and self._tokens + (now - self._updated_at) * self.rate >= self.capacity
+
+    async def acquire(self) -> None:
+        """Ждёт, пока не освободится токен. Ожидающие обслуживаются по очереди."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class DeliveryJob:
+    """
+    Одно сообщение к отправке.
+
+    `on_sent` выполняется, когда сообщение принято к доставке: отправлено в Telegram
+    или впервые записано в outbox. `on_failed` получает ошибку неудачной отправки;
+    без него ошибка только логируется. `key` — ключ идемпотентности для outbox.
+    `due_at` — время срабатывания напоминания (UTC) для метрики опоздания отправки.
+    `confirm_ids` — разовые напоминания, срок подтверждения которых начинается с
+    фактической отправки (хранятся в outbox вместе с сообщением).
+    """
+
+    chat_id: Union[int, str]
+    text: str
+    reply_markup: Optional[InlineKeyboardMarkup] = None
+    on_sent: Optional[Callable[[], Awaitable[Any]]] = None
+    on_failed: Optional[Callable[[Exception], Awaitable[Any]]] = None
+    key: Optional[str] = None
+    due_at: Optional[datetime] = None
+    confirm_ids: List[str] = field(default_factory=list)
+
+
+class DeliveryEngine:
+    """
+    Параллельная отправка уведомлений пулом воркеров с учётом лимитов Telegram:
+    общий лимит сообщений в секунду и отдельный лимит на каждый чат.
+    `on_delivered` вызывается после каждой успешной отправки, до `on_sent` сообщения.
+    """
+
+    MAX_CHAT_BUCKETS = 10_000
+
+    def __init__(
+        self,
+        bot: Bot,
+        workers: int,
+        global_rate: float,
+        per_chat_rate: float,
+        queue_size: int,
+        max_retries: int = 3,
+        on_undeliverable: Optional[Callable[[Union[int, str], Exception], Awaitable[Any]]] = None,
+        on_delivered: Optional[Callable[[DeliveryJob], Awaitable[Any]]] = None,
+    ) -> None:
+        self.bot: Bot = bot
+        self.workers: int = workers
+        self.per_chat_rate: float = per_chat_rate
+        self.queue_size: int = queue_size
+        self.max_retries: int = max_retries
+        self.on_undeliverable = on_undeliverable
+        self.on_delivered = on_delivered
+
+        self._global_bucket = TokenBucket(rate=global_rate)
+        self._chat_buckets: Dict[Union[int, str], TokenBucket] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        # Недоступные чаты текущей пачки: остальные сообщения в них не отправляем
+        self._undeliverable_chats: Dict[Union[int, str], Exception] = {}
+
+        self.sent: int = 0
+        self.failed: int = 0
+        self.retried: int = 0
+        self.undeliverable: int = 0
+        self._started_at: float = time.monotonic()
+
+    async def submit(self, job: DeliveryJob) -> None:
+        """Ставит сообщение в очередь (ждёт, если очередь заполнена)."""
+        self._ensure_started()
+        await self._queue.put(job)
+
+    async def join(self) -> None:
+        """Ждёт, пока все поставленные сообщения будут обработаны."""
+        if self._queue is not None:
+            await self._queue.join()
+        self._undeliverable_chats.clear()
+
+    async def close(self) -> None:
+        """Дожидается отправки очереди и останавливает воркеры."""
+        await self.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики для наблюдения за пропускной способностью."""
+        elapsed = max(time.monotonic() - self._started_at, 1e-9)
+        return {
+            "queued": self._queue.qsize() if self._queue is not None else 0,
+            "sent": self.sent,
+            "failed": self.failed,
+            "retried": self.retried,
+            "undeliverable": self.undeliverable,
+            "sent_per_second": round(self.sent / elapsed, 2),
+        }
+
+    def _ensure_started(self) -> None:
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.queue_size)
+        if not self._tasks:
+            self._started_at = time.monotonic()
+            self._tasks = [
+                asyncio.create_task(self._worker(), name=f"DeliveryWorker-{index}")
+                for index in range(self.workers)
+            ]
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= self.MAX_CHAT_BUCKETS:
+                self._chat_buckets = {key: b for key, b in self._chat_buckets.items() if not b.is_idle()}
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate=self.per_chat_rate, capacity=1)
+        return bucket
+
+    async def _worker(self) -> None:
+        while True:
+            job: DeliveryJob = await self._queue.get()
+            try:
+                await self._deliver(job)
+            except Exception as e:
+                logger.error(msg=f"Ошибка доставки сообщения в чат {job.chat_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(self, job: DeliveryJob) -> None:
+        known_error = self._undeliverable_chats.get(job.chat_id)
+        if known_error is not None:
+            # Чат уже оказался недоступен в этой пачке — не тратим запрос к API
+            self.failed += 1
+            SENDS.inc(outcome="failed")
+            if job.on_failed is not None:
+                await job.on_failed(known_error)
+            return
+
+        for _ in range(self.max_retries + 1):
+            await self._chat_bucket(job.chat_id).acquire()
+            await self._global_bucket.acquire()
+            try:
+                await self.bot.send_message(chat_id=job.chat_id, text=job.text, reply_markup=job.reply_markup)
+            except TelegramRetryAfter as e:
+                # Telegram просит подождать — ставим на паузу общий лимит и повторяем
+                logger.warning(msg=f"Flood control: пауза отправки на {e.retry_after} с.")
+                self._global_bucket.pause(e.retry_after)
+                self.retried += 1
+                SENDS.inc(outcome="retried")
+                continue
+            except Exception as e:
+                self.failed += 1
+                SENDS.inc(outcome="failed")
+                if is_undeliverable(e):
+                    await self._mark_undeliverable(chat_id=job.chat_id, error=e)
+                if job.on_failed is None:
+                    raise
+                await job.on_failed(e)
+                return
+
+            self.sent += 1
+            SENDS.inc(outcome="sent")
+            if job.due_at is not None:
+                DELIVERY_LAG.observe((datetime.now(pytz.utc) - as_utc(job.due_at)).total_seconds())
+            if self.on_delivered is not None:
+                try:
+                    await self.on_delivered(job)
+                except Exception as e:
+                    logger.error(msg=f"Ошибка обработки доставки сообщения в чат {job.chat_id}: {e}")
+            if job.on_sent is not None:
+                await job.on_sent()
+            return
+
+        self.failed += 1
+        SENDS.inc(outcome="failed")
+        logger.error(msg=f"Сообщение в чат {job.chat_id} не отправлено: превышено число повторов")
+        if job.on_failed is not None:
+            await job.on_failed(RuntimeError("Превышено число повторов после flood control"))
+
+    async def _mark_undeliverable(self, chat_id: Union[int, str], error: Exception) -> None:
+        """Запоминает недоступный чат и сообщает о нём (например, чтобы отключить пользователя)."""
+        if chat_id in self._undeliverable_chats:
+            return
+        self._undeliverable_chats[chat_id] = error
+        self.undeliverable += 1
+        SENDS.inc(outcome="undeliverable")
+        if self.on_undeliverable is not None:
+            try:
+                await self.on_undeliverable(chat_id, error)
+            except Exception as e:
+                logger.error(msg=f"Ошибка при отключении недоступного чата {chat_id}: {e}")
@@ -0,0 +1,116 @@
+import time
+from collections import OrderedDict
+from copy import deepcopy
+from datetime import datetime
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from motor.motor_asyncio import AsyncIOMotorCollection
+from app.core.config import Settings
+from app.core.database import ensure_ttl_index
+
+# Хранилища состояний диалогов
+FSM_STORAGE_MEMORY = "memory"
+FSM_STORAGE_MONGO = "mongo"
+
+
+class MongoFSMStorage(BaseStorage):
+    """
+    Хранилище состояний диалогов aiogram в MongoDB: диалоги переживают перезапуск
+    и доступны любому экземпляру бота.
+
+    Один документ на ключ: `{_id, state, data, updated_at}`. Брошенные диалоги удаляет
+    TTL-индекс по `updated_at`. Поверх базы — небольшой LRU+TTL кэш процесса со сквозной
+    записью: каждое изменение — одна запись в MongoDB без предварительного чтения, а
+    чтение при попадании в кэш обходится без запроса. Кэш верен, только пока обновления
+    чата обрабатывает один экземпляр: иначе он отставал бы до `cache_ttl` секунд, поэтому
+    `create_fsm_storage` за вебхуком по умолчанию его выключает (`cache_size=0`).
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        cache_size: int,
+        cache_ttl: float,
+        key_builder: Optional[KeyBuilder] = None,
+    ) -> None:
+        self._collection = collection
+        self.cache_size: int = cache_size
+        self.cache_ttl: float = cache_ttl
+        self.key_builder: KeyBuilder = key_builder or DefaultKeyBuilder()
+        self._cache: "OrderedDict[str, Tuple[Optional[str], Dict[str, Any], float]]" = OrderedDict()
+
+    async def ensure_indexes(self, ttl_seconds: int) -> None:
+        """TTL-индекс для брошенных диалогов."""
+        await ensure_ttl_index(collection=self._collection, field="updated_at", name="updated_at_ttl", expire_after_seconds=ttl_seconds)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._write(
+            document_id=self.key_builder.build(key),
+            field="state",
+            value=state.state if isinstance(state, State) else state
+        )
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        state, _ = await self._load(document_id=self.key_builder.build(key))
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self._write(document_id=self.key_builder.build(key), field="data", value=dict(data))
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, data = await self._load(document_id=self.key_builder.build(key))
+        return deepcopy(data)
+
+    async def close(self) -> None:
+        """Общий клиент MongoDB закрывается реестром; здесь только сбрасываем кэш."""
+        self._cache.clear()
+
+    async def _load(self, document_id: str) -> Tuple[Optional[str], Dict[str, Any]]:
+        entry = self._cache.get(document_id)
+        if entry is not None and entry[2] > time.monotonic():
+            self._cache.move_to_end(document_id)
+            return entry[0], entry[1]
+
+        document: Optional[Dict[str, Any]] = await self._collection.find_one(filter={"_id": document_id})
+        state: Optional[str] = document.get("state") if document else None
+        data: Dict[str, Any] = (document.get("data") if document else None) or {}
+        self._remember(document_id=document_id, state=state, data=data)
+        return state, data
+
+    async def _write(self, document_id: str, field: str, value: Any) -> None:
+        """Одна запись: меняется только одно поле, второе читать не нужно."""
+        await self._collection.update_one(
+            filter={"_id": document_id},
+            update={"$set": {field: value, "updated_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+        entry = self._cache.get(document_id)
+        if entry is None or entry[2] <= time.monotonic():
+            # Второе поле неизвестно — при следующем чтении документ будет прочитан целиком
+            self._cache.pop(document_id, None)
+            return
+        state, data = (value, entry[1]) if field == "state" else (entry[0], value)
+        self._remember(document_id=document_id, state=state, data=data)
+
+    def _remember(self, document_id: str, state: Optional[str], data: Dict[str, Any]) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[document_id] = (state, deepcopy(data), time.monotonic() + self.cache_ttl)
+        self._cache.move_to_end(document_id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+
+def create_fsm_storage(settings: Settings, collection: AsyncIOMotorCollection) -> BaseStorage:
+    """Хранилище состояний диалогов, выбранное в настройках (`FSM_STORAGE`)."""
+    if settings.FSM_STORAGE == FSM_STORAGE_MONGO:
+        return MongoFSMStorage(
+            collection=collection,
+            cache_size=settings.get_fsm_cache_size(),
+            cache_ttl=settings.FSM_CACHE_TTL_SECONDS,
+        )
+    return MemoryStorage()
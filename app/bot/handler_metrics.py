@@ -0,0 +1,28 @@
+import time
+from typing import Any, Awaitable, Callable, Dict
+
+from aiogram import BaseMiddleware
+from aiogram.types import TelegramObject
+
+from app.core.metrics import HANDLER_DURATION
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    """
+    Inner-middleware: замеряет длительность хэндлера и пишет её в гистограмму
+    с меткой — именем функции хэндлера.
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any],
+    ) -> Any:
+        handler_object = data.get("handler")
+        name: str = getattr(getattr(handler_object, "callback", None), "__name__", "unknown")
+        started_at = time.monotonic()
+        try:
+            return await handler(event, data)
+        finally:
+            HANDLER_DURATION.observe(time.monotonic() - started_at, handler=name)
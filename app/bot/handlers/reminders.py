@@ -1,27 +1,27 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 from aiogram import Router, F
 from aiogram.types import Message, InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 
-from bson import ObjectId
 from datetime import datetime
 import logging
 
-from pymongo.results import UpdateResult
+from bson import ObjectId
 
 from app.bot.keyboards import main_menu, recurring_menu, delete_menu
+from app.core.config import Settings, get_settings
 from app.dependencies.reminder_dependencies import reminder_notification
-
-
-from app.core.mongo_collections import notification_collection
+from app.repositories.reminder_repository import ReminderPage
+from app.services.recurrence import describe_recurrence
 
 
 
 
 
 router = Router()
+settings: Settings = get_settings()
 
 
 logger: logging.Logger = logging.getLogger(name="app_logger")
@@ -70,7 +70,7 @@ async def get_recurring(message: Message, state: FSMContext) -> None:
     data: Dict[str, Any] = await state.get_data()
 
     if message.text.lower() == "да":
-        await message.answer(text="Выберите частоту: Ежедневные, Еженедельные, Ежемесячные", reply_markup=recurring_menu)
+        await message.answer(text="Выберите частоту: Ежедневные, Еженедельные, Ежемесячные, По будням", reply_markup=recurring_menu)
         await state.set_state(state=ReminderState.waiting_for_frequency)  # Переход в новый шаг
     elif message.text.lower() == "нет":
         await reminder_notification.add_reminder(
@@ -93,14 +93,15 @@ async def get_recurring_frequency(message: Message, state: FSMContext) -> None:
     recurring_mapping: dict[str, str] = {
         "Ежедневные": "daily",
         "Еженедельные": "weekly",
-        "Ежемесячные": "monthly"
+        "Ежемесячные": "monthly",
+        "По будням": "weekdays"
     }
 
     recurring: str | None = recurring_mapping.get(message.text)  # Сопоставляем с доступными вариантами
 
     if not recurring:
         logger.warning(msg=f"Пользователь {message.from_user.id} выбрал некорректную частоту: {message.text}")
-        await message.answer(text="❌ Ошибка! Выберите одну из опций: 'Ежедневные', 'Еженедельные', 'Ежемесячные'.")
+        await message.answer(text="❌ Ошибка! Выберите одну из опций: 'Ежедневные', 'Еженедельные', 'Ежемесячные', 'По будням'.")
         return
 
     # Добавление напоминания с повторением
@@ -115,50 +116,107 @@ async def get_recurring_frequency(message: Message, state: FSMContext) -> None:
     await state.clear()
 
 
-# Просмотр всех активных напоминаний
+# Постраничная навигация: в callback_data передаётся направление и ключ (date, _id)
+# граничного напоминания страницы; rlist — список, rdel — удаление
+LIST_PAGE_PREFIX = "rlist"
+DELETE_PAGE_PREFIX = "rdel"
+CURSOR_DATE_FORMAT = "%Y%m%d%H%M%S%f"
+
+# Ограничение длины текста одного напоминания в списке (лимит сообщения Telegram — 4096 символов)
+MAX_ITEM_TEXT = 300
+
+
+def encode_cursor(prefix: str, direction: str, reminder: Dict[str, Any]) -> str:
+    return f"{prefix}:{direction}:{reminder['date'].strftime(CURSOR_DATE_FORMAT)}:{reminder['_id']}"
+
+
+def decode_cursor(data: str) -> Tuple[bool, Tuple[datetime, ObjectId]]:
+    """Разбирает callback_data навигации: (назад ли, (date, _id))."""
+    _, direction, date, reminder_id = data.split(sep=":")
+    return direction == "p", (datetime.strptime(date, CURSOR_DATE_FORMAT), ObjectId(reminder_id))
+
+
+def navigation_row(prefix: str, page: ReminderPage) -> List[InlineKeyboardButton]:
+    row: List[InlineKeyboardButton] = []
+    if page.items and page.has_prev:
+        row.append(InlineKeyboardButton(text="⬅️ Назад", callback_data=encode_cursor(prefix, "p", page.items[0])))
+    if page.items and page.has_next:
+        row.append(InlineKeyboardButton(text="Вперёд ➡️", callback_data=encode_cursor(prefix, "n", page.items[-1])))
+    return row
+
+
+def render_list_page(page: ReminderPage) -> Tuple[str, Optional[InlineKeyboardMarkup]]:
+    if not page.items:
+        return "Нет активных напоминаний.", None
+
+    text: str = "\n\n".join(
+        f"📌 {r['message'][:MAX_ITEM_TEXT]} | 🕒 {r['date']} | 🔁 {describe_recurrence(r['recurring'])}"
+        for r in page.items
+    )
+    row = navigation_row(prefix=LIST_PAGE_PREFIX, page=page)
+    return text, InlineKeyboardMarkup(inline_keyboard=[row]) if row else None
+
+
+def render_delete_page(page: ReminderPage) -> InlineKeyboardMarkup:
+    keyboard: List[List[InlineKeyboardButton]] = [
+        [InlineKeyboardButton(text=f"{r['message'][:MAX_ITEM_TEXT]} | {r['date']}", callback_data=f"delete_reminder:{r['_id']}")]
+        for r in page.items
+    ]
+    row = navigation_row(prefix=DELETE_PAGE_PREFIX, page=page)
+    if row:
+        keyboard.append(row)
+    return InlineKeyboardMarkup(inline_keyboard=keyboard)
+
+
+async def load_page(user_id: str, data: Optional[str] = None) -> ReminderPage:
+    """Страница по callback_data навигации (без неё — первая страница)."""
+    if data is None:
+        return await reminder_notification.get_reminders_page(user_id=user_id, limit=settings.REMINDERS_PAGE_SIZE)
+
+    backward, cursor = decode_cursor(data=data)
+    page = await reminder_notification.get_reminders_page(
+        user_id=user_id, limit=settings.REMINDERS_PAGE_SIZE, cursor=cursor, backward=backward
+    )
+    if not page.items:
+        # Напоминания могли удалить, пока страница была открыта — возвращаемся в начало
+        page = await reminder_notification.get_reminders_page(user_id=user_id, limit=settings.REMINDERS_PAGE_SIZE)
+    return page
+
+
+# Просмотр активных напоминаний (постранично)
 @router.message(F.text == "Список напоминаний")
 async def view_reminders(message: Message):
     try:
-        reminders: List[Dict[str, Any]] = await reminder_notification.get_all_reminders(user_id=str(message.from_user.id))
-
-        # Сопоставление системных имен с удобными для пользователя
-        recurring_mapping: Dict[str, str] = {
-            "daily": "Ежедневные",
-            "weekly": "Еженедельные",
-            "monthly": "Ежемесячные"
-        }
-
-        if reminders:
-            response: str = "\n\n".join(
-                f"📌 {r['message']} | 🕒 {r['date']} | 🔁 {recurring_mapping.get(r['recurring'], 'Однократно')}"
-                for r in reminders
-            )
-        else:
-            response = "Нет активных напоминаний."
+        page: ReminderPage = await load_page(user_id=str(message.from_user.id))
+        text, keyboard = render_list_page(page=page)
 
-        logger.info(msg=f"Пользователь {message.from_user.id} запросил список напоминаний ({len(reminders)} шт.)")
-        await message.answer(text=response)
+        logger.info(msg=f"Пользователь {message.from_user.id} запросил список напоминаний ({len(page.items)} шт. на странице)")
+        await message.answer(text=text, reply_markup=keyboard)
     except Exception as e:
         logger.error(msg=f"Ошибка при загрузке напоминаний пользователя {message.from_user.id}: {e}")
         await message.answer(text=f"Ошибка при загрузке напоминаний: {e}")
 
 
+@router.callback_query(F.data.startswith(f"{LIST_PAGE_PREFIX}:"))
+async def view_reminders_page(callback_query: CallbackQuery) -> None:
+    page: ReminderPage = await load_page(user_id=str(object=callback_query.from_user.id), data=callback_query.data)
+    text, keyboard = render_list_page(page=page)
+    await callback_query.message.edit_text(text=text, reply_markup=keyboard)
+    await callback_query.answer()
+
+
 # Удаление напоминаний
 @router.message(F.text == "Удалить напоминание")
+async def open_delete_menu(message: Message) -> None:
+    await message.answer(text="Что удалить?", reply_markup=delete_menu)
+
+
+@router.message(F.text == "Удалить конкретное напоминание")
 async def delete_reminder_prompt(message: Message) -> None:
     try:
-        reminders: List[Dict[str, Any]] = await reminder_notification.get_all_reminders(user_id=str(message.from_user.id))
-        if reminders:
-            keyboard = InlineKeyboardMarkup(inline_keyboard=[
-                [
-                    InlineKeyboardButton(
-                        text=f"{r['message']} | {r['date']}",
-                        callback_data=f"delete_reminder:{r['_id']}"
-                    )
-                ]
-                for r in reminders
-            ])
-            await message.answer(text="Выберите напоминание для удаления:", reply_markup=keyboard)
+        page: ReminderPage = await load_page(user_id=str(message.from_user.id))
+        if page.items:
+            await message.answer(text="Выберите напоминание для удаления:", reply_markup=render_delete_page(page=page))
         else:
             await message.answer(text="Нет активных напоминаний.")
     except Exception as e:
@@ -166,6 +224,36 @@ async def delete_reminder_prompt(message: Message) -> None:
         await message.answer(text=f"Ошибка при загрузке напоминаний: {e}")
 
 
+@router.callback_query(F.data.startswith(f"{DELETE_PAGE_PREFIX}:"))
+async def delete_reminder_page(callback_query: CallbackQuery) -> None:
+    page: ReminderPage = await load_page(user_id=str(object=callback_query.from_user.id), data=callback_query.data)
+    if page.items:
+        await callback_query.message.edit_reply_markup(reply_markup=render_delete_page(page=page))
+    else:
+        await callback_query.message.edit_text("Нет активных напоминаний.")
+    await callback_query.answer()
+
+
+@router.message(F.text == "Удалить все напоминания")
+async def delete_all_prompt(message: Message) -> None:
+    keyboard = InlineKeyboardMarkup(inline_keyboard=[
+        [InlineKeyboardButton(text="🗑 Да, удалить все", callback_data="delete_all_reminders")]
+    ])
+    await message.answer(text="Удалить все активные напоминания? Это действие нельзя отменить.", reply_markup=keyboard)
+
+
+@router.callback_query(F.data == "delete_all_reminders")
+async def delete_all_callback(callback_query: CallbackQuery) -> None:
+    try:
+        deleted: int = await reminder_notification.remove_all_reminders(user_id=str(object=callback_query.from_user.id))
+        logger.info(msg=f"Пользователь {callback_query.from_user.id} удалил все напоминания ({deleted} шт.)")
+        await callback_query.message.edit_text(f"✅ Удалено напоминаний: {deleted}." if deleted else "Нет активных напоминаний.")
+    except Exception as e:
+        logger.error(msg=f"Ошибка при удалении всех напоминаний пользователем {callback_query.from_user.id}: {e}")
+        await callback_query.message.edit_text(f"Ошибка при удалении напоминаний: {e}")
+    await callback_query.answer()
+
+
 @router.callback_query(F.data.startswith("delete_reminder:"))
 async def delete_reminder_callback(callback_query: CallbackQuery) -> None:
     reminder_id: str = callback_query.data.split(sep=":")[1]
@@ -190,13 +278,23 @@ async def confirm_reminder(callback_query: CallbackQuery) -> None:
     """Обрабатывает подтверждение напоминания пользователем."""
     reminder_id: str = callback_query.data.split(sep=":")[1]
 
-    result: UpdateResult = await notification_collection.update_one(
-        filter={"_id": ObjectId(reminder_id)},
-        update={"$set": {"completed": True}}
+    result: bool = await reminder_notification.mark_reminder_completed(
+        user_id=str(object=callback_query.from_user.id),
+        reminder_id=reminder_id
     )
 
-    if result.modified_count > 0:
+    if result:
         logger.info(msg=f"✅ Пользователь {callback_query.from_user.id} подтвердил напоминание {reminder_id}")
-        await callback_query.message.edit_text("✅ Напоминание подтверждено.")
+        # В сводке несколько кнопок: убираем только подтверждённую, текст сводки оставляем
+        markup = callback_query.message.reply_markup
+        remaining = [
+            row for row in (markup.inline_keyboard if markup else [])
+            if row[0].callback_data != callback_query.data
+        ]
+        if remaining:
+            await callback_query.message.edit_reply_markup(reply_markup=InlineKeyboardMarkup(inline_keyboard=remaining))
+            await callback_query.answer(text="✅ Напоминание подтверждено.")
+        else:
+            await callback_query.message.edit_text("✅ Напоминание подтверждено.")
     else:
         await callback_query.answer(text="❌ Ошибка: напоминание уже подтверждено или не найдено.", show_alert=True)
\ No newline at end of file
@@ -6,6 +6,7 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.fsm.context import FSMContext
 
 from app.bot.keyboards import main_menu, settings_menu, timezone_menu
+from app.dependencies.reminder_dependencies import reminder_notification
 from app.repositories.users_repository import user_service
 
 router = Router()
@@ -33,6 +34,11 @@ async def start_command(message: Message, state: FSMContext):
         )
         await state.set_state(state=UserState.waiting_for_timezone)
     else:
+        if user.get("active") is False:
+            # Пользователь снова доступен — возобновляем отправку его напоминаний
+            await user_service.set_user_active(user_id=user_id, active=True)
+            await reminder_notification.set_user_active(user_id=user_id, active=True)
+            logger.info(msg=f"Пользователь {user_id} снова активен")
         await message.answer(text=f"С возвращением, {first_name}!", reply_markup=main_menu)
 
 
@@ -20,11 +20,13 @@ main_menu = ReplyKeyboardMarkup(
 btn_daily = KeyboardButton(text="Ежедневные")
 btn_weekly = KeyboardButton(text="Еженедельные")
 btn_monthly = KeyboardButton(text="Ежемесячные")
+btn_weekdays = KeyboardButton(text="По будням")
 btn_back_to_main = KeyboardButton(text="Назад в главное меню")
 
 recurring_menu = ReplyKeyboardMarkup(
     keyboard=[
         [btn_daily, btn_weekly, btn_monthly],
+        [btn_weekdays],
         [btn_back_to_main],
     ],
     resize_keyboard=True
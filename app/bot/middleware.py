@@ -1,47 +1,227 @@
 import logging
 import asyncio
-from datetime import datetime
-from typing import Any, Dict, List
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 import pytz
 from aiogram import Bot
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton, CallbackQuery
-from app.dependencies.reminder_dependencies import reminder_middleware_notification
+from app.bot.delivery import DeliveryEngine, DeliveryJob
+from app.bot.outbox import DeliveryOutbox, digest_key, occurrence_key
+from app.bot.session import TelegramSession
+from app.core.config import Settings, get_settings
+from app.core.metrics import SWEEP_DURATION
+from app.services.catch_up import DIGEST_MAX_ITEMS, CatchUpPolicy, format_digest, shorten
+from app.services.scheduler import as_utc
+from app.repositories.users_repository import user_service
+from app.services.timezone_cache import get_tzinfo
+from app.dependencies.reminder_dependencies import (
+    audit_writer,
+    outbox_repository,
+    reminder_middleware_notification,
+    reminder_scheduler,
+    reminder_state_writer,
+)
+from app.repositories.audit_writer import AUDIT_FIRED, AUDIT_SKIPPED
 
 logger: logging.Logger = logging.getLogger(name="app_logger")
 
 
+def lease_duration(settings: Settings) -> timedelta:
+    """
+    Срок аренды напоминания. Захваченная пачка ждёт в очереди отправки, пока перед ней
+    не разойдутся до DELIVERY_QUEUE_SIZE сообщений при общем лимите DELIVERY_GLOBAL_RATE;
+    если аренда истечёт раньше, другой экземпляр захватит напоминание и отправит его повторно.
+    """
+    drain_seconds: float = (settings.DELIVERY_QUEUE_SIZE + settings.SWEEP_BATCH_SIZE) / settings.DELIVERY_GLOBAL_RATE
+    return timedelta(seconds=settings.LEASE_SECONDS + drain_seconds)
+
+
+def due_at(reminders: List[Dict[str, Any]]) -> Optional[datetime]:
+    """Самое раннее время срабатывания (UTC) среди напоминаний сообщения — для метрики опоздания."""
+    fire_times = [as_utc(reminder["fire_at"]) for reminder in reminders if reminder.get("fire_at")]
+    return min(fire_times) if fire_times else None
+
+
 class ReminderNotifier:
-    """Middleware для отправки уведомлений пользователям с возможностью подтверждения."""
+    """
+    Middleware для отправки уведомлений пользователям с возможностью подтверждения.
+    Настройки по умолчанию — общие настройки процесса (замеры передают свою копию).
+    """
 
-    def __init__(self, bot: Bot) -> None:
+    def __init__(self, bot: Bot, settings: Optional[Settings] = None) -> None:
         self.bot: Bot = bot
         self.is_running = True
 
+        settings = settings or get_settings()
+        self.confirmation_timeout = timedelta(seconds=settings.CONFIRMATION_TIMEOUT_SECONDS)
+        self.confirmation_check_interval: int = settings.CONFIRMATION_CHECK_INTERVAL_SECONDS
+        self.batch_size: int = settings.SWEEP_BATCH_SIZE
+        self.instance_id: str = settings.NOTIFIER_INSTANCE_ID
+        self.lease: timedelta = lease_duration(settings=settings)
+        self.catch_up = CatchUpPolicy(
+            mode=settings.CATCH_UP_POLICY,
+            grace=timedelta(seconds=settings.CATCH_UP_GRACE_SECONDS),
+            max_staleness=timedelta(seconds=settings.CATCH_UP_MAX_STALENESS_SECONDS) if settings.CATCH_UP_MAX_STALENESS_SECONDS else None,
+        )
+
+        self.digest_mode: bool = settings.DIGEST_MODE
+        self.digest_window: float = settings.DIGEST_WINDOW_SECONDS
+
+        engine = DeliveryEngine(
+            bot=bot,
+            workers=settings.DELIVERY_WORKERS,
+            global_rate=settings.DELIVERY_GLOBAL_RATE,
+            per_chat_rate=settings.DELIVERY_PER_CHAT_RATE,
+            queue_size=settings.DELIVERY_QUEUE_SIZE,
+            on_undeliverable=self.suppress_chat,
+            on_delivered=self.start_confirmation_window,
+        )
+
+        # С outbox уведомления сначала записываются в MongoDB и отправляются циклом outbox.run
+        self.outbox: Optional[DeliveryOutbox] = None
+        if settings.OUTBOX_ENABLED:
+            self.outbox = DeliveryOutbox(
+                repository=outbox_repository,
+                engine=engine,
+                owner=self.instance_id,
+                lease=self.lease,
+                max_attempts=settings.OUTBOX_MAX_ATTEMPTS,
+                backoff_base=settings.OUTBOX_BACKOFF_BASE_SECONDS,
+                backoff_max=settings.OUTBOX_BACKOFF_MAX_SECONDS,
+                batch_size=settings.OUTBOX_BATCH_SIZE,
+                poll_interval=settings.OUTBOX_POLL_INTERVAL_SECONDS,
+                on_dead=self.abandon_confirmation,
+            )
+        self.delivery = self.outbox or engine
+
+    async def suppress_chat(self, chat_id: Any, error: Exception) -> None:
+        """
+        Отключает пользователя, чат которого недоступен (бот заблокирован, чат не найден, аккаунт удалён):
+        его напоминания исключаются из выборки до следующего /start.
+        """
+        user_id = str(chat_id)
+        await user_service.set_user_active(user_id=user_id, active=False, reason=str(error))
+        suspended: int = await reminder_middleware_notification.set_user_active(user_id=user_id, active=False)
+        logger.warning(msg=f"Чат {user_id} недоступен ({error}): пользователь отключён, приостановлено напоминаний: {suspended}")
+
+    async def start_confirmation_window(self, job: DeliveryJob) -> None:
+        """
+        Срок подтверждения разовых напоминаний сообщения отсчитывается от его фактической
+        отправки: при outbox сообщение может ждать в очереди дольше самого срока.
+        """
+        # Не ждём ответа: срок подтверждения хранится в БД и обрабатывается run_confirmation_timeouts
+        expires_at: datetime = datetime.now(pytz.utc) + self.confirmation_timeout
+        for reminder_id in job.confirm_ids:
+            await reminder_middleware_notification.schedule_confirmation_timeout(reminder_id=reminder_id, expires_at=expires_at)
+
+    async def abandon_confirmation(self, reminder_ids: List[str]) -> None:
+        """Сообщение ушло в dead-letter: разовые напоминания завершаются ближайшим циклом тайм-аутов."""
+        for reminder_id in reminder_ids:
+            await reminder_middleware_notification.schedule_confirmation_timeout(
+                reminder_id=reminder_id, expires_at=datetime.now(pytz.utc)
+            )
+        logger.warning(msg=f"Напоминания {reminder_ids} не доставлены и будут завершены без подтверждения")
+
     async def start(self) -> None:
-        """Запускает цикл проверки напоминаний."""
+        """
+        Запускает цикл уведомлений на планировщике: спим ровно до ближайшего напоминания,
+        а раз в окно планировщика перечитываем коллекцию для сверки.
+        """
         while self.is_running:
+            now: datetime = datetime.now(pytz.utc)
             try:
-                await self.check_reminders()
+                if reminder_scheduler.needs_reload(now):
+                    await self.reload_schedule(now=now)
+
+                next_fire_at: Optional[datetime] = reminder_scheduler.next_fire_at()
+                if self.digest_mode and next_fire_at is not None and next_fire_at <= now:
+                    # Даём наступить напоминаниям с близким временем, чтобы объединить их в сводку
+                    await asyncio.sleep(delay=self.digest_window)
+                    now = datetime.now(pytz.utc)
+
+                due: List[Dict[str, Any]] = reminder_scheduler.pop_due(now)
+                if due:
+                    await self.send_reminders(reminders=due)
             except Exception as e:
                 logger.error(msg=f"Ошибка в обработке уведомлений: {e}")
+                await asyncio.sleep(delay=1)
 
-            await asyncio.sleep(delay=60)  # Проверяем раз в минуту
+            await reminder_scheduler.wait(now=datetime.now(pytz.utc))
 
-    async def check_reminders(self) -> None:
-            """Проверяет, есть ли напоминания, которые нужно отправить."""
-            now: datetime = datetime.now()  # Локальное время сервера
+    async def run_confirmation_timeouts(self) -> None:
+        """Отдельный цикл: завершает разовые напоминания, которые не подтвердили за отведённое время."""
+        while self.is_running:
+            try:
+                expired: int = await reminder_middleware_notification.expire_confirmations(now=datetime.now(pytz.utc))
+                if expired:
+                    logger.info(msg=f"{expired} напоминаний автоматически завершены (тайм-аут подтверждения).")
+            except Exception as e:
+                logger.error(msg=f"Ошибка при обработке тайм-аутов подтверждения: {e}")
+
+            await asyncio.sleep(delay=self.confirmation_check_interval)
+
+    async def reload_schedule(self, now: datetime) -> None:
+        """
+        Перечитывает напоминания до конца следующего окна курсором пачками. Просроченные
+        (накопившиеся за время простоя) сразу уходят в очередь отправки, будущие — в кучу
+        планировщика. В памяти одновременно только текущая пачка и ограниченная куча.
+        """
+        started_at = time.monotonic()
+        horizon: datetime = now + reminder_scheduler.window
+        reminder_scheduler.reset(horizon=horizon)
+        overdue_total = 0
+
+        async for batch in reminder_middleware_notification.iter_due_reminders(now=horizon, batch_size=self.batch_size):
+            overdue: List[Dict[str, Any]] = []
+            for reminder in batch:
+                if as_utc(reminder["fire_at"]) <= now:
+                    overdue.append(reminder)
+                else:
+                    reminder_scheduler.schedule(reminder)
+            if overdue:
+                # Очередь отправки ограничена: при большом долге чтение ждёт, пока она освободится
+                await self.enqueue_reminders(reminders=overdue)
+                overdue_total += len(overdue)
 
-            reminders: List[Dict[str, Any]] = await reminder_middleware_notification.get_all_active_reminders()  # Получаем ВСЕ активные напоминания
+        if overdue_total:
+            await self.delivery.join()
+            await reminder_state_writer.flush()
+            SWEEP_DURATION.observe(time.monotonic() - started_at, source="sweep")
+            logger.info(msg=f"Просроченные напоминания обработаны: {overdue_total}: {self.stats()}")
+        logger.info(msg=f"Планировщик загружен: {len(reminder_scheduler)} напоминаний до {reminder_scheduler.horizon}")
 
+    async def send_reminders(self, reminders: List[Dict[str, Any]]) -> None:
+            """Отправляет наступившие напоминания и ждёт окончания доставки."""
+            started_at = time.monotonic()
+            await self.enqueue_reminders(reminders=reminders)
+
+            # Отправка идёт параллельно в пуле воркеров; ждём, пока вся пачка будет обработана
+            await self.delivery.join()
+            await reminder_state_writer.flush()
+            SWEEP_DURATION.observe(time.monotonic() - started_at, source="scheduler")
+            if reminders:
+                logger.info(msg=f"Пачка из {len(reminders)} напоминаний обработана: {self.stats()}")
+
+    async def enqueue_reminders(self, reminders: List[Dict[str, Any]]) -> None:
+            """Ставит наступившие напоминания в очередь отправки."""
+            now: datetime = datetime.now(pytz.utc)
+
+            # Берём напоминания в аренду: при нескольких экземплярах бота каждое отправит только один
+            reminders = await reminder_middleware_notification.claim_reminders(
+                reminders=reminders, owner=self.instance_id, now=now, lease=self.lease
+            )
+
+            # Часовые пояса всех пользователей пачки — одним запросом (с кэшем)
+            timezones: Dict[str, str] = await reminder_middleware_notification.get_user_timezones(
+                user_ids=[reminder["user_id"] for reminder in reminders]
+            )
+
+            due: List[Dict[str, Any]] = []
             for reminder in reminders:
                 user_id = reminder["user_id"]
                 reminder_time = reminder["date"]
-                reminder_id = str(object=reminder["_id"])
-                recurring = reminder.get("recurring", None)
-
-                # Получаем часовой пояс пользователя через сервис
-                user_timezone: str = await reminder_middleware_notification.get_user_timezone(user_id=user_id)
-                user_tz: pytz._UTCclass | pytz.StaticTzInfo | pytz.DstTzInfo = pytz.timezone(user_timezone)
+                user_tz: pytz.BaseTzInfo = get_tzinfo(zone=timezones[user_id])
 
                 # Преобразуем `naive` datetime в `aware`, если необходимо
                 if reminder_time.tzinfo is None:
@@ -51,22 +231,156 @@ class ReminderNotifier:
 
                 # Проверяем отправку уведомления
                 if now_local >= reminder_time:
-                    if recurring:
-                        await self.bot.send_message(chat_id=user_id, text=f"🔔 Напоминание: {reminder['message']}")
-                        logger.info(msg=f"Повторяющееся напоминание {reminder_id} отправлено пользователю {user_id}")
-
-                        # Переносим напоминание на следующую дату без изменения времени
-                        await reminder_middleware_notification.move_to_next_occurrence(reminder_id=reminder_id, recurring=recurring)
-                    else:
-                        confirm_button = InlineKeyboardMarkup(inline_keyboard=[
-                            [InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"confirm_reminder:{reminder_id}")]
-                        ])
-                        await self.bot.send_message(chat_id=user_id, text=f"🔔 Напоминание: {reminder['message']}", reply_markup=confirm_button)
-                        logger.info(msg=f"Разовое напоминание {reminder_id} отправлено пользователю {user_id}")
-
-                        # Ждем 5 минут, если не подтверждено → завершаем
-                        await asyncio.sleep(delay=300)
-                        await self.mark_as_completed(reminder_id=reminder_id, recurring=recurring)
+                    due.append(reminder)
+
+            # Пропущенные во время простоя напоминания обрабатываем по политике досылки
+            plan = self.catch_up.plan(reminders=due, now=now)
+
+            for reminder in plan.stale:
+                await audit_writer.record(
+                    event=AUDIT_SKIPPED, user_id=reminder["user_id"], reminder_id=reminder["_id"], fire_at=reminder.get("fire_at")
+                )
+                await reminder_middleware_notification.schedule_missed(reminder=reminder, after=self._replay_after(now=now))
+            if plan.stale:
+                logger.warning(msg=f"Пропущено без отправки {len(plan.stale)} устаревших напоминаний: {[str(r['_id']) for r in plan.stale]}")
+
+            for job in self._build_jobs(reminders=plan.send):
+                await self.delivery.submit(job=job)
+
+            for user_id, missed in plan.digests.items():
+                await self.delivery.submit(job=self._build_digest_job(user_id=user_id, reminders=missed))
+
+    def _replay_after(self, now: datetime) -> Optional[datetime]:
+        """
+        С какого момента досылать повторы устаревшей серии: при политике `all` — с границы
+        устаревания, иначе None (серия сразу переносится в будущее).
+        """
+        if self.catch_up.replays_missed and self.catch_up.max_staleness is not None:
+            return now - self.catch_up.max_staleness
+        return None
+
+    def _build_jobs(self, reminders: List[Dict[str, Any]]) -> List[DeliveryJob]:
+        """В режиме сводки объединяет напоминания одного пользователя в одно сообщение."""
+        if not self.digest_mode:
+            return [self._build_job(reminder=reminder) for reminder in reminders]
+
+        by_user: Dict[Any, List[Dict[str, Any]]] = {}
+        for reminder in reminders:
+            by_user.setdefault(reminder["user_id"], []).append(reminder)
+
+        jobs: List[DeliveryJob] = []
+        for user_id, user_reminders in by_user.items():
+            if len(user_reminders) == 1:
+                jobs.append(self._build_job(reminder=user_reminders[0]))
+                continue
+            for start in range(0, len(user_reminders), DIGEST_MAX_ITEMS):
+                jobs.append(self._build_user_digest_job(user_id=user_id, reminders=user_reminders[start:start + DIGEST_MAX_ITEMS]))
+        return jobs
+
+    def _build_job(self, reminder: Dict[str, Any]) -> DeliveryJob:
+        """Готовит сообщение и действие, которое нужно выполнить после его доставки."""
+        user_id = reminder["user_id"]
+        reminder_id = str(object=reminder["_id"])
+        recurring = reminder.get("recurring", None)
+        text = f"🔔 Напоминание: {reminder['message']}"
+
+        if recurring:
+            async def on_sent() -> None:
+                logger.info(msg=f"Повторяющееся напоминание {reminder_id} отправлено пользователю {user_id}")
+                await audit_writer.record(event=AUDIT_FIRED, user_id=user_id, reminder_id=reminder_id)
+                # Переносим напоминание на следующую дату без изменения времени (пакетной записью);
+                # при политике `all` — на следующее срабатывание серии, даже если оно уже пропущено
+                after = as_utc(reminder["fire_at"]) if self.catch_up.replays_missed and reminder.get("fire_at") else None
+                await reminder_middleware_notification.schedule_next_occurrence(reminder=reminder, after=after)
+
+            return DeliveryJob(
+                chat_id=user_id, text=text, on_sent=on_sent, key=occurrence_key(reminder=reminder), due_at=due_at(reminders=[reminder])
+            )
+
+        confirm_button = InlineKeyboardMarkup(inline_keyboard=[
+            [InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"confirm_reminder:{reminder_id}")]
+        ])
+
+        async def on_sent() -> None:
+            logger.info(msg=f"Разовое напоминание {reminder_id} отправлено пользователю {user_id}")
+            await audit_writer.record(event=AUDIT_FIRED, user_id=user_id, reminder_id=reminder_id)
+            # Срок подтверждения начинает start_confirmation_window после фактической отправки;
+            # записанное в outbox напоминание до этого только выходит из выборки наступивших
+            if self.outbox is not None:
+                await reminder_middleware_notification.schedule_queued(reminder_id=reminder_id)
+
+        return DeliveryJob(
+            chat_id=user_id,
+            text=text,
+            reply_markup=confirm_button,
+            on_sent=on_sent,
+            key=occurrence_key(reminder=reminder),
+            due_at=due_at(reminders=[reminder]),
+            confirm_ids=[reminder_id],
+        )
+
+    def _build_user_digest_job(self, user_id: Any, reminders: List[Dict[str, Any]]) -> DeliveryJob:
+        """
+        Одно сообщение с несколькими наступившими напоминаниями и кнопкой подтверждения для каждого разового.
+        Каждый пункт обрезается до DIGEST_ITEM_TEXT символов, поэтому DIGEST_MAX_ITEMS пунктов всегда
+        укладываются в лимит Telegram и ни одно напоминание пачки не выпадает из текста.
+        """
+        lines = [f"🔔 Напоминания ({len(reminders)}):"]
+        buttons: List[List[InlineKeyboardButton]] = []
+        for number, reminder in enumerate(reminders, start=1):
+            lines.append(f"{number}. {shorten(reminder['message'])}" + (" 🔁" if reminder.get("recurring") else ""))
+            if not reminder.get("recurring"):
+                buttons.append([InlineKeyboardButton(
+                    text=f"✅ {number}. {reminder['message'][:30]}",
+                    callback_data=f"confirm_reminder:{reminder['_id']}"
+                )])
+
+        async def on_sent() -> None:
+            logger.info(msg=f"Сводка из {len(reminders)} напоминаний отправлена пользователю {user_id}")
+            for reminder in reminders:
+                await audit_writer.record(event=AUDIT_FIRED, user_id=user_id, reminder_id=reminder["_id"], digest=True)
+                if reminder.get("recurring"):
+                    await reminder_middleware_notification.schedule_next_occurrence(reminder=reminder)
+                elif self.outbox is not None:
+                    await reminder_middleware_notification.schedule_queued(reminder_id=str(object=reminder["_id"]))
+
+        return DeliveryJob(
+            chat_id=user_id,
+            text="\n".join(lines),
+            reply_markup=InlineKeyboardMarkup(inline_keyboard=buttons) if buttons else None,
+            on_sent=on_sent,
+            key=digest_key(reminders=reminders),
+            due_at=due_at(reminders=reminders),
+            confirm_ids=[str(object=reminder["_id"]) for reminder in reminders if not reminder.get("recurring")],
+        )
+
+    def _build_digest_job(self, user_id: Any, reminders: List[Dict[str, Any]]) -> DeliveryJob:
+        """Одно сообщение со сводкой пропущенных напоминаний пользователя."""
+        async def on_sent() -> None:
+            logger.info(msg=f"Сводка из {len(reminders)} пропущенных напоминаний отправлена пользователю {user_id}")
+            # Повторяющиеся переносим в будущее, разовые завершаем со статусом missed
+            for reminder in reminders:
+                await audit_writer.record(event=AUDIT_FIRED, user_id=user_id, reminder_id=reminder["_id"], digest=True, missed=True)
+                await reminder_middleware_notification.schedule_missed(reminder=reminder)
+
+        return DeliveryJob(
+            chat_id=user_id,
+            text=format_digest(reminders=reminders),
+            on_sent=on_sent,
+            key=digest_key(reminders=reminders),
+            due_at=due_at(reminders=reminders),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики доставки и, если сессия их собирает, HTTP-пула Telegram."""
+        session = self.bot.session
+        return {**self.delivery.stats(), **(session.stats() if isinstance(session, TelegramSession) else {})}
+
+    async def close(self) -> None:
+        """Останавливает уведомитель: дожидается отправки очереди и записывает накопленное состояние."""
+        self.is_running = False
+        await self.delivery.close()
+        await reminder_state_writer.close()
 
     async def mark_as_completed(self, reminder_id: str, recurring: str) -> None:
         """Отмечает разовое напоминание как выполненное."""
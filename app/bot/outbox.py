@@ -0,0 +1,211 @@
+import asyncio
+import hashlib
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set
+from uuid import uuid4
+
+import pytz
+from aiogram.types import InlineKeyboardMarkup
+from pymongo import UpdateOne
+
+from app.bot.delivery import DeliveryEngine, DeliveryJob, is_undeliverable
+from app.core.metrics import SENDS
+from app.repositories.outbox_repository import MongoOutboxRepository
+from app.services.scheduler import as_utc
+
+logger: logging.Logger = logging.getLogger(name="app_logger")
+
+
+def occurrence_key(reminder: Dict[str, Any]) -> str:
+    """Ключ идемпотентности срабатывания: идентификатор напоминания и время срабатывания."""
+    occurrence: datetime = reminder.get("fire_at") or reminder["date"]
+    return f"{reminder['_id']}:{as_utc(occurrence).isoformat()}"
+
+
+def digest_key(reminders: List[Dict[str, Any]]) -> str:
+    """Ключ идемпотентности сводки: хэш ключей входящих в неё срабатываний."""
+    keys = "|".join(sorted(occurrence_key(reminder) for reminder in reminders))
+    return f"digest:{hashlib.sha1(keys.encode()).hexdigest()}"
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """Экспоненциальная задержка перед попыткой `attempt` (с 1) с джиттером: от половины до полной."""
+    delay = min(cap, base * 2 ** (attempt - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+class DeliveryOutbox:
+    """
+    Надёжная доставка через outbox в MongoDB.
+
+    Принимает сообщения с тем же интерфейсом, что и DeliveryEngine (`submit`/`join`):
+    сообщения пачкой записываются в outbox, после чего `on_sent` выполняется только для
+    впервые вставленных (повторная постановка того же срабатывания состояние не меняет).
+    Отдельный цикл `run` забирает готовые сообщения (с арендой), отправляет их через
+    DeliveryEngine (его `on_delivered` видит восстановленные из outbox `confirm_ids`) и
+    отмечает доставленными; неудачи повторяются с задержкой, а после `max_attempts` попыток
+    сообщение остаётся в outbox со статусом dead, и его `confirm_ids` передаются в `on_dead`.
+
+    Если процесс упадёт между отправкой и отметкой о доставке, сообщение будет отправлено
+    повторно после истечения аренды (доставка «хотя бы один раз»).
+    """
+
+    def __init__(
+        self,
+        repository: MongoOutboxRepository,
+        engine: DeliveryEngine,
+        owner: str,
+        lease: timedelta,
+        max_attempts: int,
+        backoff_base: float,
+        backoff_max: float,
+        batch_size: int,
+        poll_interval: float,
+        on_dead: Optional[Callable[[List[str]], Awaitable[Any]]] = None,
+    ) -> None:
+        self._repository = repository
+        self._engine = engine
+        self.owner: str = owner
+        self.lease: timedelta = lease
+        self.max_attempts: int = max_attempts
+        self.backoff_base: float = backoff_base
+        self.backoff_max: float = backoff_max
+        self.batch_size: int = batch_size
+        self.poll_interval: float = poll_interval
+        self.on_dead = on_dead
+        self._pending: List[DeliveryJob] = []
+        self._is_running: bool = True
+
+        self.enqueued: int = 0
+        self.delivered: int = 0
+        self.retried: int = 0
+        self.dead: int = 0
+
+    async def submit(self, job: DeliveryJob) -> None:
+        """Добавляет сообщение в буфер; при заполнении буфера сразу записывает его в outbox."""
+        self._pending.append(job)
+        if len(self._pending) >= self.batch_size:
+            await self.join()
+
+    async def join(self) -> None:
+        """Записывает накопленные сообщения в outbox и выполняет `on_sent` впервые вставленных."""
+        jobs, self._pending = self._pending, []
+        if not jobs:
+            return
+
+        entries = [self._to_entry(job=job) for job in jobs]
+        inserted: Set[str] = await self._repository.enqueue(entries=entries, now=datetime.now(pytz.utc))
+        self.enqueued += len(inserted)
+        for job, entry in zip(jobs, entries):
+            if entry["key"] not in inserted:
+                logger.info(msg=f"Сообщение {entry['key']} уже в outbox, состояние не меняется")
+                continue
+            if job.on_sent is not None:
+                await job.on_sent()
+
+    async def run(self) -> None:
+        """Фоновый цикл отправки: пока в outbox есть готовые сообщения, обрабатывает их пачками."""
+        while self._is_running:
+            try:
+                processed = await self.process_batch(now=datetime.now(pytz.utc))
+            except Exception as e:
+                logger.error(msg=f"Ошибка обработки outbox: {e}")
+                processed = 0
+
+            if not processed:
+                await asyncio.sleep(delay=self.poll_interval)
+
+    async def process_batch(self, now: datetime) -> int:
+        """Отправляет одну пачку сообщений из outbox и записывает результаты одним `bulk_write`."""
+        entries = await self._repository.claim(
+            owner=self.owner, now=now, lease_until=now + self.lease, limit=self.batch_size
+        )
+
+        delivered: List[Any] = []
+        failures: List[UpdateOne] = []
+        dead: List[Dict[str, Any]] = []
+        for entry in entries:
+            await self._engine.submit(job=self._to_job(entry=entry, delivered=delivered, failures=failures, dead=dead))
+        await self._engine.join()
+
+        await self._repository.complete(delivered_ids=delivered, operations=failures, now=datetime.now(pytz.utc))
+        self.delivered += len(delivered)
+
+        if self.on_dead is not None:
+            for entry in dead:
+                if not entry.get("confirm_ids"):
+                    continue
+                try:
+                    await self.on_dead(entry["confirm_ids"])
+                except Exception as e:
+                    logger.error(msg=f"Ошибка обработки недоставленного сообщения {entry['key']}: {e}")
+        return len(entries)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._engine.stats(),
+            "outbox_enqueued": self.enqueued,
+            "outbox_delivered": self.delivered,
+            "outbox_retried": self.retried,
+            "outbox_dead": self.dead,
+        }
+
+    async def close(self) -> None:
+        """Записывает буфер в outbox и останавливает отправку."""
+        self._is_running = False
+        await self.join()
+        await self._engine.close()
+
+    @staticmethod
+    def _to_entry(job: DeliveryJob) -> Dict[str, Any]:
+        return {
+            "key": job.key or uuid4().hex,
+            "chat_id": job.chat_id,
+            "text": job.text,
+            "reply_markup": job.reply_markup.model_dump(exclude_none=True) if job.reply_markup else None,
+            "due_at": job.due_at,
+            "confirm_ids": job.confirm_ids,
+        }
+
+    def _to_job(self, entry: Dict[str, Any], delivered: List[Any], failures: List[UpdateOne], dead: List[Dict[str, Any]]) -> DeliveryJob:
+        async def on_sent() -> None:
+            delivered.append(entry["_id"])
+
+        async def on_failed(error: Exception) -> None:
+            failures.append(self._failure_operation(entry=entry, error=error, dead=dead))
+
+        reply_markup: Optional[InlineKeyboardMarkup] = (
+            InlineKeyboardMarkup.model_validate(entry["reply_markup"]) if entry.get("reply_markup") else None
+        )
+        return DeliveryJob(
+            chat_id=entry["chat_id"],
+            text=entry["text"],
+            reply_markup=reply_markup,
+            on_sent=on_sent,
+            on_failed=on_failed,
+            key=entry["key"],
+            due_at=entry.get("due_at"),
+            confirm_ids=entry.get("confirm_ids") or [],
+        )
+
+    def _failure_operation(self, entry: Dict[str, Any], error: Exception, dead: List[Dict[str, Any]]) -> UpdateOne:
+        attempts: int = entry.get("attempts", 0) + 1
+        # Недоступный чат не оживёт от повторов — сразу в dead-letter
+        if attempts >= self.max_attempts or is_undeliverable(error):
+            self.dead += 1
+            dead.append(entry)
+            SENDS.inc(outcome="dead")
+            logger.error(msg=f"Сообщение {entry['key']} в чат {entry['chat_id']} не доставлено за {attempts} попыток: {error}")
+            return self._repository.dead_operation(entry_id=entry["_id"], attempts=attempts, error=str(error))
+
+        self.retried += 1
+        delay = backoff_delay(attempt=attempts, base=self.backoff_base, cap=self.backoff_max)
+        logger.warning(msg=f"Сообщение {entry['key']} не отправлено (попытка {attempts}), повтор через {delay:.1f} с.: {error}")
+        return self._repository.retry_operation(
+            entry_id=entry["_id"],
+            attempts=attempts,
+            next_attempt_at=datetime.now(pytz.utc) + timedelta(seconds=delay),
+            error=str(error)
+        )
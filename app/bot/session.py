@@ -0,0 +1,199 @@
+import ssl
+import time
+from types import SimpleNamespace
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+import certifi
+from aiogram import __version__
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import PRODUCTION, TelegramAPIServer
+from aiohttp import ClientSession, ClientTimeout, TCPConnector, TraceConfig
+from aiohttp.hdrs import USER_AGENT
+from aiohttp.http import SERVER_SOFTWARE
+
+from app.core.config import Settings
+from app.core.metrics import TELEGRAM_API_DURATION
+
+if TYPE_CHECKING:
+    from aiogram import Bot
+    from aiogram.methods import TelegramMethod
+
+# Кодировщики JSON для запросов к Bot API
+JSON_STDLIB = "json"
+JSON_ORJSON = "orjson"
+
+# Метка запросов, которые не являются вызовом метода Bot API (скачивание файлов)
+FILE_LABEL = "file"
+
+
+def api_method_label(path: str) -> str:
+    """
+    Метка метрики по пути запроса: для `/bot<token>/<method>` — имя метода, для всего
+    остального (`/file/bot<token>/<путь к файлу>`) — `file`, чтобы пути файлов не
+    порождали неограниченное число меток. Токен в метку не попадает.
+    """
+    segments = path.rstrip("/").split("/")
+    if len(segments) >= 2 and segments[-2].startswith("bot") and (len(segments) < 3 or segments[-3] != "file"):
+        return segments[-1]
+    return FILE_LABEL
+
+
+class SessionMetrics:
+    """
+    Счётчики HTTP-клиента Telegram, собираемые через `aiohttp.TraceConfig`.
+
+    Насыщение пула видно по `pool_waits`/`pool_wait_seconds`: запрос ждал свободное
+    соединение, потому что все `limit` соединений заняты.
+    """
+
+    def __init__(self) -> None:
+        self.requests: int = 0
+        self.errors: int = 0
+        self.in_flight: int = 0
+        self.peak_in_flight: int = 0
+        self.request_seconds: float = 0.0
+        self.pool_waiting: int = 0
+        self.pool_waits: int = 0
+        self.pool_wait_seconds: float = 0.0
+        self.pool_wait_max: float = 0.0
+        self.connections_created: int = 0
+        self.connections_reused: int = 0
+
+    def trace_config(self) -> TraceConfig:
+        trace_config = TraceConfig()
+        trace_config.on_request_start.append(self._on_request_start)
+        trace_config.on_request_end.append(self._on_request_end)
+        trace_config.on_request_exception.append(self._on_request_exception)
+        trace_config.on_connection_queued_start.append(self._on_queued_start)
+        trace_config.on_connection_queued_end.append(self._on_queued_end)
+        trace_config.on_connection_create_end.append(self._on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(self._on_connection_reuse)
+        return trace_config
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "http_requests": self.requests,
+            "http_errors": self.errors,
+            "http_in_flight": self.in_flight,
+            "http_peak_in_flight": self.peak_in_flight,
+            "http_avg_seconds": round(self.request_seconds / self.requests, 4) if self.requests else 0.0,
+            "pool_waiting": self.pool_waiting,
+            "pool_waits": self.pool_waits,
+            "pool_wait_seconds": round(self.pool_wait_seconds, 4),
+            "pool_wait_max_seconds": round(self.pool_wait_max, 4),
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+        }
+
+    async def _on_request_start(self, session: ClientSession, context: SimpleNamespace, params: Any) -> None:
+        context.request_started_at = time.monotonic()
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+
+    async def _on_request_end(self, session: ClientSession, context: SimpleNamespace, params: Any) -> None:
+        self._finish_request(context=context, params=params)
+
+    async def _on_request_exception(self, session: ClientSession, context: SimpleNamespace, params: Any) -> None:
+        self.errors += 1
+        self._finish_request(context=context, params=params)
+
+    def _finish_request(self, context: SimpleNamespace, params: Any) -> None:
+        elapsed = time.monotonic() - context.request_started_at
+        self.in_flight -= 1
+        self.requests += 1
+        self.request_seconds += elapsed
+        TELEGRAM_API_DURATION.observe(elapsed, method=api_method_label(path=params.url.path))
+
+    async def _on_queued_start(self, session: ClientSession, context: SimpleNamespace, params: Any) -> None:
+        context.queued_at = time.monotonic()
+        self.pool_waiting += 1
+        self.pool_waits += 1
+
+    async def _on_queued_end(self, session: ClientSession, context: SimpleNamespace, params: Any) -> None:
+        waited = time.monotonic() - context.queued_at
+        self.pool_waiting -= 1
+        self.pool_wait_seconds += waited
+        self.pool_wait_max = max(self.pool_wait_max, waited)
+
+    async def _on_connection_create_end(self, session: ClientSession, context: SimpleNamespace, params: Any) -> None:
+        self.connections_created += 1
+
+    async def _on_connection_reuse(self, session: ClientSession, context: SimpleNamespace, params: Any) -> None:
+        self.connections_reused += 1
+
+
+class TelegramSession(AiohttpSession):
+    """
+    Общая HTTP-сессия бота для уведомлений и хэндлеров с настраиваемым пулом соединений:
+    размер пула (всего и на хост), keep-alive, кэш DNS, таймауты соединения и запроса
+    и быстрый кодировщик JSON. Метрики пула доступны через `stats()`.
+
+    Клиент aiohttp собирается только через публичные параметры `ClientSession`:
+    коннектор с настройками пула и `TraceConfig` метрик передаются в конструктор.
+    """
+
+    def __init__(
+        self,
+        api: TelegramAPIServer = PRODUCTION,
+        limit: int = 100,
+        limit_per_host: int = 0,
+        keepalive_timeout: float = 60.0,
+        ttl_dns_cache: int = 3600,
+        connect_timeout: float = 5.0,
+        timeout: float = 60.0,
+        json_backend: str = JSON_STDLIB,
+    ) -> None:
+        super().__init__(api=api, limit=limit, timeout=timeout, **json_functions(backend=json_backend))
+        self.connector_options: Dict[str, Any] = {
+            "ssl": ssl.create_default_context(cafile=certifi.where()),
+            "limit": limit,
+            "limit_per_host": limit_per_host,
+            "keepalive_timeout": keepalive_timeout,
+            "ttl_dns_cache": ttl_dns_cache,
+        }
+        self.connect_timeout: float = connect_timeout
+        self.metrics = SessionMetrics()
+
+    async def create_session(self) -> ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = ClientSession(
+                connector=TCPConnector(**self.connector_options),
+                headers={USER_AGENT: f"{SERVER_SOFTWARE} aiogram/{__version__}"},
+                trace_configs=[self.metrics.trace_config()],
+            )
+        return self._session
+
+    async def make_request(self, bot: "Bot", method: "TelegramMethod[Any]", timeout: Optional[float] = None) -> Any:
+        # Числовой таймаут aiohttp считает общим, поэтому таймаут соединения передаём явно
+        total = self.timeout if timeout is None else timeout
+        return await super().make_request(
+            bot=bot, method=method, timeout=ClientTimeout(total=total, connect=self.connect_timeout)
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return self.metrics.stats()
+
+
+def json_functions(backend: str) -> Dict[str, Any]:
+    """Функции `json_loads`/`json_dumps` для сессии aiogram."""
+    if backend == JSON_ORJSON:
+        try:
+            import orjson
+        except ImportError as e:
+            raise RuntimeError("Для TELEGRAM_JSON=orjson установите пакет orjson") from e
+        return {"json_loads": orjson.loads, "json_dumps": lambda value: orjson.dumps(value).decode()}
+    return {}
+
+
+def create_bot_session(settings: Settings) -> TelegramSession:
+    """Сессия Telegram с параметрами из настроек."""
+    return TelegramSession(
+        api=TelegramAPIServer.from_base(settings.TELEGRAM_API_URL) if settings.TELEGRAM_API_URL else PRODUCTION,
+        limit=settings.TELEGRAM_POOL_SIZE,
+        limit_per_host=settings.TELEGRAM_POOL_SIZE_PER_HOST,
+        keepalive_timeout=settings.TELEGRAM_KEEPALIVE_SECONDS,
+        ttl_dns_cache=settings.TELEGRAM_DNS_CACHE_SECONDS,
+        connect_timeout=settings.TELEGRAM_CONNECT_TIMEOUT_SECONDS,
+        timeout=settings.TELEGRAM_REQUEST_TIMEOUT_SECONDS,
+        json_backend=settings.TELEGRAM_JSON,
+    )
@@ -0,0 +1,135 @@
+import asyncio
+import hmac
+import logging
+import signal
+from typing import Any, Dict, Optional, Set
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+from pydantic import ValidationError
+
+logger: logging.Logger = logging.getLogger(name="app_logger")
+
+# Заголовок, в котором Telegram передаёт секрет, указанный при регистрации вебхука
+SECRET_TOKEN_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    """
+    Приём обновлений через вебхук на встроенном aiohttp-сервере.
+
+    Обновление проверяется по секретному токену и передаётся в `Dispatcher.feed_update`
+    в отдельной задаче, а Telegram сразу получает ответ. Одновременно обрабатывается
+    не больше `max_in_flight` обновлений: при исчерпании лимита ответ задерживается,
+    и Telegram сам притормаживает отправку.
+    """
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        bot: Bot,
+        path: str,
+        secret: str,
+        max_in_flight: int,
+    ) -> None:
+        self._dispatcher = dispatcher
+        self._bot = bot
+        self.path: str = path
+        self.secret: str = secret
+        self.max_in_flight: int = max_in_flight
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._workflow_data: Dict[str, Any] = {"dispatcher": dispatcher, "bots": [bot], **dispatcher.workflow_data}
+
+        self.received: int = 0
+        self.rejected: int = 0
+        self.failed: int = 0
+
+        self.app = web.Application()
+        self.app.router.add_post(path, self.handle)
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Принимает одно обновление от Telegram."""
+        # Сравниваем байты: compare_digest не принимает строки с не-ASCII символами
+        if not hmac.compare_digest(request.headers.get(SECRET_TOKEN_HEADER, "").encode(), self.secret.encode()):
+            self.rejected += 1
+            return web.Response(status=401)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self._bot})
+        except (ValueError, ValidationError) as e:
+            logger.warning(msg=f"Некорректное обновление от Telegram: {e}")
+            return web.Response(status=400)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(value=self.max_in_flight)
+        await self._semaphore.acquire()
+
+        self.received += 1
+        task = asyncio.create_task(coro=self._process(update=update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def _process(self, update: Update) -> None:
+        try:
+            await self._dispatcher.feed_update(bot=self._bot, update=update, **self._workflow_data)
+        except Exception as e:
+            self.failed += 1
+            logger.error(msg=f"Ошибка обработки обновления {update.update_id}: {e}")
+        finally:
+            self._semaphore.release()
+
+    async def register(self, url: str, drop_pending_updates: bool = False) -> None:
+        """Регистрирует вебхук в Telegram с секретом и используемыми типами обновлений."""
+        await self._bot.set_webhook(
+            url=url,
+            secret_token=self.secret,
+            allowed_updates=self._dispatcher.resolve_used_update_types(),
+            max_connections=min(self.max_in_flight, 100),
+            drop_pending_updates=drop_pending_updates
+        )
+        logger.info(msg=f"Вебхук зарегистрирован: {url}")
+
+    async def unregister(self) -> None:
+        await self._bot.delete_webhook()
+        logger.info(msg="Вебхук удалён")
+
+    async def join(self) -> None:
+        """Ждёт завершения обновлений, которые уже обрабатываются."""
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    async def serve(self, host: str, port: int, url: str, delete_on_shutdown: bool = True) -> None:
+        """
+        Запускает сервер, регистрирует вебхук и работает до SIGINT/SIGTERM или отмены.
+        При остановке дожидается текущих обновлений и удаляет вебхук.
+        """
+        stopped = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for signal_number in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(signal_number, stopped.set)
+            except (NotImplementedError, RuntimeError):
+                pass  # Сигналы недоступны (Windows или не главный поток)
+
+        runner = web.AppRunner(app=self.app)
+        await runner.setup()
+        await web.TCPSite(runner=runner, host=host, port=port).start()
+        logger.info(msg=f"Вебхук-сервер слушает {host}:{port}{self.path}")
+        try:
+            await self.register(url=url)
+            await stopped.wait()
+        finally:
+            if delete_on_shutdown:
+                try:
+                    await self.unregister()
+                except Exception as e:
+                    logger.error(msg=f"Не удалось удалить вебхук: {e}")
+            await runner.cleanup()
+            await self.join()
@@ -1,6 +1,12 @@
 import os
+import socket
+from functools import lru_cache
+from typing import Any, Dict, Literal, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# Размер кэша диалогов по умолчанию при long polling
+FSM_POLLING_CACHE_SIZE = 10000
+
 class Settings(BaseSettings):
     BOT_TOKEN: str
     MONGO_URL: str
@@ -8,8 +14,149 @@ class Settings(BaseSettings):
     MONGO_NOTIFICATIONS_COLLECTION: str
     MONGO_USERS_COLLECTION: str
     MONGO_LOGS_COLLECTION: str
+    MONGO_OUTBOX_COLLECTION: str = "outbox"
+    MONGO_AUDIT_COLLECTION: str = "audit"
+    MONGO_ARCHIVE_COLLECTION: str = "notifications_archive"
+    MONGO_FSM_COLLECTION: str = "fsm_states"
     BOT_TIMEZONE: str = "UTC"
 
+    # Пул соединений MongoDB (один клиент на процесс)
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: int = 60000
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_COMPRESSORS: str = ""  # например "zstd,snappy,zlib"
+    MONGO_READ_PREFERENCE: str = "primary"
+
+    # Окно планировщика: напоминания на ближайшие N секунд держатся в памяти,
+    # раз в окно коллекция перечитывается для сверки. В куче — не больше SCHEDULER_MAX_SIZE
+    # напоминаний: при переполнении окно сокращается, остальное читается при следующей загрузке
+    SCHEDULER_WINDOW_SECONDS: int = 300
+    SCHEDULER_MAX_SIZE: int = 50000
+
+    # Размер пачки при чтении наступивших напоминаний курсором
+    SWEEP_BATCH_SIZE: int = 500
+
+    # Несколько экземпляров бота делят напоминания через аренду: идентификатор экземпляра
+    # (по умолчанию hostname:pid) и запас аренды сверх худшего времени разбора очереди отправки
+    NOTIFIER_INSTANCE_ID: str = f"{socket.gethostname()}:{os.getpid()}"
+    LEASE_SECONDS: int = 60
+
+    # Пакетная запись состояния после отправки: по N операций или раз в T миллисекунд.
+    # Пока MongoDB недоступна, в памяти копится не больше STATE_BUFFER_LIMIT операций
+    STATE_FLUSH_SIZE: int = 500
+    STATE_FLUSH_INTERVAL_MS: int = 500
+    STATE_BUFFER_LIMIT: int = 50000
+
+    # События аудита (создание, отправка, подтверждение, удаление): пакетная запись и срок хранения.
+    # Пока MongoDB недоступна, в памяти копится не больше AUDIT_BUFFER_LIMIT событий
+    AUDIT_FLUSH_SIZE: int = 500
+    AUDIT_FLUSH_INTERVAL_SECONDS: float = 1.0
+    AUDIT_BUFFER_LIMIT: int = 50000
+    AUDIT_RETENTION_DAYS: int = 90
+
+    # Логи в MongoDB: ограниченная очередь, пакетная запись и политика переполнения
+    # (drop_oldest — выбросить самые старые, drop_low_level — только DEBUG/INFO, block — ждать).
+    # При остановке остаток очереди дописывается не дольше LOG_CLOSE_TIMEOUT_SECONDS
+    LOG_QUEUE_SIZE: int = 10000
+    LOG_BATCH_SIZE: int = 500
+    LOG_FLUSH_INTERVAL_SECONDS: float = 1.0
+    LOG_OVERFLOW_POLICY: Literal["drop_oldest", "drop_low_level", "block"] = "drop_oldest"
+    LOG_CLOSE_TIMEOUT_SECONDS: float = 5.0
+
+    # Сколько ждать подтверждения разового напоминания и как часто проверять истёкшие
+    CONFIRMATION_TIMEOUT_SECONDS: int = 300
+    CONFIRMATION_CHECK_INTERVAL_SECONDS: int = 30
+
+    # Досылка напоминаний, пропущенных во время простоя: all | latest | digest.
+    # Пропущенным считается напоминание, опоздавшее больше чем на GRACE секунд;
+    # опоздавшие больше чем на MAX_STALENESS секунд не отправляются (0 — без ограничения).
+    # По умолчанию поведение прежнее: каждое разовое досылается, серия — одним сообщением
+    CATCH_UP_POLICY: Literal["all", "latest", "digest"] = "latest"
+    CATCH_UP_GRACE_SECONDS: int = 300
+    CATCH_UP_MAX_STALENESS_SECONDS: int = 0
+
+    # Сводка: наступившие одновременно напоминания пользователя отправляются одним сообщением.
+    # Планировщик ждёт DIGEST_WINDOW_SECONDS, чтобы собрать напоминания с близким временем
+    DIGEST_MODE: bool = False
+    DIGEST_WINDOW_SECONDS: float = 5.0
+
+    # Пул отправки уведомлений и лимиты Telegram (сообщений в секунду: всего и на один чат)
+    DELIVERY_WORKERS: int = 16
+    DELIVERY_GLOBAL_RATE: float = 30.0
+    DELIVERY_PER_CHAT_RATE: float = 1.0
+    DELIVERY_QUEUE_SIZE: int = 10000
+
+    # Outbox: сообщения сначала надёжно записываются в MongoDB, затем отправляются воркерами.
+    # Неудачная отправка повторяется с экспоненциальной задержкой и джиттером,
+    # после OUTBOX_MAX_ATTEMPTS попыток сообщение переходит в dead-letter
+    OUTBOX_ENABLED: bool = True
+    OUTBOX_MAX_ATTEMPTS: int = 5
+    OUTBOX_BACKOFF_BASE_SECONDS: float = 5.0
+    OUTBOX_BACKOFF_MAX_SECONDS: float = 600.0
+    OUTBOX_BATCH_SIZE: int = 500
+    OUTBOX_POLL_INTERVAL_SECONDS: float = 1.0
+    OUTBOX_RETENTION_SECONDS: int = 7 * 24 * 3600
+
+    # Жизненный цикл выполненных напоминаний: через ARCHIVE_AFTER_DAYS после завершения они
+    # переносятся в архивную коллекцию (archive) или удаляются TTL-индексом (ttl).
+    # Перенос идёт пачками с паузой между ними, фоновая задача запускается раз в интервал
+    ARCHIVE_MODE: Literal["archive", "ttl"] = "archive"
+    ARCHIVE_AFTER_DAYS: int = 30
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_BATCH_PAUSE_SECONDS: float = 0.5
+    ARCHIVE_INTERVAL_SECONDS: int = 3600
+
+    # HTTP-сессия Bot API, общая для уведомлений и хэндлеров: пул соединений (0 — без лимита
+    # на хост), keep-alive, кэш DNS, таймауты и кодировщик JSON (orjson — опциональный пакет).
+    # TELEGRAM_API_URL — свой сервер Bot API (локальный или заглушка для замеров)
+    TELEGRAM_API_URL: str = ""
+    TELEGRAM_POOL_SIZE: int = 100
+    TELEGRAM_POOL_SIZE_PER_HOST: int = 0
+    TELEGRAM_KEEPALIVE_SECONDS: float = 60.0
+    TELEGRAM_DNS_CACHE_SECONDS: int = 3600
+    TELEGRAM_CONNECT_TIMEOUT_SECONDS: float = 5.0
+    TELEGRAM_REQUEST_TIMEOUT_SECONDS: float = 60.0
+    TELEGRAM_JSON: Literal["json", "orjson"] = "json"
+
+    # Получение обновлений: polling или webhook. В режиме webhook встроенный aiohttp-сервер
+    # слушает WEBHOOK_HOST:WEBHOOK_PORT, Telegram шлёт обновления на WEBHOOK_BASE_URL + WEBHOOK_PATH
+    # с секретом WEBHOOK_SECRET (1–256 символов A-Z, a-z, 0-9, _ и -); одновременно
+    # обрабатывается не больше WEBHOOK_MAX_IN_FLIGHT обновлений
+    BOT_MODE: Literal["polling", "webhook"] = "polling"
+    WEBHOOK_BASE_URL: str = ""
+    WEBHOOK_PATH: str = "/telegram/webhook"
+    WEBHOOK_SECRET: str = ""
+    WEBHOOK_HOST: str = "0.0.0.0"
+    WEBHOOK_PORT: int = 8080
+    WEBHOOK_MAX_IN_FLIGHT: int = 100
+    # При нескольких экземплярах за балансировщиком вебхук не стоит удалять при остановке одного из них
+    WEBHOOK_DELETE_ON_SHUTDOWN: bool = True
+
+    # Хранилище состояний диалогов (memory — в памяти процесса, mongo — в MongoDB).
+    # Брошенные диалоги удаляются через FSM_STATE_TTL_SECONDS; кэш процесса
+    # избавляет от чтений, пока обновления чата приходят в тот же экземпляр.
+    # Без FSM_CACHE_SIZE кэш включён только при polling (см. get_fsm_cache_size)
+    FSM_STORAGE: Literal["memory", "mongo"] = "mongo"
+    FSM_STATE_TTL_SECONDS: int = 7 * 24 * 3600
+    FSM_CACHE_SIZE: Optional[int] = None
+    FSM_CACHE_TTL_SECONDS: int = 300
+
+    # Метрики в формате Prometheus на отдельном порту (METRICS_HOST:METRICS_PORT + METRICS_PATH).
+    # Число активных напоминаний пересчитывается раз в METRICS_REFRESH_SECONDS
+    METRICS_ENABLED: bool = False
+    METRICS_HOST: str = "0.0.0.0"
+    METRICS_PORT: int = 9108
+    METRICS_PATH: str = "/metrics"
+    METRICS_REFRESH_SECONDS: int = 30
+
+    # Сколько напоминаний показывать на одной странице списка и удаления
+    REMINDERS_PAGE_SIZE: int = 10
+
+    # Кэш часовых поясов пользователей
+    TIMEZONE_CACHE_SIZE: int = 10000
+    TIMEZONE_CACHE_TTL_SECONDS: int = 600
+
     # Флаг тестирования (устанавливается через переменные окружения)
     TESTING: bool = os.getenv("TESTING", "False") == "True"
 
@@ -32,7 +179,49 @@ class Settings(BaseSettings):
     def get_users_collection(self) -> str:
         return self.TEST_MONGO_USERS_COLLECTION if self.TESTING else self.MONGO_USERS_COLLECTION
 
+    def get_logs_collection(self) -> str:
+        return self.MONGO_LOGS_COLLECTION
+
+    def get_outbox_collection(self) -> str:
+        return self.MONGO_OUTBOX_COLLECTION
+
+    def get_audit_collection(self) -> str:
+        return self.MONGO_AUDIT_COLLECTION
+
+    def get_archive_collection(self) -> str:
+        return self.MONGO_ARCHIVE_COLLECTION
+
+    def get_webhook_url(self) -> str:
+        return self.WEBHOOK_BASE_URL.rstrip("/") + self.WEBHOOK_PATH
+
+    def get_fsm_collection(self) -> str:
+        return self.MONGO_FSM_COLLECTION
+
+    def get_fsm_cache_size(self) -> int:
+        """
+        Размер кэша диалогов. При long polling обновления получает единственный экземпляр,
+        и кэш безопасен. За вебхуком обновления одного чата могут попадать в разные экземпляры:
+        кэш одного отдал бы состояние, из которого диалог уже ушёл, поэтому по умолчанию он выключен.
+        """
+        if self.FSM_CACHE_SIZE is not None:
+            return self.FSM_CACHE_SIZE
+        return FSM_POLLING_CACHE_SIZE if self.BOT_MODE == "polling" else 0
+
+    def get_mongo_client_options(self) -> Dict[str, Any]:
+        """Параметры пула соединений для клиентов MongoDB."""
+        options: Dict[str, Any] = {
+            "maxPoolSize": self.MONGO_MAX_POOL_SIZE,
+            "minPoolSize": self.MONGO_MIN_POOL_SIZE,
+            "maxIdleTimeMS": self.MONGO_MAX_IDLE_TIME_MS,
+            "serverSelectionTimeoutMS": self.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            "readPreference": self.MONGO_READ_PREFERENCE,
+        }
+        if self.MONGO_COMPRESSORS:
+            options["compressors"] = self.MONGO_COMPRESSORS
+        return options
+
 
+@lru_cache(maxsize=None)
 def get_settings() -> Settings:
-    """Создаёт новый экземпляр конфигурации при каждом вызове."""
+    """Читает конфигурацию один раз на процесс (сбросить кэш: `get_settings.cache_clear()`)."""
     return Settings()
\ No newline at end of file
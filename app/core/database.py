@@ -1,34 +1,116 @@
-from motor.motor_asyncio import AsyncIOMotorClient
+from typing import Any, Callable, Dict, Optional
+
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorCollection
+from pymongo import ASCENDING, MongoClient
+from pymongo.errors import OperationFailure
 
 from app.core.config import Settings, get_settings
 
+# Код ошибки MongoDB: индекс с таким именем уже есть, но с другими параметрами
+INDEX_OPTIONS_CONFLICT = 85
 
 
+class MongoClientRegistry:
+    """
+    Реестр клиентов MongoDB: один асинхронный (Motor) и один синхронный (PyMongo)
+    клиент на процесс. Клиенты создаются лениво при первом обращении с параметрами
+    пула из настроек; тесты могут подставить собственные клиенты.
+    """
 
+    def __init__(self) -> None:
+        self._async_client: Optional[AsyncIOMotorClient] = None
+        self._sync_client: Optional[MongoClient] = None
 
+    def get_async_client(self) -> AsyncIOMotorClient:
+        if self._async_client is None:
+            settings: Settings = get_settings()
+            self._async_client = AsyncIOMotorClient(host=settings.get_mongo_url(), **settings.get_mongo_client_options())
+        return self._async_client
 
-def get_mongo():
-    """Создаёт новое подключение к MongoDB с актуальными настройками."""
-    settings: Settings = get_settings()  # Теперь TESTING всегда актуален
-    mongo_client = AsyncIOMotorClient(host=settings.get_mongo_url())
-    mongo_database = mongo_client[settings.get_database_name()]
-    
-    return {
-        "client": mongo_client,
-        "database": mongo_database,
-        "notifications": mongo_database[settings.get_notifications_collection()],
-        "logs": mongo_database[settings.get_users_collection()],
-        "users": mongo_database[settings.get_users_collection()],
-    }
+    def get_sync_client(self) -> MongoClient:
+        if self._sync_client is None:
+            settings: Settings = get_settings()
+            self._sync_client = MongoClient(host=settings.get_mongo_url(), **settings.get_mongo_client_options())
+        return self._sync_client
+
+    def set_async_client(self, client: Optional[AsyncIOMotorClient]) -> None:
+        """Подставляет свой асинхронный клиент (например, в тестах)."""
+        self._async_client = client
+
+    def set_sync_client(self, client: Optional[MongoClient]) -> None:
+        """Подставляет свой синхронный клиент (например, в тестах)."""
+        self._sync_client = client
+
+    def collection(self, name: Callable[[Settings], str]) -> "RegistryCollection":
+        """Коллекция, которая всегда берётся у текущего асинхронного клиента реестра."""
+        return RegistryCollection(registry=self, name=name)
+
+    def close(self) -> None:
+        """Закрывает открытые пулы соединений."""
+        if self._async_client is not None:
+            self._async_client.close()
+            self._async_client = None
+        if self._sync_client is not None:
+            self._sync_client.close()
+            self._sync_client = None
 
 
+class RegistryCollection:
+    """
+    Коллекция MongoDB, привязанная не к клиенту, а к реестру: обращения передаются
+    коллекции текущего клиента. После подмены или пересоздания клиента репозитории
+    сразу работают через новый; пока клиент тот же, коллекция не пересоздаётся.
+    """
 
+    def __init__(self, registry: MongoClientRegistry, name: Callable[[Settings], str]) -> None:
+        self._registry = registry
+        self._name = name
+        self._client: Optional[AsyncIOMotorClient] = None
+        self._collection: Optional[AsyncIOMotorCollection] = None
 
+    def resolve(self) -> AsyncIOMotorCollection:
+        client = self._registry.get_async_client()
+        if client is not self._client:
+            settings: Settings = get_settings()
+            self._collection = client[settings.get_database_name()][self._name(settings)]
+            self._client = client
+        return self._collection
 
-# mongo_client = AsyncIOMotorClient(host=settings.MONGO_URL)
-# mongo_database = mongo_client[settings.MONGO_DATABASE_NAME]
+    def __getattr__(self, item: str) -> Any:
+        return getattr(self.resolve(), item)
 
 
-# notification_collection = mongo_database[settings.MONGO_NOTIFICATIONS_COLLECTION]
-# logs_collection = mongo_database[settings.MONGO_LOGS_COLLECTION]
-# users_collection = mongo_database[settings.MONGO_USERS_COLLECTION]
\ No newline at end of file
+mongo_registry = MongoClientRegistry()
+
+
+async def ensure_ttl_index(collection: AsyncIOMotorCollection, field: str, name: str, expire_after_seconds: int, **options: Any) -> None:
+    """
+    Создаёт TTL-индекс по `field`. Если индекс уже создан с другим сроком хранения (настройку
+    поменяли), create_index падает с IndexOptionsConflict — тогда срок меняется через `collMod`
+    без пересоздания индекса.
+    """
+    try:
+        await collection.create_index(keys=[(field, ASCENDING)], name=name, expireAfterSeconds=expire_after_seconds, **options)
+    except OperationFailure as e:
+        if e.code != INDEX_OPTIONS_CONFLICT:
+            raise
+        await collection.database.command("collMod", collection.name, index={"name": name, "expireAfterSeconds": expire_after_seconds})
+
+
+def get_mongo() -> Dict[str, Any]:
+    """Возвращает общий клиент MongoDB процесса, базу и коллекции приложения."""
+    settings: Settings = get_settings()
+    mongo_client = mongo_registry.get_async_client()
+    mongo_database = mongo_client[settings.get_database_name()]
+
+    return {
+        "client": mongo_client,
+        "database": mongo_database,
+        "notifications": mongo_database[settings.get_notifications_collection()],
+        "logs": mongo_database[settings.get_logs_collection()],
+        "users": mongo_database[settings.get_users_collection()],
+        "outbox": mongo_database[settings.get_outbox_collection()],
+        "audit": mongo_database[settings.get_audit_collection()],
+        "archive": mongo_database[settings.get_archive_collection()],
+        "fsm": mongo_database[settings.get_fsm_collection()],
+    }
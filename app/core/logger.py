@@ -1,43 +1,75 @@
 import logging
 import queue
+import sys
 import threading
+import time
 from datetime import datetime
+from typing import Any, Dict, List, Optional
 
-from pymongo import MongoClient
+from pymongo.collection import Collection
+from pymongo.errors import BulkWriteError
 
 from app.core.config import Settings, get_settings
+from app.core.database import mongo_registry
 
 settings: Settings = get_settings()
 
+# Политики переполнения очереди логов
+OVERFLOW_DROP_OLDEST = "drop_oldest"
+OVERFLOW_DROP_LOW_LEVEL = "drop_low_level"
+OVERFLOW_BLOCK = "block"
+
 
 class ThreadedMongoLogHandler(logging.Handler):
     """
     Логгер, который записывает логи в MongoDB в отдельном потоке.
+
+    Записи копятся в ограниченной очереди и пишутся пачками через `insert_many`
+    (по размеру пачки или по интервалу). При переполнении очереди действует
+    политика `overflow_policy`: выбросить самую старую запись, в первую очередь
+    выбрасывать DEBUG/INFO или блокировать вызывающий поток.
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        collection: Optional[Collection] = None,
+        queue_size: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        overflow_policy: Optional[str] = None,
+        close_timeout: Optional[float] = None,
+    ):
         super().__init__()
-        self.log_queue = queue.Queue()
+        self.close_timeout: float = settings.LOG_CLOSE_TIMEOUT_SECONDS if close_timeout is None else close_timeout
+        self.batch_size: int = batch_size or settings.LOG_BATCH_SIZE
+        self.flush_interval: float = flush_interval or settings.LOG_FLUSH_INTERVAL_SECONDS
+        self.overflow_policy: str = overflow_policy or settings.LOG_OVERFLOW_POLICY
+        self.log_queue: queue.Queue = queue.Queue(maxsize=queue_size or settings.LOG_QUEUE_SIZE)
         self.stop_event = threading.Event()
 
-        # Подключаемся к MongoDB через PyMongo (синхронно)
-        self.client = MongoClient(settings.MONGO_URL)
-        db = self.client[settings.MONGO_DATABASE_NAME]
-        # Если нужно взять имя коллекции из .env: settings.MONGO_LOGS_COLLECTION
-        self.collection = db[settings.MONGO_LOGS_COLLECTION]
+        self.written: int = 0
+        self.dropped: int = 0
+        self.failed: int = 0
+        # `dropped` меняют вызывающие потоки, остальные счётчики — только поток записи
+        self._counters_lock = threading.Lock()
+
+        if collection is None:
+            # Синхронный клиент PyMongo из общего реестра процесса
+            db = mongo_registry.get_sync_client()[settings.get_database_name()]
+            collection = db[settings.get_logs_collection()]
+        self.collection: Collection = collection
 
         # Запускаем поток, который будет забирать логи из очереди
         self.worker = threading.Thread(
-            target=self._log_consumer, 
-            name="MongoLogWorker", 
+            target=self._log_consumer,
+            name="MongoLogWorker",
             daemon=True
         )
         self.worker.start()
-        print("ThreadedMongoLogHandler инициализирован.")
 
     def emit(self, record: logging.LogRecord):
         """
-        Кладём лог в очередь.
+        Кладём лог в очередь (с учётом политики переполнения).
         """
         # Формируем документ, который отправим в Mongo
         log_document = {
@@ -46,32 +78,141 @@ class ThreadedMongoLogHandler(logging.Handler):
             "module": record.module,
             "timestamp": datetime.utcnow(),
         }
-        self.log_queue.put(log_document)
+
+        if self.overflow_policy == OVERFLOW_BLOCK:
+            self.log_queue.put(log_document)
+            return
+
+        try:
+            self.log_queue.put_nowait(log_document)
+            return
+        except queue.Full:
+            pass
+
+        if self.overflow_policy == OVERFLOW_DROP_LOW_LEVEL:
+            # Важная запись вытесняет только DEBUG/INFO; если их нет, выбрасывается она сама
+            if record.levelno < logging.WARNING or not self._evict_low_level():
+                self._count_dropped()
+                return
+            try:
+                self.log_queue.put_nowait(log_document)
+            except queue.Full:
+                self._count_dropped()
+            return
+
+        # Освобождаем место, выбрасывая самую старую запись
+        try:
+            self.log_queue.get_nowait()
+            self.log_queue.task_done()
+            self._count_dropped()
+        except queue.Empty:
+            pass
+        try:
+            self.log_queue.put_nowait(log_document)
+        except queue.Full:
+            self._count_dropped()
+
+    def _evict_low_level(self) -> bool:
+        """Удаляет из очереди самую старую запись ниже WARNING. False — таких записей нет."""
+        with self.log_queue.mutex:
+            for index, document in enumerate(self.log_queue.queue):
+                levelno = logging.getLevelName(document["level"])
+                if isinstance(levelno, int) and levelno < logging.WARNING:
+                    del self.log_queue.queue[index]
+                    # Запись не дойдёт до потока записи — снимаем её с учёта, как task_done()
+                    self.log_queue.unfinished_tasks -= 1
+                    self._count_dropped()
+                    return True
+        return False
+
+    def _count_dropped(self) -> None:
+        with self._counters_lock:
+            self.dropped += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики записанных, выброшенных и не записанных из-за ошибок логов."""
+        return {
+            "queued": self.log_queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
 
     def _log_consumer(self):
         """
-        Цикл, который крутится в отдельном потоке и пишет логи в MongoDB.
+        Цикл, который крутится в отдельном потоке и пишет логи в MongoDB пачками.
+        После остановки дописывает всё, что осталось в очереди.
         """
-        while not self.stop_event.is_set():
+        while True:
+            batch = self._collect_batch()
+            if batch:
+                self._write_batch(batch)
+            elif self.stop_event.is_set():
+                return
+
+    def _collect_batch(self) -> List[Dict[str, Any]]:
+        """Набирает пачку до `batch_size` записей или до истечения `flush_interval`."""
+        batch: List[Dict[str, Any]] = []
+        deadline = time.monotonic() + self.flush_interval
+
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if self.stop_event.is_set():
+                # При остановке не ждём — забираем то, что уже лежит в очереди
+                timeout = 0
+            elif timeout <= 0:
+                break
+
             try:
-                log_document = self.log_queue.get(timeout=0.5)
+                batch.append(self.log_queue.get(timeout=timeout) if timeout > 0 else self.log_queue.get_nowait())
             except queue.Empty:
-                continue
+                break
 
-            try:
-                result = self.collection.insert_one(log_document)
-                # Можно вывести в консоль
-                print(f"Лог записан в MongoDB с ID {result.inserted_id}")
-            except Exception as e:
-                print(f"❌ Ошибка записи лога в MongoDB: {e}")
+        return batch
+
+    def _write_batch(self, batch: List[Dict[str, Any]]) -> None:
+        try:
+            result = self.collection.insert_many(batch, ordered=False)
+            self.written += len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Неупорядоченная вставка: записи без ошибок уже сохранены
+            self.written += e.details.get("nInserted", 0)
+            self.failed += len(e.details.get("writeErrors", []))
+            sys.stderr.write(f"❌ Ошибка записи части логов в MongoDB: {e}\n")
+        except Exception as e:
+            self.failed += len(batch)
+            sys.stderr.write(f"❌ Ошибка записи логов в MongoDB: {e}\n")
+        finally:
+            for _ in batch:
+                self.log_queue.task_done()
+
+    def flush(self):
+        """
+        Ждёт, пока все поставленные в очередь логи будут обработаны, но не дольше
+        close_timeout: logging.shutdown() вызывает flush() до close(), и при недоступной
+        MongoDB безлимитное ожидание остановило бы завершение процесса.
+        """
+        if not self.worker.is_alive():
+            return
+
+        deadline = time.monotonic() + self.close_timeout
+        with self.log_queue.all_tasks_done:
+            while self.log_queue.unfinished_tasks:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    sys.stderr.write(f"❌ Логи не записаны в MongoDB за {self.close_timeout} с., в очереди: {self.log_queue.unfinished_tasks}\n")
+                    return
+                self.log_queue.all_tasks_done.wait(timeout=remaining)
 
     def close(self):
         """
-        Останавливаем поток и закрываем соединение с MongoDB.
+        Останавливаем поток, дописывая остаток очереди. Общий клиент MongoDB закрывается реестром.
         """
         self.stop_event.set()
-        self.worker.join(timeout=2)
-        self.client.close()
+        # Если MongoDB недоступна, остановка не ждёт дольше close_timeout (поток — демон)
+        self.worker.join(timeout=self.close_timeout)
+        if self.worker.is_alive():
+            sys.stderr.write(f"❌ Логи не дописаны в MongoDB за {self.close_timeout} с., в очереди: {self.log_queue.qsize()}\n")
         super().close()
 
 class Logger:
@@ -81,7 +222,7 @@ class Logger:
 
     @staticmethod
     def setup_logger():
-        print("Вызов Logger.setup_logger()")  
+        print("Вызов Logger.setup_logger()")
         logger = logging.getLogger("app_logger")
         if not logger.hasHandlers():
             log_handler = ThreadedMongoLogHandler()
@@ -89,4 +230,4 @@ class Logger:
             logger.addHandler(log_handler)
             print("Логгер успешно инициализирован!")
             logger.info("Логгер (Threaded) MongoDB успешно запущен.")
-        return logger
\ No newline at end of file
+        return logger
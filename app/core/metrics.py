@@ -0,0 +1,250 @@
+import asyncio
+import bisect
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from aiohttp import web
+
+logger: logging.Logger = logging.getLogger(name="app_logger")
+
+# Границы корзин гистограмм по умолчанию, секунды
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LAG_BUCKETS: Tuple[float, ...] = (0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0, 3600.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric(ABC):
+    """Метрика в формате Prometheus: имя, описание, тип и значения по наборам меток."""
+
+    type: str = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = ()) -> None:
+        self.name: str = name
+        self.description: str = description
+        self.labels: Tuple[str, ...] = labels
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        """Строки значений метрики в текстовом формате Prometheus."""
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.type}", *self.samples()]
+
+
+class _Value(Metric):
+    """
+    Значение по наборам меток: меняется явно или читается функцией `collect` при каждом
+    сборе (для счётчиков, которые уже ведёт другой объект).
+    """
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (), collect: Optional[Callable[[], float]] = None) -> None:
+        super().__init__(name=name, description=description, labels=labels)
+        self._values: Dict[LabelValues, float] = {}
+        self.collect: Optional[Callable[[], float]] = collect
+
+    def value(self, **labels: str) -> float:
+        if self.collect is not None:
+            return self.collect()
+        return self._values.get(self._key(labels=labels), 0.0)
+
+    def samples(self) -> List[str]:
+        if self.collect is not None:
+            return [f"{self.name} {_format_value(self.collect())}"]
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in self._values.items()]
+
+
+class Counter(_Value):
+    """Монотонный счётчик."""
+
+    type = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels=labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+
+class Gauge(_Value):
+    """Текущее значение."""
+
+    type = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        self._values[self._key(labels=labels)] = value
+
+
+class Histogram(Metric):
+    """Гистограмма: число наблюдений по корзинам, их сумма и количество. `observe` — O(log корзин)."""
+
+    type = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name=name, description=description, labels=labels)
+        self.buckets: Tuple[float, ...] = tuple(sorted(buckets))
+        # Для каждого набора меток: [счётчики корзин (последняя — +Inf), сумма]
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels=labels)
+        entry = self._values.get(key)
+        if entry is None:
+            entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+        entry[0][bisect.bisect_left(self.buckets, value)] += 1
+        entry[1][0] += value
+
+    def count(self, **labels: str) -> int:
+        entry = self._values.get(self._key(labels=labels))
+        return sum(entry[0]) if entry else 0
+
+    def samples(self) -> List[str]:
+        lines: List[str] = []
+        for key, (counts, total) in self._values.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labels, key, extra=le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {_format_value(total[0])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Набор метрик процесса. Асинхронные сборщики (например, подсчёт активных напоминаний
+    в MongoDB) выполняются не при каждом запросе, а фоновым циклом `MetricsServer`.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, Metric] = {}
+        self._collectors: List[Callable[[], Awaitable[None]]] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics[metric.name] = metric
+        return metric
+
+    def add_collector(self, collector: Callable[[], Awaitable[None]]) -> None:
+        self._collectors.append(collector)
+
+    async def refresh(self) -> None:
+        for collector in self._collectors:
+            try:
+                await collector()
+            except Exception as e:
+                logger.error(msg=f"Ошибка сбора метрик: {e}")
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+# Метрики приложения
+SWEEP_DURATION = registry.register(Histogram(
+    name="reminder_sweep_duration_seconds",
+    description="Длительность обработки пачки наступивших напоминаний",
+    labels=("source",),
+))
+DELIVERY_LAG = registry.register(Histogram(
+    name="reminder_delivery_lag_seconds",
+    description="Опоздание отправки: фактическое время отправки минус время напоминания",
+    buckets=LAG_BUCKETS,
+))
+SENDS = registry.register(Counter(
+    name="reminder_sends_total",
+    description="Отправки уведомлений по результату",
+    labels=("outcome",),
+))
+TELEGRAM_API_DURATION = registry.register(Histogram(
+    name="telegram_api_request_duration_seconds",
+    description="Длительность запросов к Bot API",
+    labels=("method",),
+))
+HANDLER_DURATION = registry.register(Histogram(
+    name="bot_handler_duration_seconds",
+    description="Длительность обработки обновления хэндлером",
+    labels=("handler",),
+))
+ACTIVE_REMINDERS = registry.register(Gauge(
+    name="reminders_active",
+    description="Число активных (не завершённых) напоминаний",
+))
+
+
+def watch_log_handler(handler: Any) -> None:
+    """Глубина очереди и выброшенные записи `ThreadedMongoLogHandler` — читаются при сборе."""
+    registry.register(Gauge(
+        name="mongo_log_queue_depth",
+        description="Записи логов, ожидающие записи в MongoDB",
+        collect=lambda: handler.log_queue.qsize(),
+    ))
+    registry.register(Counter(
+        name="mongo_log_dropped_total",
+        description="Записи логов, выброшенные при переполнении очереди",
+        collect=lambda: handler.dropped,
+    ))
+
+
+class MetricsServer:
+    """
+    Отдаёт метрики в формате Prometheus на отдельном порту (встроенный aiohttp-сервер).
+    Асинхронные сборщики обновляются раз в `refresh_interval` секунд.
+    """
+
+    def __init__(self, registry: MetricsRegistry, path: str, refresh_interval: float) -> None:
+        self._registry = registry
+        self.path: str = path
+        self.refresh_interval: float = refresh_interval
+        self._runner: Optional[web.AppRunner] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self.app = web.Application()
+        self.app.router.add_get(path, self.handle)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        return web.Response(body=self._registry.render().encode(), headers={"Content-Type": CONTENT_TYPE})
+
+    async def start(self, host: str, port: int) -> None:
+        self._runner = web.AppRunner(app=self.app)
+        await self._runner.setup()
+        await web.TCPSite(runner=self._runner, host=host, port=port).start()
+        self._refresh_task = asyncio.create_task(coro=self._refresh_loop())
+        logger.info(msg=f"Метрики доступны на {host}:{port}{self.path}")
+
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self._registry.refresh()
+            await asyncio.sleep(delay=self.refresh_interval)
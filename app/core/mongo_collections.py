@@ -1,4 +1,11 @@
-from app.core.database import get_mongo
+from app.core.config import Settings
+from app.core.database import mongo_registry
 
-notification_collection = get_mongo()["notifications"]
-users_collection = get_mongo()["users"]
\ No newline at end of file
+# Коллекции берутся у текущего клиента реестра при каждом обращении
+notification_collection = mongo_registry.collection(name=Settings.get_notifications_collection)
+users_collection = mongo_registry.collection(name=Settings.get_users_collection)
+outbox_collection = mongo_registry.collection(name=Settings.get_outbox_collection)
+audit_collection = mongo_registry.collection(name=Settings.get_audit_collection)
+archive_collection = mongo_registry.collection(name=Settings.get_archive_collection)
+
+fsm_collection = mongo_registry.collection(name=Settings.get_fsm_collection)
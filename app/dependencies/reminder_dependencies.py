@@ -3,17 +3,62 @@
 
 
 
+from datetime import timedelta
+
+from app.core.config import Settings, get_settings
+from app.repositories.audit_writer import AuditEventWriter
+from app.repositories.outbox_repository import MongoOutboxRepository
+from app.repositories.reminder_archiver import ReminderArchiver
 from app.repositories.reminder_repository import MongoReminderRepository
+from app.repositories.reminder_state_writer import ReminderStateWriter
+from app.services.scheduler import ReminderScheduler
 
 from app.services.remineder_service import ReminderService, ReminderServiceNotificationMiddleware
 
 
-from app.core.mongo_collections import notification_collection
+from app.core.mongo_collections import archive_collection, audit_collection, notification_collection, outbox_collection
+
+
+
+
+
+
+settings: Settings = get_settings()
 
+# Общий планировщик: репозитории сообщают ему о создании, удалении и переносе напоминаний
+reminder_scheduler = ReminderScheduler(
+    window=timedelta(seconds=settings.SCHEDULER_WINDOW_SECONDS),
+    max_size=settings.SCHEDULER_MAX_SIZE,
+)
 
+# Буфер обновлений состояния после отправки (пакетный bulk_write)
+reminder_state_writer = ReminderStateWriter(
+    collection=notification_collection,
+    max_operations=settings.STATE_FLUSH_SIZE,
+    flush_interval=settings.STATE_FLUSH_INTERVAL_MS / 1000,
+    max_buffered=settings.STATE_BUFFER_LIMIT,
+)
 
+# Поток событий аудита в отдельной коллекции (пакетная запись)
+audit_writer = AuditEventWriter(
+    collection=audit_collection,
+    max_events=settings.AUDIT_FLUSH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    max_buffered=settings.AUDIT_BUFFER_LIMIT,
+)
 
+# Перенос выполненных напоминаний в архив (или их удаление по TTL)
+reminder_archiver = ReminderArchiver(
+    collection=notification_collection,
+    archive_collection=archive_collection,
+    mode=settings.ARCHIVE_MODE,
+    max_age=timedelta(days=settings.ARCHIVE_AFTER_DAYS),
+    batch_size=settings.ARCHIVE_BATCH_SIZE,
+    pause=settings.ARCHIVE_BATCH_PAUSE_SECONDS,
+)
 
+# Outbox исходящих уведомлений
+outbox_repository = MongoOutboxRepository(collection=outbox_collection)
 
-reminder_middleware_notification = ReminderServiceNotificationMiddleware(repository=MongoReminderRepository(collection=notification_collection))
-reminder_notification = ReminderService(repository=MongoReminderRepository(collection=notification_collection))
\ No newline at end of file
+reminder_middleware_notification = ReminderServiceNotificationMiddleware(repository=MongoReminderRepository(collection=notification_collection, scheduler=reminder_scheduler, audit=audit_writer), state_writer=reminder_state_writer)
+reminder_notification = ReminderService(repository=MongoReminderRepository(collection=notification_collection, scheduler=reminder_scheduler, audit=audit_writer))
\ No newline at end of file
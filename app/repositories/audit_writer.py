@@ -0,0 +1,60 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING
+
+from app.core.database import ensure_ttl_index
+from app.repositories.batch_writer import BufferedBatchWriter
+
+# События жизненного цикла напоминаний
+AUDIT_CREATED = "created"
+AUDIT_FIRED = "fired"
+AUDIT_SKIPPED = "skipped"
+AUDIT_CONFIRMED = "confirmed"
+AUDIT_TIMED_OUT = "timed_out"
+AUDIT_DELETED = "deleted"
+AUDIT_DELETED_ALL = "deleted_all"
+
+
+class AuditEventWriter(BufferedBatchWriter[Dict[str, Any]]):
+    """
+    Поток событий аудита в отдельной коллекции: пачки пишутся `insert_many`.
+    Старые события удаляет TTL-индекс по `timestamp`.
+    """
+
+    written_field = "nInserted"
+    items_name = "событий аудита"
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        max_events: int,
+        flush_interval: float,
+        max_buffered: Optional[int] = None,
+    ) -> None:
+        super().__init__(collection=collection, batch_size=max_events, flush_interval=flush_interval, max_buffered=max_buffered)
+
+    async def ensure_indexes(self, retention_seconds: int) -> None:
+        """TTL-индекс для срока хранения и индекс для истории пользователя."""
+        await ensure_ttl_index(
+            collection=self._collection, field="timestamp", name="timestamp_ttl", expire_after_seconds=retention_seconds
+        )
+        await self._collection.create_index(
+            keys=[("user_id", ASCENDING), ("timestamp", ASCENDING)],
+            name="user_timestamp"
+        )
+
+    async def record(self, event: str, user_id: Optional[str] = None, reminder_id: Any = None, **details: Any) -> None:
+        """Добавляет событие в буфер; при заполнении буфера сразу записывает его."""
+        document: Dict[str, Any] = {"event": event, "timestamp": datetime.utcnow(), **details}
+        if user_id is not None:
+            document["user_id"] = user_id
+        if reminder_id is not None:
+            document["reminder_id"] = str(reminder_id)
+
+        await self._add(item=document)
+
+    async def _write(self, items: List[Dict[str, Any]]) -> int:
+        result = await self._collection.insert_many(items, ordered=False)
+        return len(result.inserted_ids)
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Generic, List, Optional, TypeVar
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError
+
+logger: logging.Logger = logging.getLogger(name="app_logger")
+
+Item = TypeVar("Item")
+
+
+class BufferedBatchWriter(ABC, Generic[Item]):
+    """
+    Буфер записей в MongoDB с пакетной записью.
+
+    Записи копятся в памяти и записываются одним неупорядоченным запросом, как только
+    их набирается `batch_size` или проходит `flush_interval` секунд. Если запись не
+    удалась, пачка возвращается в буфер до следующей попытки. Пока MongoDB недоступна,
+    буфер растёт не больше `max_buffered` записей (по умолчанию сто пачек): самые старые
+    сверх лимита выбрасываются и учитываются в `dropped`.
+
+    Наследник задаёт только сам запрос (`_write`), поле счётчика вставленных или
+    изменённых документов в BulkWriteError (`written_field`) и название записей для логов.
+    """
+
+    # Поле `BulkWriteError.details` с числом записанных документов пачки
+    written_field: str
+    # Название записей в логах: «Буфер <items_name> переполнен»
+    items_name: str
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        batch_size: int,
+        flush_interval: float,
+        max_buffered: Optional[int] = None,
+    ) -> None:
+        self._collection = collection
+        self.batch_size: int = batch_size
+        self.flush_interval: float = flush_interval
+        self.max_buffered: int = max_buffered or batch_size * 100
+        self._items: List[Item] = []
+        self._lock: Optional[asyncio.Lock] = None
+        self._is_running: bool = True
+
+        self.written: int = 0
+        self.flushes: int = 0
+        self.errors: int = 0
+        self.dropped: int = 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    @abstractmethod
+    async def _write(self, items: List[Item]) -> int:
+        """Записывает пачку одним неупорядоченным запросом. Возвращает число записанных документов."""
+
+    async def _add(self, item: Item) -> None:
+        """Добавляет запись в буфер; при заполнении пачки сразу записывает её."""
+        self._items.append(item)
+        self._trim()
+        if len(self._items) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Записывает накопленное. Одновременно выполняется только одна запись."""
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+
+        async with self._lock:
+            while self._items:
+                items, self._items = self._items[:self.batch_size], self._items[self.batch_size:]
+                try:
+                    self.written += await self._write(items)
+                except BulkWriteError as e:
+                    # Неупорядоченная запись: остальные записи пачки применены
+                    self.written += e.details.get(self.written_field, 0)
+                    self.errors += len(e.details.get("writeErrors", []))
+                    logger.error(msg=f"Ошибки при пакетной записи {self.items_name}: {e.details.get('writeErrors')}")
+                except Exception:
+                    # Возвращаем пачку в буфер, чтобы не потерять её
+                    self._items = items + self._items
+                    self._trim()
+                    raise
+                self.flushes += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Счётчики записанных, ошибочных и выброшенных из-за переполнения записей."""
+        return {
+            "buffered": len(self._items),
+            "written": self.written,
+            "flushes": self.flushes,
+            "errors": self.errors,
+            "dropped": self.dropped,
+        }
+
+    def _trim(self) -> None:
+        overflow = len(self._items) - self.max_buffered
+        if overflow > 0:
+            del self._items[:overflow]
+            self.dropped += overflow
+            logger.error(msg=f"Буфер {self.items_name} переполнен, выброшено: {overflow}")
+
+    async def run(self) -> None:
+        """Фоновый цикл: сбрасывает буфер каждые `flush_interval` секунд."""
+        while self._is_running:
+            await asyncio.sleep(delay=self.flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(msg=f"Ошибка пакетной записи {self.items_name}: {e}")
+
+    async def close(self) -> None:
+        """Останавливает фоновый цикл и записывает всё, что осталось в буфере."""
+        self._is_running = False
+        await self.flush()
@@ -0,0 +1,121 @@
+from datetime import datetime
+from typing import Any, Dict, List, Set
+from uuid import uuid4
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING, UpdateOne
+
+from app.core.database import ensure_ttl_index
+from app.repositories.reminder_repository import LEASE_FIELDS
+
+# Статусы сообщений в outbox
+OUTBOX_PENDING = "pending"
+OUTBOX_DELIVERED = "delivered"
+OUTBOX_DEAD = "dead"
+
+
+class MongoOutboxRepository:
+    """
+    Outbox исходящих сообщений в MongoDB.
+
+    Каждое сообщение хранится под ключом идемпотентности (напоминание + срабатывание):
+    повторная постановка того же срабатывания ничего не меняет.
+    """
+
+    def __init__(self, collection: AsyncIOMotorCollection) -> None:
+        self._collection = collection
+
+    async def ensure_indexes(self, retention_seconds: int) -> None:
+        """Уникальный ключ идемпотентности, выборка готовых к отправке и TTL доставленных."""
+        await self._collection.create_index(keys=[("key", ASCENDING)], name="key", unique=True)
+        await self._collection.create_index(
+            keys=[("status", ASCENDING), ("next_attempt_at", ASCENDING)],
+            name="status_next_attempt_at"
+        )
+        await ensure_ttl_index(
+            collection=self._collection, field="delivered_at", name="delivered_at_ttl", expire_after_seconds=retention_seconds
+        )
+
+    async def enqueue(self, entries: List[Dict[str, Any]], now: datetime) -> Set[str]:
+        """
+        Ставит сообщения в outbox одним неупорядоченным `bulk_write`.
+        Возвращает ключи вставленных сообщений: уже бывшие в outbox не меняются и не входят в результат.
+        """
+        if not entries:
+            return set()
+
+        operations = [
+            UpdateOne(
+                filter={"key": entry["key"]},
+                update={"$setOnInsert": {
+                    **entry,
+                    "status": OUTBOX_PENDING,
+                    "attempts": 0,
+                    "next_attempt_at": now,
+                    "created_at": now,
+                }},
+                upsert=True
+            )
+            for entry in entries
+        ]
+        result = await self._collection.bulk_write(operations, ordered=False)
+        return {entries[index]["key"] for index in result.upserted_ids}
+
+    async def claim(self, owner: str, now: datetime, lease_until: datetime, limit: int) -> List[Dict[str, Any]]:
+        """
+        Берёт в аренду до `limit` сообщений, готовых к отправке (так же, как напоминания).
+        Взятые читаются по `_id` кандидатов: доставленные хранятся весь срок, и выборка
+        только по токену перебирала бы весь outbox.
+        """
+        ready_filter: Dict[str, Any] = {
+            "status": OUTBOX_PENDING,
+            "next_attempt_at": {"$lte": now},
+            "lease_until": {"$not": {"$gt": now}},
+        }
+        ids = [
+            entry["_id"]
+            async for entry in self._collection.find(filter=ready_filter, projection={"_id": 1}).limit(limit)
+        ]
+        if not ids:
+            return []
+
+        token: str = uuid4().hex
+        await self._collection.update_many(
+            filter={"_id": {"$in": ids}, **ready_filter},
+            update={"$set": {"lease_owner": owner, "lease_until": lease_until, "lease_token": token}}
+        )
+        return await self._collection.find(filter={"_id": {"$in": ids}, "lease_token": token}).to_list(None)
+
+    async def complete(self, delivered_ids: List[Any], operations: List[UpdateOne], now: datetime) -> None:
+        """Записывает результаты пачки: доставленные и операции повторов/dead-letter."""
+        operations = [
+            UpdateOne(
+                filter={"_id": entry_id},
+                update={"$set": {"status": OUTBOX_DELIVERED, "delivered_at": now}, "$unset": LEASE_FIELDS}
+            )
+            for entry_id in delivered_ids
+        ] + operations
+        if operations:
+            await self._collection.bulk_write(operations, ordered=False)
+
+    @staticmethod
+    def retry_operation(entry_id: Any, attempts: int, next_attempt_at: datetime, error: str) -> UpdateOne:
+        """Операция отложенного повтора неудачной отправки."""
+        return UpdateOne(
+            filter={"_id": entry_id},
+            update={
+                "$set": {"attempts": attempts, "next_attempt_at": next_attempt_at, "last_error": error},
+                "$unset": LEASE_FIELDS,
+            }
+        )
+
+    @staticmethod
+    def dead_operation(entry_id: Any, attempts: int, error: str) -> UpdateOne:
+        """Операция перевода сообщения в dead-letter после исчерпания попыток."""
+        return UpdateOne(
+            filter={"_id": entry_id},
+            update={
+                "$set": {"status": OUTBOX_DEAD, "attempts": attempts, "last_error": error},
+                "$unset": LEASE_FIELDS,
+            }
+        )
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from app.core.database import ensure_ttl_index
+
+logger: logging.Logger = logging.getLogger(name="app_logger")
+
+# Режимы жизненного цикла выполненных напоминаний
+ARCHIVE_MODE_ARCHIVE = "archive"
+ARCHIVE_MODE_TTL = "ttl"
+
+# Код ошибки MongoDB для дубликата ключа
+DUPLICATE_KEY_ERROR = 11000
+
+
+class ReminderArchiver:
+    """
+    Убирает выполненные напоминания из рабочей коллекции, чтобы её размер зависел
+    только от числа активных.
+
+    В режиме `archive` напоминания, завершённые раньше `max_age`, переносятся пачками
+    в архивную коллекцию (сначала вставка, затем удаление — повтор после сбоя безопасен,
+    `_id` сохраняется). Между пачками делается пауза `pause`, чтобы не нагружать базу.
+    В режиме `ttl` их удаляет сама MongoDB по TTL-индексу на `completed_at`.
+    """
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        archive_collection: AsyncIOMotorCollection,
+        mode: str,
+        max_age: timedelta,
+        batch_size: int,
+        pause: float,
+    ) -> None:
+        self._collection = collection
+        self._archive_collection = archive_collection
+        self.mode: str = mode
+        self.max_age: timedelta = max_age
+        self.batch_size: int = batch_size
+        self.pause: float = pause
+        self._is_running: bool = True
+
+        self.archived: int = 0
+
+    async def ensure_indexes(self) -> None:
+        """Индекс выборки завершённых напоминаний либо TTL-индекс — в зависимости от режима."""
+        if self.mode == ARCHIVE_MODE_TTL:
+            await ensure_ttl_index(
+                collection=self._collection,
+                field="completed_at",
+                name="completed_at_ttl",
+                expire_after_seconds=int(self.max_age.total_seconds()),
+                partialFilterExpression={"completed": True}
+            )
+            return
+
+        await self._collection.create_index(
+            keys=[("completed", ASCENDING), ("completed_at", ASCENDING)],
+            name="completed_completed_at"
+        )
+        try:
+            await self._collection.drop_index("completed_at_ttl")
+        except OperationFailure:
+            pass  # TTL-режим не включался
+
+    async def archive_batch(self, now: datetime) -> int:
+        """Переносит в архив одну пачку выполненных напоминаний. Возвращает их число."""
+        reminders: List[Dict[str, Any]] = await self._collection.find(
+            filter={"completed": True, "completed_at": {"$lte": now - self.max_age}},
+            limit=self.batch_size
+        ).to_list(None)
+        if not reminders:
+            return 0
+
+        try:
+            await self._archive_collection.insert_many(reminders, ordered=False)
+        except BulkWriteError as e:
+            # Напоминания, уже перенесённые до сбоя, можно просто удалить
+            if any(error.get("code") != DUPLICATE_KEY_ERROR for error in e.details.get("writeErrors", [])):
+                raise
+
+        result = await self._collection.delete_many(
+            filter={"_id": {"$in": [reminder["_id"] for reminder in reminders]}, "completed": True}
+        )
+        self.archived += result.deleted_count
+        return result.deleted_count
+
+    async def run_once(self, now: datetime) -> int:
+        """Переносит все подходящие напоминания пачками с паузой между ними."""
+        if self.mode != ARCHIVE_MODE_ARCHIVE:
+            return 0
+
+        total = 0
+        while True:
+            archived = await self.archive_batch(now=now)
+            total += archived
+            if archived < self.batch_size:
+                return total
+            await asyncio.sleep(delay=self.pause)
+
+    async def run(self, interval: float) -> None:
+        """Фоновый цикл: раз в `interval` секунд переносит накопившиеся выполненные напоминания."""
+        while self._is_running:
+            try:
+                archived = await self.run_once(now=datetime.utcnow())
+                if archived:
+                    logger.info(msg=f"В архив перенесено {archived} выполненных напоминаний")
+            except Exception as e:
+                logger.error(msg=f"Ошибка архивации напоминаний: {e}")
+
+            await asyncio.sleep(delay=interval)
+
+    def stop(self) -> None:
+        self._is_running = False
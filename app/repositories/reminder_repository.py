@@ -1,15 +1,47 @@
 from abc import ABC, abstractmethod
-from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from dataclasses import dataclass
+from datetime import datetime
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from motor.motor_asyncio import AsyncIOMotorCollection
-from pymongo.results import UpdateResult
+from pymongo import ASCENDING, DESCENDING, UpdateOne
+from pymongo.errors import OperationFailure
+from pymongo.results import DeleteResult, UpdateResult
 
 import logging
+from uuid import uuid4
 from bson import ObjectId
+import pytz
 
 
-from app.core.mongo_collections import notification_collection
+from app.repositories.audit_writer import (
+    AUDIT_CONFIRMED,
+    AUDIT_CREATED,
+    AUDIT_DELETED,
+    AUDIT_DELETED_ALL,
+    AUDIT_TIMED_OUT,
+    AuditEventWriter,
+)
+from app.services.recurrence import advance
+from app.services.scheduler import ReminderScheduler
+from app.services.timezone_cache import get_tzinfo, user_timezone_cache
 
+# Поля, которые нужны уведомителю и планировщику для отправки напоминания
+SENDING_PROJECTION: Dict[str, int] = {"_id": 1, "user_id": 1, "date": 1, "recurring": 1, "message": 1, "fire_at": 1, "recurrence_anchor": 1}
+
+# Поля аренды напоминания экземпляром уведомителя (снимаются после обработки)
+LEASE_FIELDS: Dict[str, str] = {"lease_owner": "", "lease_until": "", "lease_token": ""}
+
+# Поля, которые показываются пользователю в списке напоминаний
+LISTING_PROJECTION: Dict[str, int] = {"_id": 1, "message": 1, "date": 1, "recurring": 1}
+
+
+@dataclass
+class ReminderPage:
+    """Страница списка напоминаний пользователя, упорядоченного по (date, _id)."""
+
+    items: List[Dict[str, Any]]
+    has_prev: bool
+    has_next: bool
 
 
 
@@ -26,6 +58,11 @@ class IReminderRepository(ABC):
         """Получает все напоминания конкретного пользователя."""
         pass
     
+    @abstractmethod
+    async def get_page(self, user_id: str, limit: int, cursor: Optional[Tuple[datetime, ObjectId]] = None, backward: bool = False) -> ReminderPage:
+        """Получает страницу активных напоминаний пользователя после (или до) курсора."""
+        pass
+
     @abstractmethod
     async def mark_completed(self, user_id: str, reminder_id: str) -> bool:
         """Отмечает разовое напоминание как выполненное для конкретного пользователя."""
@@ -35,12 +72,72 @@ class IReminderRepository(ABC):
     async def delete(self, user_id: str, reminder_id: str) -> bool:
         pass
 
+    @abstractmethod
+    async def delete_all(self, user_id: str) -> int:
+        """Удаляет все активные напоминания пользователя. Возвращает число удалённых."""
+        pass
+
+    @abstractmethod
+    def iter_due(self, now: datetime, batch_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Потоково отдаёт наступившие напоминания пачками."""
+        pass
+
+    @abstractmethod
+    async def claim(self, reminder_ids: List[Any], owner: str, now: datetime, lease_until: datetime) -> List[Dict[str, Any]]:
+        """Атомарно берёт в аренду наступившие напоминания и возвращает те, что достались `owner`."""
+        pass
+
+    @abstractmethod
+    async def expire_confirmations(self, now: datetime) -> int:
+        """Завершает напоминания, срок подтверждения которых истёк."""
+        pass
+
+    @abstractmethod
+    async def set_user_active(self, user_id: str, active: bool) -> int:
+        """Приостанавливает или возобновляет отправку активных напоминаний пользователя."""
+        pass
+
+    @abstractmethod
+    async def count_active(self) -> int:
+        """Число активных (не завершённых) напоминаний всех пользователей."""
+        pass
+
 
 class MongoReminderRepository(IReminderRepository):
     """Реализация репозитория напоминаний на основе MongoDB."""
     
-    def __init__(self, collection: AsyncIOMotorCollection)  -> None:
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        scheduler: Optional[ReminderScheduler] = None,
+        audit: Optional[AuditEventWriter] = None,
+    ) -> None:
         self._collection = collection
+        self._scheduler = scheduler
+        self._audit = audit
+
+    async def ensure_indexes(self) -> None:
+        """Создаёт индексы, необходимые для выборки напоминаний к отправке."""
+        # user_active входит в индекс: напоминания отключённых пользователей отсекаются
+        # границами индекса и не читаются при выборке
+        await self._collection.create_index(
+            keys=[("completed", ASCENDING), ("user_active", ASCENDING), ("fire_at", ASCENDING)],
+            name="completed_user_active_fire_at"
+        )
+        # Постраничный список напоминаний пользователя (keyset по date, _id)
+        await self._collection.create_index(
+            keys=[("user_id", ASCENDING), ("completed", ASCENDING), ("date", ASCENDING), ("_id", ASCENDING)],
+            name="user_completed_date"
+        )
+        try:
+            await self._collection.drop_index("completed_fire_at")
+        except OperationFailure:
+            pass  # Старого индекса уже нет
+        await self._collection.create_index(
+            keys=[("confirm_expires_at", ASCENDING)],
+            name="confirm_expires_at",
+            sparse=True
+        )
     
     async def create(self, data: Dict[str, Any]) -> Any:
         logging.info(f"Попытка добавить напоминание: {data}")
@@ -51,6 +148,8 @@ class MongoReminderRepository(IReminderRepository):
 
         result = await self._collection.insert_one(data)
         logging.info(f"Напоминание добавлено с ID {result.inserted_id}")
+        self._notify_scheduled(reminder={**data, "_id": result.inserted_id})
+        await self._record(event=AUDIT_CREATED, user_id=data.get("user_id"), reminder_id=result.inserted_id)
 
         return str(result.inserted_id)
     
@@ -58,6 +157,35 @@ class MongoReminderRepository(IReminderRepository):
         """Возвращает только напоминания конкретного пользователя."""
         return await self._collection.find({"user_id": user_id, "completed": False}).to_list(None)
     
+    async def get_page(self, user_id: str, limit: int, cursor: Optional[Tuple[datetime, ObjectId]] = None, backward: bool = False) -> ReminderPage:
+        """
+        Keyset-пагинация по индексу user_completed_date: читается не больше `limit + 1`
+        документов, сколько бы напоминаний ни было у пользователя.
+
+        `cursor` — (date, _id) последнего элемента текущей страницы для следующей страницы
+        или первого элемента — для предыдущей (`backward=True`).
+        """
+        filter_: Dict[str, Any] = {"user_id": user_id, "completed": False}
+        if cursor is not None:
+            date, reminder_id = cursor
+            op = "$lt" if backward else "$gt"
+            filter_["$or"] = [{"date": {op: date}}, {"date": date, "_id": {op: reminder_id}}]
+
+        order = DESCENDING if backward else ASCENDING
+        items: List[Dict[str, Any]] = await self._collection.find(
+            filter=filter_,
+            projection=LISTING_PROJECTION,
+            sort=[("date", order), ("_id", order)],
+            limit=limit + 1
+        ).to_list(None)
+
+        has_more = len(items) > limit
+        items = items[:limit]
+        if backward:
+            items.reverse()
+            return ReminderPage(items=items, has_prev=has_more, has_next=True)
+        return ReminderPage(items=items, has_prev=cursor is not None, has_next=has_more)
+
     async def mark_completed(self, user_id: str, reminder_id: str) -> bool:
         """Помечает разовое напоминание как выполненное и обновляет повторяющиеся."""
         reminder = await self._collection.find_one(filter={"_id": ObjectId(oid=reminder_id), "user_id": user_id})
@@ -65,34 +193,201 @@ class MongoReminderRepository(IReminderRepository):
             return False
         
         if reminder["recurring"]:  # Если напоминание повторяется
-            new_date = reminder["date"]
-
-            if reminder["recurring"] == "daily":
-                new_date += timedelta(days=1)
-            elif reminder["recurring"] == "weekly":
-                new_date += timedelta(weeks=1)
-            elif reminder["recurring"] == "monthly":
-                new_date += timedelta(weeks=4)
+            # Сразу переносим на ближайшее будущее срабатывание в часовом поясе пользователя
+            user_tz = get_tzinfo(zone=await user_timezone_cache.get(user_id=user_id))
+            update: Optional[Dict[str, Any]] = advance(reminder=reminder, user_tz=user_tz, now=datetime.now(pytz.utc))
+            if update is None:
+                return False
 
             await self._collection.update_one(
                 filter={"_id": ObjectId(oid=reminder_id), "user_id": user_id},
-                update={"$set": {"date": new_date}}
+                update={"$set": update}
             )
+            self._notify_scheduled(reminder={**reminder, **update})
+            await self._record(event=AUDIT_CONFIRMED, user_id=user_id, reminder_id=reminder_id)
             return True
         else:  # Разовое напоминание
             result: UpdateResult = await self._collection.update_one(
-                filter={"_id": ObjectId(reminder_id), "user_id": user_id},
-                update={"$set": {"completed": True}}
+                filter={"_id": ObjectId(reminder_id), "user_id": user_id, "completed": False},
+                update={
+                    "$set": {"completed": True, "status": "completed"},
+                    "$currentDate": {"completed_at": True},
+                    "$unset": {"confirm_expires_at": ""}
+                }
             )
+            self._notify_cancelled(reminder_id=reminder_id)
+            if result.modified_count > 0:
+                await self._record(event=AUDIT_CONFIRMED, user_id=user_id, reminder_id=reminder_id)
             return result.modified_count > 0
     
     async def delete(self, user_id: str, reminder_id: str) -> bool:
         """Удаляет напоминание конкретного пользователя."""
         result = await self._collection.delete_one(filter={"_id": ObjectId(reminder_id), "user_id": user_id})
+        self._notify_cancelled(reminder_id=reminder_id)
         if result.deleted_count > 0:
-            await notification_collection.insert_one(document={
-                "user_id": user_id,
-                "status": "deleted",
-                "timestamp": datetime.utcnow()
-            })
+            await self._record(event=AUDIT_DELETED, user_id=user_id, reminder_id=reminder_id)
         return result.deleted_count > 0
+
+    async def delete_all(self, user_id: str) -> int:
+        """
+        Удаляет все активные напоминания пользователя одним `delete_many` и пишет
+        одно итоговое событие аудита.
+        """
+        result: DeleteResult = await self._collection.delete_many(filter={"user_id": user_id, "completed": False})
+        if self._scheduler is not None:
+            self._scheduler.cancel_user(user_id=user_id)
+
+        if result.deleted_count:
+            await self._record(event=AUDIT_DELETED_ALL, user_id=user_id, count=result.deleted_count)
+        return result.deleted_count
+
+    async def iter_due(self, now: datetime, batch_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Читает наступившие напоминания курсором, только с полями, нужными для отправки."""
+        cursor = self._collection.find(
+            filter=self._due_filter(now=now),
+            projection=SENDING_PROJECTION,
+            batch_size=batch_size
+        ).sort("fire_at", ASCENDING)
+
+        batch: List[Dict[str, Any]] = []
+        async for reminder in cursor:
+            batch.append(reminder)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    async def claim(self, reminder_ids: List[Any], owner: str, now: datetime, lease_until: datetime) -> List[Dict[str, Any]]:
+        """
+        Берёт напоминания в аренду, чтобы несколько экземпляров бота не отправили одно и то же.
+
+        Обновление каждого документа атомарно: аренду получит только один экземпляр,
+        пока она не истечёт. Пачка обрабатывается двумя запросами по индексу `_id`:
+        update_many со случайным токеном и выборка документов пачки с этим токеном.
+        """
+        if not reminder_ids:
+            return []
+
+        token: str = uuid4().hex
+        ids: List[ObjectId] = [ObjectId(str(reminder_id)) for reminder_id in reminder_ids]
+        await self._collection.update_many(
+            filter={
+                "_id": {"$in": ids},
+                **self._due_filter(now=now),
+                "lease_until": {"$not": {"$gt": now}},
+            },
+            update={"$set": {"lease_owner": owner, "lease_until": lease_until, "lease_token": token}}
+        )
+        return await self._collection.find(
+            # Выборка по `_id` идёт по индексу; токен оставляет только взятые этим вызовом
+            filter={"_id": {"$in": ids}, "lease_token": token},
+            projection=SENDING_PROJECTION
+        ).to_list(None)
+
+    @staticmethod
+    def _due_filter(now: datetime) -> Dict[str, Any]:
+        return {
+            "completed": False,
+            "user_active": {"$ne": False},
+            "fire_at": {"$lte": now},
+            "status": {"$nin": ["awaiting_confirmation", "queued"]},
+        }
+
+    @staticmethod
+    def advance_operation(reminder_id: str, update: Dict[str, Any]) -> UpdateOne:
+        """Операция переноса повторяющегося напоминания на следующую дату (для bulk_write)."""
+        return UpdateOne(filter={"_id": ObjectId(str(reminder_id))}, update={"$set": update, "$unset": LEASE_FIELDS})
+
+    @staticmethod
+    def missed_operation(reminder_id: str) -> UpdateOne:
+        """Операция завершения пропущенного разового напоминания без отправки (для bulk_write)."""
+        return UpdateOne(
+            filter={"_id": ObjectId(str(reminder_id)), "completed": False},
+            update={"$set": {"completed": True, "status": "missed"}, "$currentDate": {"completed_at": True}, "$unset": LEASE_FIELDS}
+        )
+
+    @staticmethod
+    def queued_operation(reminder_id: str) -> UpdateOne:
+        """
+        Операция отметки разового напоминания, записанного в outbox (для bulk_write): оно выходит
+        из выборки наступивших до отправки. Ожидание подтверждения не перезаписывает, поэтому
+        порядок с `awaiting_confirmation_operation` внутри неупорядоченной записи не важен.
+        """
+        return UpdateOne(
+            filter={"_id": ObjectId(str(reminder_id)), "completed": False, "status": {"$ne": "awaiting_confirmation"}},
+            update={"$set": {"status": "queued"}, "$unset": LEASE_FIELDS}
+        )
+
+    @classmethod
+    def awaiting_confirmation_operation(cls, reminder_id: str, expires_at: datetime) -> UpdateOne:
+        """Операция перевода разового напоминания в ожидание подтверждения (для bulk_write)."""
+        filter_, update = cls._awaiting_confirmation_update(reminder_id=reminder_id, expires_at=expires_at)
+        return UpdateOne(filter=filter_, update=update)
+
+    @staticmethod
+    def _awaiting_confirmation_update(reminder_id: str, expires_at: datetime) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        return (
+            {"_id": ObjectId(str(reminder_id)), "completed": False},
+            {"$set": {"status": "awaiting_confirmation", "confirm_expires_at": expires_at}, "$unset": LEASE_FIELDS},
+        )
+
+    async def expire_confirmations(self, now: datetime) -> int:
+        """Одним запросом по индексу confirm_expires_at завершает неподтверждённые напоминания."""
+        result: UpdateResult = await self._collection.update_many(
+            filter={"status": "awaiting_confirmation", "confirm_expires_at": {"$lte": now}},
+            update={
+                "$set": {"completed": True, "status": "timed_out"},
+                "$currentDate": {"completed_at": True},
+                "$unset": {"confirm_expires_at": ""}
+            }
+        )
+        if result.modified_count:
+            await self._record(event=AUDIT_TIMED_OUT, count=result.modified_count)
+        return result.modified_count
+
+    async def set_user_active(self, user_id: str, active: bool) -> int:
+        """
+        Одним update_many помечает активные напоминания пользователя флагом `user_active`
+        и сообщает планировщику: приостановленные убираются из окна, возобновлённые возвращаются.
+        """
+        result: UpdateResult = await self._collection.update_many(
+            filter={"user_id": user_id, "completed": False},
+            update={"$set": {"user_active": active}}
+        )
+        if not active:
+            if self._scheduler is not None:
+                self._scheduler.cancel_user(user_id=user_id)
+        elif result.modified_count:
+            await self._reschedule_user(user_id=user_id)
+        return result.modified_count
+
+    async def count_active(self) -> int:
+        """Считает по префиксу индекса completed_user_active_fire_at, не читая документы."""
+        return await self._collection.count_documents(filter={"completed": False})
+
+    async def _record(self, event: str, **fields: Any) -> None:
+        """Передаёт событие в поток аудита (если он подключён)."""
+        if self._audit is not None:
+            await self._audit.record(event=event, **fields)
+
+    def _notify_scheduled(self, reminder: Dict[str, Any]) -> None:
+        """Сообщает планировщику о новом или перенесённом напоминании."""
+        if self._scheduler is not None:
+            self._scheduler.schedule(reminder)
+
+    async def _reschedule_user(self, user_id: str) -> None:
+        """Возвращает в планировщик напоминания пользователя из текущего окна (и просроченные)."""
+        if self._scheduler is None or self._scheduler.horizon is None:
+            return
+        cursor = self._collection.find(
+            filter={"user_id": user_id, **self._due_filter(now=self._scheduler.horizon)},
+            projection=SENDING_PROJECTION
+        )
+        async for reminder in cursor:
+            self._notify_scheduled(reminder=reminder)
+
+    def _notify_cancelled(self, reminder_id: str) -> None:
+        """Сообщает планировщику, что напоминание больше не нужно отправлять."""
+        if self._scheduler is not None:
+            self._scheduler.cancel(reminder_id)
@@ -0,0 +1,30 @@
+from typing import List, Optional
+
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import UpdateOne
+
+from app.repositories.batch_writer import BufferedBatchWriter
+
+
+class ReminderStateWriter(BufferedBatchWriter[UpdateOne]):
+    """Буфер обновлений состояния напоминаний после отправки: пачки пишутся `bulk_write`."""
+
+    written_field = "nModified"
+    items_name = "обновлений напоминаний"
+
+    def __init__(
+        self,
+        collection: AsyncIOMotorCollection,
+        max_operations: int,
+        flush_interval: float,
+        max_buffered: Optional[int] = None,
+    ) -> None:
+        super().__init__(collection=collection, batch_size=max_operations, flush_interval=flush_interval, max_buffered=max_buffered)
+
+    async def add(self, operation: UpdateOne) -> None:
+        """Добавляет операцию в буфер; при заполнении буфера сразу записывает его."""
+        await self._add(item=operation)
+
+    async def _write(self, items: List[UpdateOne]) -> int:
+        result = await self._collection.bulk_write(items, ordered=False)
+        return result.modified_count
@@ -5,6 +5,7 @@ from abc import ABC, abstractmethod
 
 
 from app.core.mongo_collections import users_collection
+from app.services.timezone_cache import UserTimezoneCache, user_timezone_cache
 
 
 
@@ -29,12 +30,18 @@ class IUserRepository(ABC):
         """Обновляет часовой пояс пользователя."""
         pass
 
+    @abstractmethod
+    async def set_active(self, user_id: str, active: bool, reason: Optional[str] = None):
+        """Отмечает, можно ли доставлять пользователю сообщения."""
+        pass
+
 
 class MongoUserRepository(IUserRepository):
     """Реализация репозитория пользователей на MongoDB."""
 
-    def __init__(self, collection: AsyncIOMotorCollection):
+    def __init__(self, collection: AsyncIOMotorCollection, timezone_cache: Optional[UserTimezoneCache] = None):
         self._collection = collection
+        self._timezone_cache = timezone_cache
 
     async def get_user(self, user_id: str) -> Optional[Dict]:
         return await self._collection.find_one({"user_id": user_id})
@@ -54,12 +61,27 @@ class MongoUserRepository(IUserRepository):
             {"$set": user_data},
             upsert=True
         )
+        self._invalidate_timezone(user_id)
 
     async def update_timezone(self, user_id: str, timezone: str):
         await self._collection.update_one(
             {"user_id": user_id},
             {"$set": {"timezone": timezone}}
         )
+        self._invalidate_timezone(user_id)
+
+    async def set_active(self, user_id: str, active: bool, reason: Optional[str] = None):
+        update: Dict = {"$set": {"active": active, "active_changed_at": datetime.utcnow()}}
+        if active:
+            update["$unset"] = {"inactive_reason": ""}
+        else:
+            update["$set"]["inactive_reason"] = reason
+        await self._collection.update_one({"user_id": user_id}, update)
+
+    def _invalidate_timezone(self, user_id: str) -> None:
+        """Сбрасывает закэшированный часовой пояс пользователя."""
+        if self._timezone_cache is not None:
+            self._timezone_cache.invalidate(user_id)
 
 
 class UserService:
@@ -80,7 +102,11 @@ class UserService:
         """Обновляет часовой пояс пользователя."""
         await self._repository.update_timezone(user_id, timezone)
 
+    async def set_user_active(self, user_id: str, active: bool, reason: Optional[str] = None):
+        """Отключает пользователя, чат которого недоступен, или включает его снова."""
+        await self._repository.set_active(user_id, active, reason)
+
 
 # Инициализация репозитория и сервиса пользователей
-user_repository = MongoUserRepository(users_collection)
+user_repository = MongoUserRepository(users_collection, timezone_cache=user_timezone_cache)
 user_service = UserService(user_repository)
\ No newline at end of file
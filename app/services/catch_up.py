@@ -0,0 +1,109 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.services.scheduler import as_utc
+
+# Политики досылки просроченных напоминаний
+CATCH_UP_ALL = "all"
+CATCH_UP_LATEST = "latest"
+CATCH_UP_DIGEST = "digest"
+
+# Сколько пропущенных напоминаний перечислять в сводке и сколько символов оставлять от каждого
+DIGEST_MAX_ITEMS = 20
+DIGEST_ITEM_TEXT = 150
+
+# Лимит длины текста сообщения Telegram
+MESSAGE_MAX_LENGTH = 4096
+
+
+@dataclass
+class CatchUpPlan:
+    """Как поступить с пачкой наступивших напоминаний."""
+
+    send: List[Dict[str, Any]] = field(default_factory=list)
+    digests: Dict[Any, List[Dict[str, Any]]] = field(default_factory=dict)
+    stale: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class CatchUpPolicy:
+    """
+    Политика досылки напоминаний, просроченных дольше `grace` (например, после простоя бота).
+
+    - `all` — отправить каждое пропущенное срабатывание, включая все пропущенные повторы серии;
+    - `latest` — по одному сообщению на серию: повторяющееся сразу переносится в будущее;
+    - `digest` — одно сообщение «вы пропустили N напоминаний» на пользователя.
+
+    Напоминания старше `max_staleness` не отправляются вовсе.
+    """
+
+    def __init__(self, mode: str, grace: timedelta, max_staleness: Optional[timedelta]) -> None:
+        self.mode: str = mode
+        self.grace: timedelta = grace
+        self.max_staleness: Optional[timedelta] = max_staleness
+
+    @property
+    def replays_missed(self) -> bool:
+        """Нужно ли отправлять каждое пропущенное срабатывание повторяющейся серии."""
+        return self.mode == CATCH_UP_ALL
+
+    def plan(self, reminders: List[Dict[str, Any]], now: datetime) -> CatchUpPlan:
+        plan = CatchUpPlan()
+        overdue: Dict[Any, List[Dict[str, Any]]] = {}
+
+        for reminder in reminders:
+            lateness: timedelta = now - as_utc(reminder["fire_at"]) if reminder.get("fire_at") else timedelta()
+
+            if self.max_staleness is not None and lateness > self.max_staleness:
+                plan.stale.append(reminder)
+            elif self.mode == CATCH_UP_DIGEST and lateness > self.grace:
+                overdue.setdefault(reminder["user_id"], []).append(reminder)
+            else:
+                plan.send.append(reminder)
+
+        for user_id, missed in overdue.items():
+            # Одно пропущенное напоминание нет смысла сворачивать в сводку
+            if len(missed) == 1:
+                plan.send.extend(missed)
+            else:
+                plan.digests[user_id] = missed
+
+        return plan
+
+
+def shorten(text: str, limit: int = DIGEST_ITEM_TEXT) -> str:
+    """Обрезает текст пункта сводки до `limit` символов."""
+    return text if len(text) <= limit else text[:limit - 1] + "…"
+
+
+def fit_message(header: str, items: List[str], total: int) -> str:
+    """
+    Собирает сообщение из заголовка и пунктов не длиннее MESSAGE_MAX_LENGTH. Пункты,
+    которые не поместились (или не вошли в `items`), учитываются в строке «…и ещё N».
+    """
+    reserve = len(f"\n…и ещё {total}")
+    lines = [header]
+    length = len(header)
+    for item in items:
+        if length + 1 + len(item) + reserve > MESSAGE_MAX_LENGTH:
+            break
+        lines.append(item)
+        length += 1 + len(item)
+
+    shown = len(lines) - 1
+    if total > shown:
+        lines.append(f"…и ещё {total - shown}")
+    return "\n".join(lines)
+
+
+def format_digest(reminders: List[Dict[str, Any]]) -> str:
+    """Текст сводки пропущенных напоминаний одного пользователя (укладывается в лимит Telegram)."""
+    items = [
+        f"• {reminder['date'].strftime('%d.%m %H:%M')} — {shorten(reminder['message'])}"
+        for reminder in sorted(reminders, key=lambda item: item["date"])[:DIGEST_MAX_ITEMS]
+    ]
+    return fit_message(
+        header=f"🔔 Пока бот был недоступен, вы пропустили напоминаний: {len(reminders)}",
+        items=items,
+        total=len(reminders),
+    )
@@ -0,0 +1,150 @@
+import calendar
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional, Tuple, Union
+
+import pytz
+
+WORKING_DAYS: Tuple[int, ...] = (0, 1, 2, 3, 4)
+CALENDAR_FREQUENCIES = ("daily", "weekly", "monthly")
+
+WEEKDAY_NAMES = ("Пн", "Вт", "Ср", "Чт", "Пт", "Сб", "Вс")
+FREQUENCY_NAMES: Dict[str, str] = {
+    "daily": "Ежедневные",
+    "weekly": "Еженедельные",
+    "monthly": "Ежемесячные",
+    "weekdays": "По будням",
+}
+
+
+@dataclass(frozen=True)
+class RecurrenceRule:
+    """
+    Правило повторения напоминания.
+
+    В документе хранится либо строкой (`daily`, `weekly`, `monthly`, `weekdays`),
+    либо словарём: `{"freq": "daily"|"weekly"|"monthly", "interval": N}`,
+    `{"freq": "weekdays", "days": [0, 2, 4]}` (0 — понедельник) или
+    `{"freq": "interval", "seconds": N}`.
+    """
+
+    freq: str
+    interval: int = 1
+    days: Tuple[int, ...] = ()
+    seconds: int = 0
+
+    @classmethod
+    def parse(cls, value: Union[str, Dict[str, Any], None]) -> Optional["RecurrenceRule"]:
+        """Разбирает поле `recurring`. Для разовых и неизвестных правил возвращает None."""
+        if isinstance(value, str):
+            if value == "weekdays":
+                return cls(freq="weekdays", days=WORKING_DAYS)
+            return cls(freq=value) if value in CALENDAR_FREQUENCIES else None
+
+        if isinstance(value, dict):
+            freq = value.get("freq")
+            if freq in CALENDAR_FREQUENCIES:
+                return cls(freq=freq, interval=max(int(value.get("interval", 1)), 1))
+            if freq == "weekdays":
+                days = tuple(sorted({int(day) % 7 for day in value.get("days", WORKING_DAYS)}))
+                return cls(freq=freq, days=days or WORKING_DAYS)
+            if freq == "interval" and int(value.get("seconds", 0)) > 0:
+                return cls(freq=freq, seconds=int(value["seconds"]))
+
+        return None
+
+
+def describe_recurrence(value: Union[str, Dict[str, Any], None]) -> str:
+    """Человекочитаемое описание правила повторения."""
+    rule = RecurrenceRule.parse(value)
+    if rule is None:
+        return "Однократно"
+    if rule.freq == "interval":
+        return f"Каждые {rule.seconds // 60} мин." if rule.seconds % 60 == 0 else f"Каждые {rule.seconds} с."
+    if rule.freq == "weekdays":
+        return FREQUENCY_NAMES["weekdays"] if rule.days == WORKING_DAYS else ", ".join(WEEKDAY_NAMES[day] for day in rule.days)
+    if rule.interval > 1:
+        return f"{FREQUENCY_NAMES[rule.freq]} (каждые {rule.interval})"
+    return FREQUENCY_NAMES[rule.freq]
+
+
+def localize(date: datetime, user_tz: pytz.BaseTzInfo) -> datetime:
+    """Переводит локальное (naive) время пользователя в UTC с учётом перехода на летнее время."""
+    return user_tz.normalize(user_tz.localize(date, is_dst=False)).astimezone(pytz.utc)
+
+
+def to_local(date: datetime, user_tz: pytz.BaseTzInfo) -> datetime:
+    """Приводит дату к naive-времени в часовом поясе пользователя."""
+    return date.astimezone(user_tz).replace(tzinfo=None) if date.tzinfo is not None else date
+
+
+def add_months(date: datetime, months: int, day: int) -> datetime:
+    """Сдвигает дату на `months` календарных месяцев, сохраняя день `day` (или последний день месяца)."""
+    month_index = date.month - 1 + months
+    year, month = date.year + month_index // 12, month_index % 12 + 1
+    return date.replace(year=year, month=month, day=min(day, calendar.monthrange(year, month)[1]))
+
+
+def next_occurrence(rule: RecurrenceRule, anchor: datetime, user_tz: pytz.BaseTzInfo, after: datetime) -> datetime:
+    """
+    Ближайшее срабатывание правила строго после `after`, вычисленное сразу (без перебора пропущенных).
+
+    `anchor` — первое срабатывание серии в локальном времени пользователя: от него
+    отсчитываются шаги, поэтому ежемесячные напоминания на 31-е не «съезжают» на 28-е.
+    Возвращает naive-время в часовом поясе пользователя.
+    """
+    now_local = after.astimezone(user_tz).replace(tzinfo=None)
+
+    if rule.freq == "interval":
+        # Интервальные правила считаются в абсолютном времени
+        anchor_utc = localize(anchor, user_tz)
+        if anchor_utc > after:
+            return anchor
+        step = timedelta(seconds=rule.seconds)
+        steps = (after - anchor_utc) // step + 1
+        return to_local(anchor_utc + steps * step, user_tz)
+
+    if anchor > now_local and rule.freq != "weekdays":
+        return anchor
+
+    if rule.freq in ("daily", "weekly"):
+        step = timedelta(days=rule.interval * (7 if rule.freq == "weekly" else 1))
+        return anchor + ((now_local - anchor) // step + 1) * step
+
+    if rule.freq == "monthly":
+        months = (now_local.year - anchor.year) * 12 + now_local.month - anchor.month
+        months -= months % rule.interval
+        candidate = add_months(anchor, months, anchor.day)
+        if candidate <= now_local:
+            candidate = add_months(anchor, months + rule.interval, anchor.day)
+        return candidate
+
+    # weekdays: ближайший подходящий день недели в то же время суток
+    base = max(anchor, now_local)
+    for offset in range(8):
+        candidate = datetime.combine(base.date() + timedelta(days=offset), anchor.time())
+        if candidate >= anchor and candidate > now_local and candidate.weekday() in rule.days:
+            return candidate
+    raise ValueError(f"Не удалось вычислить следующее срабатывание для {rule}")
+
+
+def advance(reminder: Dict[str, Any], user_tz: pytz.BaseTzInfo, now: datetime) -> Optional[Dict[str, Any]]:
+    """
+    Поля для переноса повторяющегося напоминания на ближайшее будущее срабатывание.
+
+    Сколько бы срабатываний ни было пропущено, результат — одно обновление `$set`.
+    Для разовых напоминаний возвращает None.
+    """
+    rule = RecurrenceRule.parse(reminder.get("recurring"))
+    if rule is None:
+        return None
+
+    anchor = to_local(reminder.get("recurrence_anchor") or reminder["date"], user_tz)
+    current = localize(to_local(reminder["date"], user_tz), user_tz)
+    next_date = next_occurrence(rule=rule, anchor=anchor, user_tz=user_tz, after=max(now, current))
+
+    return {
+        "date": next_date,
+        "fire_at": localize(next_date, user_tz),
+        "recurrence_anchor": anchor,
+    }
@@ -1,6 +1,6 @@
 from abc import ABC, abstractmethod
 from datetime import datetime, timedelta
-from typing import List, Dict, Any, Optional
+from typing import AsyncIterator, Iterable, List, Dict, Any, Optional, Tuple
 from aiogram.types import Message
 from motor.motor_asyncio import AsyncIOMotorCollection
 from pymongo.results import UpdateResult
@@ -9,12 +9,19 @@ import logging
 from bson import ObjectId
 import pytz
 
-from app.repositories.reminder_repository import IReminderRepository, MongoReminderRepository
+from app.repositories.reminder_repository import IReminderRepository, MongoReminderRepository, ReminderPage
+from app.repositories.reminder_state_writer import ReminderStateWriter
 
 
-from app.core.mongo_collections import users_collection
+from app.services.recurrence import advance
+from app.services.timezone_cache import get_tzinfo, user_timezone_cache
 
 
+def to_utc_fire_time(date: datetime, user_tz: pytz.BaseTzInfo) -> datetime:
+    """Нормализует время напоминания в UTC. `naive`-дата трактуется как время в часовом поясе пользователя."""
+    if date.tzinfo is None:
+        date = user_tz.localize(date)
+    return date.astimezone(tz=pytz.utc)
 
 
 class ReminderService:
@@ -25,9 +32,12 @@ class ReminderService:
 
 
     async def get_user_timezone(self, user_id: str) -> str:
-        """Получает часовой пояс пользователя из базы данных."""
-        user = await users_collection.find_one(filter={"user_id": user_id})
-        return user["timezone"] if user else "UTC"
+        """Получает часовой пояс пользователя (через кэш часовых поясов)."""
+        return await user_timezone_cache.get(user_id=user_id)
+
+    async def get_user_timezones(self, user_ids: Iterable[str]) -> Dict[str, str]:
+        """Получает часовые пояса пачки пользователей одним запросом на промахи кэша."""
+        return await user_timezone_cache.resolve_many(user_ids=user_ids)
     
     async def add_reminder(self, user_id: str, message: str, date: datetime, recurring: Optional[str], telegram_message: Message) -> Any:
         """Добавляет напоминание, проверяя, что дата не меньше текущего времени пользователя, без изменения пользовательского времени."""
@@ -35,7 +45,7 @@ class ReminderService:
         try:
             # Получаем часовой пояс пользователя
             user_timezone = await self.get_user_timezone(user_id=user_id)
-            user_tz: pytz._UTCclass | pytz.StaticTzInfo | pytz.DstTzInfo = pytz.timezone(zone=user_timezone)
+            user_tz: pytz.BaseTzInfo = get_tzinfo(zone=user_timezone)
 
             # Получаем текущее время в UTC и конвертируем в часовой пояс пользователя
             now: datetime = datetime.now(pytz.utc).astimezone(tz=user_tz)
@@ -43,7 +53,7 @@ class ReminderService:
 
             # Приводим оба значения к UTC для корректного сравнения
             now_utc: datetime = now.astimezone(tz=pytz.utc)
-            date_utc: datetime = date.astimezone(tz=pytz.utc)
+            date_utc: datetime = to_utc_fire_time(date=date, user_tz=user_tz)
 
             # Проверяем, что напоминание не создается в прошлом
             if date_utc < now_utc:
@@ -58,6 +68,7 @@ class ReminderService:
                 "message": message,
                 "date": date, 
                 "recurring": recurring,
+                "fire_at": date_utc,
             }
             await self._repository.create(data=reminder_data)
 
@@ -70,9 +81,20 @@ class ReminderService:
     async def get_all_reminders(self, user_id: str) -> List[Dict[str, Any]]:
         return await self._repository.get_all(user_id=user_id)
     
+    async def get_reminders_page(self, user_id: str, limit: int, cursor: Optional[Tuple[datetime, ObjectId]] = None, backward: bool = False) -> ReminderPage:
+        return await self._repository.get_page(user_id=user_id, limit=limit, cursor=cursor, backward=backward)
+
     async def mark_reminder_completed(self, user_id: str, reminder_id: str) -> bool:
         return await self._repository.mark_completed(user_id=user_id, reminder_id=reminder_id)
 
+    async def set_user_active(self, user_id: str, active: bool) -> int:
+        """Приостанавливает (active=False) или возобновляет отправку напоминаний пользователя."""
+        return await self._repository.set_user_active(user_id=user_id, active=active)
+
+    async def remove_all_reminders(self, user_id: str) -> int:
+        """Удаляет все активные напоминания пользователя. Возвращает число удалённых."""
+        return await self._repository.delete_all(user_id=user_id)
+
     async def remove_reminder(self, user_id: str, reminder_id: str) -> bool:
         return await self._repository.delete(user_id=user_id, reminder_id=reminder_id)
     
@@ -83,35 +105,66 @@ class ReminderService:
 class ReminderServiceNotificationMiddleware(ReminderService):
     """Расширенный сервис для управления напоминаниями."""
 
-    def __init__(self, repository: MongoReminderRepository) -> None:
+    def __init__(self, repository: MongoReminderRepository, state_writer: ReminderStateWriter) -> None:
         super().__init__(repository)
+        self._state_writer: ReminderStateWriter = state_writer
+
+    async def ensure_indexes(self) -> None:
+        """Создаёт индексы коллекции напоминаний (вызывается при старте бота)."""
+        await self._repository.ensure_indexes()
+
+    async def count_active_reminders(self) -> int:
+        """Число активных напоминаний (для метрик)."""
+        return await self._repository.count_active()
+
+    def iter_due_reminders(self, now: datetime, batch_size: int) -> AsyncIterator[List[Dict[str, Any]]]:
+        """Потоково отдаёт наступившие напоминания пачками по `batch_size`."""
+        return self._repository.iter_due(now=now, batch_size=batch_size)
+
+    async def claim_reminders(self, reminders: List[Dict[str, Any]], owner: str, now: datetime, lease: timedelta) -> List[Dict[str, Any]]:
+        """Оставляет только те напоминания, аренду которых получил этот экземпляр уведомителя."""
+        return await self._repository.claim(
+            reminder_ids=[reminder["_id"] for reminder in reminders],
+            owner=owner,
+            now=now,
+            lease_until=now + lease
+        )
 
-    async def get_all_active_reminders(self) -> List[Dict[str, Any]]:
-        """Получает ВСЕ активные напоминания (не завершенные)."""
-        return await self._repository._collection.find({"completed": False}).to_list(None)
-
-    async def move_to_next_occurrence(self, reminder_id: str, recurring: str) -> bool:
-        """Переносит повторяющееся напоминание на следующую дату без изменения времени."""
-        reminder = await self._repository._collection.find_one({"_id": ObjectId(oid=reminder_id)})
+    async def expire_confirmations(self, now: datetime) -> int:
+        """Автоматически завершает напоминания, которые не подтвердили вовремя."""
+        return await self._repository.expire_confirmations(now=now)
 
-        if not reminder or "date" not in reminder:
-            return False  # Если напоминание не найдено, выходим
+    async def next_occurrence(self, reminder: Dict[str, Any], now: datetime) -> Optional[Dict[str, Any]]:
+        """Вычисляет ближайшее будущее срабатывание повторяющегося напоминания (`date`, `fire_at`)."""
+        user_tz: pytz.BaseTzInfo = get_tzinfo(zone=await self.get_user_timezone(user_id=reminder["user_id"]))
+        return advance(reminder=reminder, user_tz=user_tz, now=now)
 
-        current_date = reminder["date"]
+    async def schedule_next_occurrence(self, reminder: Dict[str, Any], after: Optional[datetime] = None) -> bool:
+        """
+        Ставит перенос отправленного повторяющегося напоминания в буфер пакетной записи.
 
-        if recurring == "daily":
-            new_date = current_date + timedelta(days=1)
-        elif recurring == "weekly":
-            new_date = current_date + timedelta(weeks=1)
-        elif recurring == "monthly":
-            new_date = current_date + timedelta(weeks=4)
-        else:
+        По умолчанию напоминание переносится в будущее; с `after` — на первое срабатывание
+        после этого момента (так досылаются пропущенные повторы).
+        """
+        update = await self.next_occurrence(reminder=reminder, now=after or datetime.now(pytz.utc))
+        if update is None:
             return False
 
-        await self._repository._collection.update_one(
-            {"_id": ObjectId(reminder_id)},
-            {"$set": {"date": new_date}}
-        )
+        await self._state_writer.add(operation=self._repository.advance_operation(reminder_id=reminder["_id"], update=update))
+        self._repository._notify_scheduled(reminder={**reminder, **update})
         return True
-    
 
+    async def schedule_missed(self, reminder: Dict[str, Any], after: Optional[datetime] = None) -> None:
+        """Ставит в буфер пакетной записи пропуск напоминания без отправки (или после сводки)."""
+        if not await self.schedule_next_occurrence(reminder=reminder, after=after):
+            await self._state_writer.add(operation=self._repository.missed_operation(reminder_id=reminder["_id"]))
+
+    async def schedule_queued(self, reminder_id: str) -> None:
+        """Ставит в буфер пакетной записи отметку, что разовое напоминание ждёт отправки в outbox."""
+        await self._state_writer.add(operation=self._repository.queued_operation(reminder_id=reminder_id))
+
+    async def schedule_confirmation_timeout(self, reminder_id: str, expires_at: datetime) -> None:
+        """Ставит перевод разового напоминания в ожидание подтверждения в буфер пакетной записи."""
+        await self._state_writer.add(
+            operation=self._repository.awaiting_confirmation_operation(reminder_id=reminder_id, expires_at=expires_at)
+        )
@@ -0,0 +1,126 @@
+import asyncio
+import heapq
+import itertools
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytz
+
+
+def as_utc(date: datetime) -> datetime:
+    """MongoDB возвращает `naive`-даты в UTC — приводим их к `aware` для сравнения."""
+    return date.replace(tzinfo=pytz.utc) if date.tzinfo is None else date.astimezone(tz=pytz.utc)
+
+
+class ReminderScheduler:
+    """
+    Планировщик напоминаний в памяти.
+
+    Держит ближайшее окно напоминаний (fire_at <= horizon) в min-куче по времени
+    срабатывания и позволяет циклу уведомлений спать ровно до ближайшего срока.
+    Отменённые и перенесённые записи удаляются из кучи лениво.
+
+    Куча хранит не больше `max_size` напоминаний (0 — без ограничения): если места нет,
+    окно сужается до времени не поместившегося напоминания, и оно будет прочитано
+    из коллекции при следующей перезагрузке окна.
+    """
+
+    def __init__(self, window: timedelta, max_size: int = 0) -> None:
+        self.window: timedelta = window
+        self.max_size: int = max_size
+        self.horizon: Optional[datetime] = None
+        self._heap: List[Tuple[datetime, int, str]] = []
+        self._entries: Dict[str, Tuple[datetime, Dict[str, Any]]] = {}
+        self._counter = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def needs_reload(self, now: datetime) -> bool:
+        """Окно не загружено или уже исчерпано."""
+        return self.horizon is None or now >= self.horizon
+
+    def reset(self, horizon: datetime) -> None:
+        """Очищает кучу перед загрузкой нового окна; напоминания добавляются через `schedule`."""
+        self._heap.clear()
+        self._entries.clear()
+        self.horizon = as_utc(horizon)
+        self._wake()
+
+    def load(self, reminders: List[Dict[str, Any]], horizon: datetime) -> None:
+        """Полностью заменяет содержимое кучи напоминаниями из нового окна."""
+        self.reset(horizon=horizon)
+        for reminder in reminders:
+            self.schedule(reminder)
+
+    def schedule(self, reminder: Dict[str, Any]) -> None:
+        """Добавляет или переносит напоминание. Напоминания за пределами окна не хранятся."""
+        if self.horizon is None or not reminder.get("fire_at"):
+            return
+
+        reminder_id = str(reminder["_id"])
+        fire_at = as_utc(reminder["fire_at"])
+        if fire_at > self.horizon:
+            self.cancel(reminder_id)
+            return
+
+        if self.max_size and len(self._entries) >= self.max_size and reminder_id not in self._entries:
+            # Места нет: окно заканчивается на этом напоминании, всё, что позже, дочитается из БД
+            self.horizon = fire_at
+            self._wake()
+            return
+
+        self._entries[reminder_id] = (fire_at, reminder)
+        heapq.heappush(self._heap, (fire_at, next(self._counter), reminder_id))
+        self._wake()
+
+    def cancel(self, reminder_id: str) -> None:
+        """Отменяет напоминание (запись в куче станет устаревшей и будет пропущена)."""
+        if self._entries.pop(reminder_id, None) is not None:
+            self._wake()
+
+    def cancel_user(self, user_id: str) -> int:
+        """Отменяет все напоминания пользователя в окне. Возвращает число отменённых."""
+        reminder_ids = [reminder_id for reminder_id, (_, reminder) in self._entries.items() if reminder.get("user_id") == user_id]
+        for reminder_id in reminder_ids:
+            del self._entries[reminder_id]
+        if reminder_ids:
+            self._wake()
+        return len(reminder_ids)
+
+    def pop_due(self, now: datetime) -> List[Dict[str, Any]]:
+        """Извлекает все напоминания, время которых наступило."""
+        due: List[Dict[str, Any]] = []
+        while self._heap and self._heap[0][0] <= now:
+            fire_at, _, reminder_id = heapq.heappop(self._heap)
+            entry = self._entries.get(reminder_id)
+            if entry is not None and entry[0] == fire_at:
+                del self._entries[reminder_id]
+                due.append(entry[1])
+        return due
+
+    def next_fire_at(self) -> Optional[datetime]:
+        """Время ближайшего актуального напоминания в куче."""
+        while self._heap and self._entries.get(self._heap[0][2], (None,))[0] != self._heap[0][0]:
+            heapq.heappop(self._heap)
+        return self._heap[0][0] if self._heap else None
+
+    async def wait(self, now: datetime) -> None:
+        """Спит до ближайшего напоминания, конца окна или изменения расписания."""
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+
+        deadlines = [d for d in (self.next_fire_at(), self.horizon) if d is not None]
+        timeout = max((min(deadlines) - now).total_seconds(), 0) if deadlines else None
+
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+        finally:
+            self._wakeup.clear()
+
+    def _wake(self) -> None:
+        if self._wakeup is not None:
+            self._wakeup.set()
@@ -0,0 +1,96 @@
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Tuple
+
+import pytz
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from app.core.config import Settings, get_settings
+from app.core.mongo_collections import users_collection
+
+DEFAULT_TIMEZONE = "UTC"
+
+
+@lru_cache(maxsize=None)
+def get_tzinfo(zone: str) -> pytz.BaseTzInfo:
+    """Возвращает (и запоминает) объект часового пояса. Неизвестные пояса трактуются как UTC."""
+    try:
+        return pytz.timezone(zone)
+    except pytz.UnknownTimeZoneError:
+        return pytz.utc
+
+
+class UserTimezoneCache:
+    """
+    LRU+TTL кэш часовых поясов пользователей.
+
+    Промахи разрешаются одним запросом `$in` на пачку пользователей.
+    Репозиторий пользователей сбрасывает запись при смене часового пояса.
+    """
+
+    def __init__(self, collection: AsyncIOMotorCollection, maxsize: int, ttl: float, batch_size: int = 500) -> None:
+        self._collection = collection
+        self.maxsize: int = maxsize
+        self.ttl: float = ttl
+        self.batch_size: int = batch_size
+        self._entries: "OrderedDict[Any, Tuple[str, float]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def invalidate(self, user_id: Any) -> None:
+        """Удаляет пользователя из кэша (вызывается при изменении его данных)."""
+        self._entries.pop(user_id, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    async def get(self, user_id: Any) -> str:
+        """Часовой пояс одного пользователя."""
+        return (await self.resolve_many(user_ids=[user_id]))[user_id]
+
+    async def resolve_many(self, user_ids: Iterable[Any]) -> Dict[Any, str]:
+        """Часовые пояса пачки пользователей: попадания берутся из кэша, промахи — одним `$in` на пачку."""
+        result: Dict[Any, str] = {}
+        missing: List[Any] = []
+        now = time.monotonic()
+
+        for user_id in dict.fromkeys(user_ids):
+            entry = self._entries.get(user_id)
+            if entry is not None and entry[1] > now:
+                self._entries.move_to_end(user_id)
+                result[user_id] = entry[0]
+            else:
+                missing.append(user_id)
+
+        for start in range(0, len(missing), self.batch_size):
+            chunk = missing[start:start + self.batch_size]
+            found: Dict[Any, str] = {}
+            cursor = self._collection.find(
+                filter={"user_id": {"$in": chunk}},
+                projection={"_id": 0, "user_id": 1, "timezone": 1}
+            )
+            async for user in cursor:
+                found[user["user_id"]] = user.get("timezone") or DEFAULT_TIMEZONE
+
+            for user_id in chunk:
+                result[user_id] = found.get(user_id, DEFAULT_TIMEZONE)
+                self._put(user_id=user_id, timezone=result[user_id], now=now)
+
+        return result
+
+    def _put(self, user_id: Any, timezone: str, now: float) -> None:
+        self._entries[user_id] = (timezone, now + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+
+settings: Settings = get_settings()
+
+user_timezone_cache = UserTimezoneCache(
+    collection=users_collection,
+    maxsize=settings.TIMEZONE_CACHE_SIZE,
+    ttl=settings.TIMEZONE_CACHE_TTL_SECONDS,
+)
@@ -1,10 +1,14 @@
+import asyncio
 import os
 import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
 from motor.motor_asyncio import AsyncIOMotorClient
 from app.repositories.reminder_repository import MongoReminderRepository
 from app.services.remineder_service import ReminderService
 
 from app.core.config import get_settings
+from app.core.database import mongo_registry
 
 
 
@@ -14,10 +18,13 @@ settings = get_settings()
 
 @pytest.fixture(scope="function")
 async def test_db():
+    # Клиент создаётся в цикле событий теста и подставляется в общий реестр процесса
     client = AsyncIOMotorClient(settings.get_mongo_url())
+    mongo_registry.set_async_client(client)
     db = client[settings.get_database_name()]
     yield db
     await client.drop_database(settings.get_database_name())
+    mongo_registry.set_async_client(None)
     client.close()
 
 @pytest.fixture(scope="function")
@@ -30,4 +37,71 @@ async def reminder_repository(test_db):
 
 @pytest.fixture(scope="function")
 async def reminder_service(reminder_repository):
-    return ReminderService(repository=reminder_repository)
\ No newline at end of file
+    return ReminderService(repository=reminder_repository)
+
+
+class FakeCursor:
+    """Асинхронный курсор MongoDB поверх списка документов."""
+
+    def __init__(self, documents):
+        self._documents = iter(documents)
+
+    def sort(self, *args, **kwargs):
+        return self
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._documents)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+@pytest.fixture
+def make_cursor():
+    """Фабрика фейковых курсоров для моков `collection.find`."""
+    return FakeCursor
+
+
+class FakeTelegramAPI:
+    """Локальный заменитель Bot API: записывает вызовы методов и отвечает успехом."""
+
+    def __init__(self) -> None:
+        self.calls = []
+        self.delay = 0.0
+        self.base_url = ""
+        self.app = web.Application()
+        self.app.router.add_post("/bot{token}/{method}", self.handle)
+
+    async def handle(self, request: web.Request) -> web.Response:
+        method = request.match_info["method"]
+        params = dict(await request.post())
+        self.calls.append((method, params))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+
+        result = True
+        if method == "sendMessage":
+            result = {
+                "message_id": len(self.calls),
+                "date": 0,
+                "chat": {"id": int(params["chat_id"]), "type": "private"},
+                "text": params["text"],
+            }
+        return web.json_response({"ok": True, "result": result})
+
+    def methods(self):
+        return [method for method, _ in self.calls]
+
+
+@pytest.fixture
+async def fake_telegram():
+    """Заглушка Bot API на локальном порту; адрес — в `base_url`."""
+    fake = FakeTelegramAPI()
+    server = TestServer(fake.app)
+    await server.start_server()
+    fake.base_url = str(server.make_url("")).rstrip("/")
+    yield fake
+    await server.close()
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pymongo.errors import BulkWriteError, OperationFailure
+
+from app.repositories.reminder_archiver import ARCHIVE_MODE_ARCHIVE, ARCHIVE_MODE_TTL, ReminderArchiver
+
+NOW = datetime(2025, 6, 1, 12, 0)
+
+
+def make_archiver(batches, mode=ARCHIVE_MODE_ARCHIVE, batch_size=2):
+    collection = MagicMock()
+    collection.find = MagicMock(side_effect=[MagicMock(to_list=AsyncMock(return_value=batch)) for batch in batches])
+    collection.delete_many = AsyncMock(side_effect=[MagicMock(deleted_count=len(batch)) for batch in batches if batch])
+    collection.create_index = AsyncMock()
+    archive = MagicMock(insert_many=AsyncMock())
+    archiver = ReminderArchiver(
+        collection=collection,
+        archive_collection=archive,
+        mode=mode,
+        max_age=timedelta(days=30),
+        batch_size=batch_size,
+        pause=0,
+    )
+    return archiver, collection, archive
+
+
+@pytest.mark.asyncio
+async def test_run_once_moves_completed_reminders_in_batches():
+    batches = [[{"_id": 1}, {"_id": 2}], [{"_id": 3}]]
+    archiver, collection, archive = make_archiver(batches=batches)
+
+    assert await archiver.run_once(now=NOW) == 3
+
+    assert archive.insert_many.await_count == 2
+    assert collection.find.call_args.kwargs["filter"] == {"completed": True, "completed_at": {"$lte": NOW - timedelta(days=30)}}
+    collection.delete_many.assert_awaited_with(filter={"_id": {"$in": [3]}, "completed": True})
+
+
+@pytest.mark.asyncio
+async def test_already_archived_reminders_are_still_deleted():
+    """Повтор после сбоя между вставкой и удалением: дубликаты в архиве не мешают удалению."""
+    archiver, collection, archive = make_archiver(batches=[[{"_id": 1}]])
+    archive.insert_many = AsyncMock(side_effect=BulkWriteError({"writeErrors": [{"code": 11000}]}))
+
+    assert await archiver.archive_batch(now=NOW) == 1
+    collection.delete_many.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_ttl_mode_creates_partial_ttl_index_and_skips_archiving():
+    archiver, collection, archive = make_archiver(batches=[], mode=ARCHIVE_MODE_TTL)
+
+    await archiver.ensure_indexes()
+
+    kwargs = collection.create_index.call_args.kwargs
+    assert kwargs["expireAfterSeconds"] == 30 * 24 * 3600
+    assert kwargs["partialFilterExpression"] == {"completed": True}
+    assert await archiver.run_once(now=NOW) == 0
+    collection.find.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_ttl_mode_updates_index_when_max_age_changes():
+    """Новый ARCHIVE_AFTER_DAYS применяется к существующему TTL-индексу через collMod."""
+    archiver, collection, _ = make_archiver(batches=[], mode=ARCHIVE_MODE_TTL)
+    collection.name = "notifications"
+    collection.create_index = AsyncMock(side_effect=OperationFailure("Index already exists with different options", code=85))
+    collection.database.command = AsyncMock()
+
+    await archiver.ensure_indexes()
+
+    collection.database.command.assert_awaited_once_with(
+        "collMod", "notifications", index={"name": "completed_at_ttl", "expireAfterSeconds": 30 * 24 * 3600}
+    )
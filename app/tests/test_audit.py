@@ -0,0 +1,99 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import OperationFailure
+
+from app.repositories.audit_writer import AUDIT_DELETED, AuditEventWriter
+from app.repositories.reminder_repository import MongoReminderRepository
+
+
+def make_collection():
+    collection = MagicMock()
+    collection.insert_many = AsyncMock(side_effect=lambda events, ordered: MagicMock(inserted_ids=list(range(len(events)))))
+    return collection
+
+
+@pytest.mark.asyncio
+async def test_events_are_buffered_and_written_in_batches():
+    collection = make_collection()
+    writer = AuditEventWriter(collection=collection, max_events=3, flush_interval=60)
+
+    for index in range(7):
+        await writer.record(event="fired", user_id="1", reminder_id=index)
+
+    # Две полные пачки записаны сразу, последняя ждёт интервала
+    assert collection.insert_many.await_count == 2
+    assert len(writer) == 1
+
+    await writer.close()
+
+    assert writer.written == 7
+    event = collection.insert_many.call_args.args[0][0]
+    assert (event["event"], event["user_id"], event["reminder_id"]) == ("fired", "1", "6")
+    assert "timestamp" in event
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_events():
+    collection = MagicMock()
+    collection.insert_many = AsyncMock(side_effect=RuntimeError("no mongo"))
+    writer = AuditEventWriter(collection=collection, max_events=10, flush_interval=60)
+    await writer.record(event="created", user_id="1")
+
+    with pytest.raises(RuntimeError):
+        await writer.flush()
+
+    assert len(writer) == 1
+
+
+@pytest.mark.asyncio
+async def test_buffer_is_capped_while_mongo_is_down():
+    """Во время недоступности MongoDB буфер событий не растёт сверх лимита, выброшенное считается."""
+    collection = MagicMock()
+    collection.insert_many = AsyncMock(side_effect=ConnectionError("down"))
+    writer = AuditEventWriter(collection=collection, max_events=10, flush_interval=60, max_buffered=25)
+
+    for index in range(100):
+        try:
+            await writer.record(event="fired", user_id="1", reminder_id=index)
+        except ConnectionError:
+            pass
+
+    assert len(writer) == 25
+    assert writer.stats()["dropped"] == 75
+    # Выбрасываются самые старые события
+    assert writer._items[-1]["reminder_id"] == "99"
+
+
+@pytest.mark.asyncio
+async def test_delete_writes_audit_event_not_notification_document():
+    """Удаление напоминания больше не пишет служебный документ в коллекцию напоминаний."""
+    collection = AsyncMock(spec=AsyncIOMotorCollection)
+    collection.delete_one = AsyncMock(return_value=MagicMock(deleted_count=1))
+    audit = MagicMock(record=AsyncMock())
+    repository = MongoReminderRepository(collection, audit=audit)
+    reminder_id = str(ObjectId())
+
+    assert await repository.delete(user_id="1", reminder_id=reminder_id)
+
+    collection.insert_one.assert_not_called()
+    audit.record.assert_awaited_once_with(event=AUDIT_DELETED, user_id="1", reminder_id=reminder_id)
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_updates_ttl_when_retention_changes():
+    """Новый AUDIT_RETENTION_DAYS применяется к существующему TTL-индексу через collMod."""
+    collection = make_collection()
+    collection.name = "audit"
+    collection.create_index = AsyncMock(side_effect=[OperationFailure("Index already exists with different options", code=85), "user_timestamp"])
+    collection.database.command = AsyncMock()
+    writer = AuditEventWriter(collection=collection, max_events=10, flush_interval=60)
+
+    await writer.ensure_indexes(retention_seconds=30 * 24 * 3600)
+
+    collection.database.command.assert_awaited_once_with(
+        "collMod", "audit", index={"name": "timestamp_ttl", "expireAfterSeconds": 30 * 24 * 3600}
+    )
+    assert collection.create_index.await_count == 2
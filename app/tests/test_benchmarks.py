@@ -0,0 +1,51 @@
+import pytest
+
+from app.bot import middleware
+from app.core.config import get_settings
+from app.core.metrics import SWEEP_DURATION
+from app.services import remineder_service
+from benchmarks.run import compare, memory_collections, seed_memory
+from benchmarks.scheduler import run_scheduler
+from benchmarks.sweep import run_sweep
+
+
+NOTIFIER_GLOBALS = ("reminder_middleware_notification", "reminder_state_writer", "audit_writer", "reminder_scheduler")
+
+
+@pytest.mark.asyncio
+async def test_sweep_benchmark_sends_every_seeded_reminder():
+    collections = memory_collections()
+
+    async def seed(users, reminders):
+        await seed_memory(collections=collections, users=users, reminders=reminders)
+
+    settings = get_settings()
+    before = settings.model_dump()
+    scheduled_batches = SWEEP_DURATION.count(source="scheduler")
+    notifier_globals = [getattr(middleware, name) for name in NOTIFIER_GLOBALS]
+    timezone_cache = remineder_service.user_timezone_cache
+
+    result = await run_sweep(collections=collections, seed=seed, users=5, reminders=40, repeat=1)
+
+    assert result["sent"] == 40
+    # Замер работает с копией настроек и не меняет общие
+    assert settings.model_dump() == before
+    # Зависимости бота после замера прежние
+    assert [getattr(middleware, name) for name in NOTIFIER_GLOBALS] == notifier_globals
+    assert remineder_service.user_timezone_cache is timezone_cache
+    # Напоминания отправляются из кучи планировщика (pop_due), а не как просроченные при перезагрузке
+    assert SWEEP_DURATION.count(source="scheduler") - scheduled_batches >= 2
+    assert result["reminders_per_second"] > 0
+    # Пачка напоминаний обходится фиксированным числом запросов, а не запросом на напоминание
+    assert result["round_trips_per_reminder"] < 1
+    assert result["peak_memory_mb"] > 0
+
+
+def test_scheduler_benchmark_and_comparison():
+    result = run_scheduler(users=3, reminders=50, repeat=1)
+    previous = {"results": [{**result, "reminders_per_second": result["reminders_per_second"] * 2}]}
+
+    lines = compare(current={"results": [result]}, previous=previous)
+
+    assert len(lines) == 1
+    assert lines[0].startswith("scheduler.reminders_per_second") and "-50.0%" in lines[0]
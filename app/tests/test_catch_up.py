@@ -0,0 +1,163 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytz
+from bson import ObjectId
+
+from app.bot import middleware
+from app.bot.middleware import ReminderNotifier
+from app.core.config import get_settings
+from app.repositories.audit_writer import AUDIT_SKIPPED
+from app.services.catch_up import (
+    CATCH_UP_ALL,
+    CATCH_UP_DIGEST,
+    CATCH_UP_LATEST,
+    DIGEST_MAX_ITEMS,
+    MESSAGE_MAX_LENGTH,
+    CatchUpPolicy,
+    format_digest,
+)
+from app.services.recurrence import advance
+
+NOW = datetime.now(pytz.utc).replace(microsecond=0)
+
+
+def make_reminder(user_id="1", hours_late=0.0, recurring=None, message="test"):
+    fire_at = NOW - timedelta(hours=hours_late)
+    return {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "date": fire_at.replace(tzinfo=None),
+        "fire_at": fire_at.replace(tzinfo=None),
+        "recurring": recurring,
+        "message": message,
+    }
+
+
+def make_policy(mode, max_staleness_hours=24):
+    return CatchUpPolicy(mode=mode, grace=timedelta(minutes=5), max_staleness=timedelta(hours=max_staleness_hours))
+
+
+@pytest.fixture
+def notification_service(monkeypatch):
+    service = MagicMock()
+    service.get_user_timezones = AsyncMock(side_effect=lambda user_ids: {user_id: "UTC" for user_id in user_ids})
+    service.claim_reminders = AsyncMock(side_effect=lambda reminders, **kwargs: reminders)
+    service.schedule_confirmation_timeout = AsyncMock()
+    service.schedule_next_occurrence = AsyncMock(return_value=True)
+    service.schedule_missed = AsyncMock()
+    monkeypatch.setattr(middleware, "reminder_middleware_notification", service)
+    monkeypatch.setattr(middleware, "reminder_state_writer", MagicMock(flush=AsyncMock(), close=AsyncMock()))
+    monkeypatch.setattr(middleware, "audit_writer", MagicMock(record=AsyncMock()))
+    monkeypatch.setattr(get_settings(), "OUTBOX_ENABLED", False)
+    return service
+
+
+def make_notifier(mode):
+    bot = MagicMock()
+    bot.send_message = AsyncMock()
+    notifier = ReminderNotifier(bot=bot)
+    notifier.catch_up = make_policy(mode)
+    return notifier
+
+
+def test_stale_reminders_are_not_sent_under_any_policy():
+    """После простоя дольше max_staleness напоминания не отправляются."""
+    reminders = [make_reminder(hours_late=30), make_reminder(hours_late=3)]
+
+    for mode in (CATCH_UP_ALL, CATCH_UP_LATEST, CATCH_UP_DIGEST):
+        plan = make_policy(mode).plan(reminders=reminders, now=NOW)
+        assert plan.stale == reminders[:1]
+
+
+def test_digest_groups_overdue_reminders_per_user():
+    """После многочасового простоя пропущенные напоминания сворачиваются в сводку на пользователя."""
+    missed = [make_reminder(user_id="1", hours_late=hours, message=f"m{hours}") for hours in (1, 2, 3)]
+    single = make_reminder(user_id="2", hours_late=4)
+    on_time = make_reminder(user_id="1", hours_late=0.01)
+
+    plan = make_policy(CATCH_UP_DIGEST).plan(reminders=[*missed, single, on_time], now=NOW)
+
+    assert plan.digests == {"1": missed}
+    assert plan.send == [on_time, single]
+    assert plan.stale == []
+
+
+def test_digest_of_long_messages_fits_telegram_limit():
+    """Сводка из длинных сообщений укладывается в лимит длины сообщения Telegram."""
+    reminders = [make_reminder(hours_late=hours, message="x" * 4000) for hours in range(1, 30)]
+
+    text = format_digest(reminders=reminders)
+
+    assert len(text) <= MESSAGE_MAX_LENGTH
+    assert text.endswith(f"…и ещё {29 - DIGEST_MAX_ITEMS}")
+    assert all(len(line) < 200 for line in text.splitlines())
+
+
+@pytest.mark.asyncio
+async def test_notifier_sends_one_digest_after_outage(notification_service):
+    notifier = make_notifier(CATCH_UP_DIGEST)
+    reminders = [make_reminder(hours_late=hours, message=f"m{hours}") for hours in (1, 2, 3, 5)]
+
+    await notifier.send_reminders(reminders=reminders)
+
+    notifier.bot.send_message.assert_awaited_once()
+    text = notifier.bot.send_message.call_args.kwargs["text"]
+    assert "4" in text and "m5" in text
+    assert notification_service.schedule_missed.await_count == 4
+    notification_service.schedule_confirmation_timeout.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_notifier_skips_stale_reminders(notification_service):
+    notifier = make_notifier(CATCH_UP_LATEST)
+    stale = make_reminder(hours_late=48, recurring="daily")
+
+    await notifier.send_reminders(reminders=[stale])
+
+    notifier.bot.send_message.assert_not_awaited()
+    notification_service.schedule_missed.assert_awaited_once_with(reminder=stale, after=None)
+    # Каждое пропущенное без отправки напоминание оставляет событие аудита
+    middleware.audit_writer.record.assert_awaited_once_with(
+        event=AUDIT_SKIPPED, user_id=stale["user_id"], reminder_id=stale["_id"], fire_at=stale["fire_at"]
+    )
+
+
+@pytest.mark.asyncio
+async def test_default_policy_still_sends_old_one_shot_reminders(notification_service):
+    """По умолчанию (без MAX_STALENESS) давно просроченное разовое напоминание отправляется, как раньше."""
+    bot = MagicMock()
+    bot.send_message = AsyncMock()
+    notifier = ReminderNotifier(bot=bot)
+    reminder = make_reminder(hours_late=24 * 7)
+
+    await notifier.send_reminders(reminders=[reminder])
+
+    bot.send_message.assert_awaited_once()
+    notification_service.schedule_missed.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_latest_policy_moves_series_to_future(notification_service):
+    """Политика latest: одно сообщение на серию, затем перенос в будущее."""
+    notifier = make_notifier(CATCH_UP_LATEST)
+    reminder = make_reminder(hours_late=6, recurring={"freq": "interval", "seconds": 3600})
+
+    await notifier.send_reminders(reminders=[reminder])
+
+    notifier.bot.send_message.assert_awaited_once()
+    notification_service.schedule_next_occurrence.assert_awaited_once_with(reminder=reminder, after=None)
+
+
+@pytest.mark.asyncio
+async def test_all_policy_replays_missed_occurrences(notification_service):
+    """Политика all: серия переносится на следующее пропущенное срабатывание, а не в будущее."""
+    notifier = make_notifier(CATCH_UP_ALL)
+    reminder = make_reminder(hours_late=6, recurring={"freq": "interval", "seconds": 3600})
+
+    await notifier.send_reminders(reminders=[reminder])
+
+    after = notification_service.schedule_next_occurrence.call_args.kwargs["after"]
+    update = advance(reminder=reminder, user_tz=pytz.utc, now=after)
+    assert update["fire_at"] == NOW - timedelta(hours=5)
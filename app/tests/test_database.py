@@ -0,0 +1,69 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from app.core.config import Settings, get_settings
+from app.core.database import MongoClientRegistry, get_mongo, mongo_registry
+from app.core.mongo_collections import notification_collection
+from app.repositories.reminder_repository import MongoReminderRepository
+
+
+def test_settings_are_parsed_once():
+    """Конфигурация читается один раз на процесс."""
+    assert get_settings() is get_settings()
+
+
+def test_client_options_come_from_settings():
+    """Параметры пула соединений берутся из настроек, сжатие — только если задано."""
+    settings: Settings = get_settings().model_copy(update={"MONGO_MAX_POOL_SIZE": 7, "MONGO_COMPRESSORS": "zlib"})
+
+    options = settings.get_mongo_client_options()
+
+    assert options["maxPoolSize"] == 7
+    assert options["compressors"] == "zlib"
+    assert "compressors" not in get_settings().model_copy(update={"MONGO_COMPRESSORS": ""}).get_mongo_client_options()
+
+
+def test_registry_creates_clients_lazily_and_shares_them():
+    """Реестр создаёт по одному клиенту на процесс только при первом обращении."""
+    registry = MongoClientRegistry()
+    assert registry._async_client is None
+
+    client = registry.get_async_client()
+
+    assert registry.get_async_client() is client
+    assert client.options.pool_options.max_pool_size == get_settings().MONGO_MAX_POOL_SIZE
+    registry.close()
+    assert registry._async_client is None
+
+
+def test_tests_can_swap_in_their_own_client():
+    """Подставленный клиент используется при получении коллекций."""
+    client = MagicMock()
+    previous = mongo_registry._async_client
+    mongo_registry.set_async_client(client)
+    try:
+        assert get_mongo()["client"] is client
+    finally:
+        mongo_registry.set_async_client(previous)
+
+
+@pytest.mark.asyncio
+async def test_repositories_follow_a_swapped_client():
+    """Репозиторий на общей коллекции после подмены клиента обращается к новому клиенту."""
+    first, second = MagicMock(), MagicMock()
+    for client, count in ((first, 1), (second, 2)):
+        client.__getitem__.return_value.__getitem__.return_value.count_documents = AsyncMock(return_value=count)
+    repository = MongoReminderRepository(collection=notification_collection)
+    previous = mongo_registry._async_client
+    try:
+        mongo_registry.set_async_client(first)
+        assert await repository.count_active() == 1
+
+        mongo_registry.set_async_client(second)
+        assert await repository.count_active() == 2
+    finally:
+        mongo_registry.set_async_client(previous)
+
+    second.__getitem__.assert_called_with(get_settings().get_database_name())
+    second.__getitem__.return_value.__getitem__.assert_called_with(get_settings().get_notifications_collection())
@@ -0,0 +1,102 @@
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError, TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from app.bot.delivery import DeliveryEngine, DeliveryJob, TokenBucket, is_undeliverable
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_rate():
+    """После исчерпания всплеска токены выдаются не быстрее `rate` в секунду."""
+    bucket = TokenBucket(rate=50, capacity=1)
+
+    started = time.monotonic()
+    for _ in range(6):
+        await bucket.acquire()
+
+    assert time.monotonic() - started >= 5 / 50 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_engine_sends_concurrently_and_runs_callbacks():
+    """Все задания отправляются, а действие после доставки выполняется для каждого."""
+    bot = MagicMock()
+    bot.send_message = AsyncMock()
+    engine = DeliveryEngine(bot=bot, workers=4, global_rate=1000, per_chat_rate=1000, queue_size=100)
+    on_sent = AsyncMock()
+
+    for chat_id in range(20):
+        await engine.submit(job=DeliveryJob(chat_id=chat_id, text="test", on_sent=on_sent))
+    await engine.close()
+
+    assert bot.send_message.await_count == 20
+    assert on_sent.await_count == 20
+    assert engine.stats()["sent"] == 20
+
+
+@pytest.mark.asyncio
+async def test_engine_retries_after_flood_control():
+    """TelegramRetryAfter приостанавливает отправку и повторяет сообщение, а не теряет его."""
+    bot = MagicMock()
+    method = SendMessage(chat_id=1, text="test")
+    bot.send_message = AsyncMock(side_effect=[TelegramRetryAfter(method=method, message="flood", retry_after=0), None])
+    engine = DeliveryEngine(bot=bot, workers=1, global_rate=1000, per_chat_rate=1000, queue_size=10)
+
+    await engine.submit(job=DeliveryJob(chat_id=1, text="test"))
+    await engine.close()
+
+    stats = engine.stats()
+    assert (stats["sent"], stats["retried"], stats["failed"]) == (1, 1, 0)
+
+
+@pytest.mark.asyncio
+async def test_engine_failure_does_not_stop_other_jobs():
+    """Ошибка отправки в один чат не прерывает доставку остальным."""
+    bot = MagicMock()
+    bot.send_message = AsyncMock(side_effect=[RuntimeError("boom"), None, None])
+    engine = DeliveryEngine(bot=bot, workers=1, global_rate=1000, per_chat_rate=1000, queue_size=10)
+
+    for chat_id in range(3):
+        await engine.submit(job=DeliveryJob(chat_id=chat_id, text="test"))
+    await engine.close()
+
+    assert (engine.sent, engine.failed) == (2, 1)
+
+
+def test_undeliverable_errors_are_classified():
+    method = SendMessage(chat_id=1, text="test")
+
+    assert is_undeliverable(TelegramForbiddenError(method=method, message="Forbidden: bot was blocked by the user"))
+    assert is_undeliverable(TelegramBadRequest(method=method, message="Bad Request: chat not found"))
+    assert not is_undeliverable(TelegramBadRequest(method=method, message="Bad Request: message is too long"))
+    assert not is_undeliverable(RuntimeError("network"))
+
+
+@pytest.mark.asyncio
+async def test_engine_suppresses_blocked_chat_once():
+    """Заблокировавший бота чат отключается один раз, остальные сообщения в него не отправляются."""
+    method = SendMessage(chat_id=1, text="test")
+    blocked = TelegramForbiddenError(method=method, message="Forbidden: bot was blocked by the user")
+
+    async def send_message(chat_id, **kwargs):
+        if chat_id == "blocked":
+            raise blocked
+
+    bot = MagicMock(send_message=AsyncMock(side_effect=send_message))
+    on_undeliverable = AsyncMock()
+    on_failed = AsyncMock()
+    engine = DeliveryEngine(
+        bot=bot, workers=1, global_rate=1000, per_chat_rate=1000, queue_size=10, on_undeliverable=on_undeliverable
+    )
+
+    for chat_id in ("blocked", "blocked", "blocked", "ok"):
+        await engine.submit(job=DeliveryJob(chat_id=chat_id, text="test", on_failed=on_failed))
+    await engine.close()
+
+    on_undeliverable.assert_awaited_once_with("blocked", blocked)
+    assert bot.send_message.await_count == 2
+    assert on_failed.await_count == 3
+    assert (engine.sent, engine.undeliverable) == (1, 1)
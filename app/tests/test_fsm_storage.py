@@ -0,0 +1,133 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from aiogram.fsm.storage.base import StorageKey
+from aiogram.fsm.storage.memory import MemoryStorage
+from pymongo.errors import OperationFailure
+
+from app.bot.fsm_storage import MongoFSMStorage, create_fsm_storage
+from app.bot.handlers.reminders import ReminderState
+from app.core.config import get_settings
+
+KEY = StorageKey(bot_id=1, chat_id=42, user_id=42)
+
+
+def make_storage(document=None, cache_size=100):
+    collection = MagicMock()
+    collection.find_one = AsyncMock(return_value=document)
+    collection.update_one = AsyncMock()
+    collection.create_index = AsyncMock()
+    return MongoFSMStorage(collection=collection, cache_size=cache_size, cache_ttl=60), collection
+
+
+@pytest.mark.asyncio
+async def test_dialog_step_costs_one_write_and_no_read():
+    storage, collection = make_storage(document={"_id": "fsm:42:42", "state": None, "data": {}})
+
+    # Первое обращение читает документ, дальше всё берётся из кэша
+    assert await storage.get_state(key=KEY) is None
+    await storage.update_data(key=KEY, data={"text": "Позвонить"})
+    await storage.set_state(key=KEY, state=ReminderState.waiting_for_date)
+
+    assert collection.find_one.await_count == 1
+    assert collection.update_one.await_count == 2
+    assert await storage.get_state(key=KEY) == ReminderState.waiting_for_date.state
+    assert await storage.get_data(key=KEY) == {"text": "Позвонить"}
+    assert collection.find_one.await_count == 1
+
+    update = collection.update_one.call_args.kwargs
+    assert update["filter"] == {"_id": "fsm:42:42"}
+    assert update["update"]["$set"]["state"] == ReminderState.waiting_for_date.state
+    assert update["upsert"] is True
+
+
+@pytest.mark.asyncio
+async def test_state_survives_restart_through_mongo():
+    storage, collection = make_storage(document={"state": "ReminderState:waiting_for_date", "data": {"text": "Позвонить"}})
+
+    assert await storage.get_state(key=KEY) == "ReminderState:waiting_for_date"
+    assert await storage.get_data(key=KEY) == {"text": "Позвонить"}
+    collection.find_one.assert_awaited_once_with(filter={"_id": "fsm:42:42"})
+
+
+@pytest.mark.asyncio
+async def test_write_without_cached_entry_forces_read():
+    storage, collection = make_storage(document={"state": "ReminderState:waiting_for_text", "data": {"a": 1}})
+
+    await storage.set_state(key=KEY, state="ReminderState:waiting_for_text")
+    await storage.get_data(key=KEY)
+
+    collection.find_one.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_get_data_returns_copy():
+    storage, _ = make_storage(document={"state": None, "data": {"items": [1]}})
+
+    data = await storage.get_data(key=KEY)
+    data["items"].append(2)
+
+    assert await storage.get_data(key=KEY) == {"items": [1]}
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_creates_ttl():
+    storage, collection = make_storage()
+
+    await storage.ensure_indexes(ttl_seconds=3600)
+
+    collection.create_index.assert_awaited_once_with(
+        keys=[("updated_at", 1)], name="updated_at_ttl", expireAfterSeconds=3600
+    )
+
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_updates_ttl_when_setting_changes():
+    """Новый срок хранения диалогов применяется к существующему TTL-индексу через collMod."""
+    storage, collection = make_storage()
+    collection.name = "fsm"
+    collection.create_index = AsyncMock(side_effect=OperationFailure("Index already exists with different options", code=85))
+    collection.database.command = AsyncMock()
+
+    await storage.ensure_indexes(ttl_seconds=600)
+
+    collection.database.command.assert_awaited_once_with("collMod", "fsm", index={"name": "updated_at_ttl", "expireAfterSeconds": 600})
+
+
+def test_storage_is_selected_by_settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "FSM_STORAGE", "memory")
+    assert isinstance(create_fsm_storage(settings=settings, collection=MagicMock()), MemoryStorage)
+
+    monkeypatch.setattr(settings, "FSM_STORAGE", "mongo")
+    assert isinstance(create_fsm_storage(settings=settings, collection=MagicMock()), MongoFSMStorage)
+
+
+def test_cache_is_off_by_default_behind_webhook(monkeypatch):
+    """За вебхуком обновления чата приходят в разные экземпляры — кэш по умолчанию выключен."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "FSM_STORAGE", "mongo")
+    monkeypatch.setattr(settings, "FSM_CACHE_SIZE", None)
+
+    monkeypatch.setattr(settings, "BOT_MODE", "webhook")
+    assert create_fsm_storage(settings=settings, collection=MagicMock()).cache_size == 0
+
+    monkeypatch.setattr(settings, "BOT_MODE", "polling")
+    assert create_fsm_storage(settings=settings, collection=MagicMock()).cache_size > 0
+
+    # Явная настройка (например, единственный экземпляр за вебхуком) сильнее умолчания
+    monkeypatch.setattr(settings, "BOT_MODE", "webhook")
+    monkeypatch.setattr(settings, "FSM_CACHE_SIZE", 500)
+    assert create_fsm_storage(settings=settings, collection=MagicMock()).cache_size == 500
+
+
+@pytest.mark.asyncio
+async def test_storage_without_cache_reads_state_written_by_another_instance():
+    """Без кэша каждый экземпляр видит последнее состояние диалога из MongoDB."""
+    storage, collection = make_storage(document={"state": "ReminderState:waiting_for_text", "data": {}}, cache_size=0)
+
+    assert await storage.get_state(key=KEY) == "ReminderState:waiting_for_text"
+    collection.find_one.return_value = {"state": "ReminderState:waiting_for_date", "data": {}}
+
+    assert await storage.get_state(key=KEY) == "ReminderState:waiting_for_date"
@@ -0,0 +1,93 @@
+import asyncio
+import multiprocessing
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytz
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
+
+from app.core.config import get_settings
+from app.repositories.reminder_repository import MongoReminderRepository
+
+settings = get_settings()
+
+LEASE_TEST_COLLECTION = "notifications_lease_test"
+
+
+def mongo_available() -> bool:
+    try:
+        MongoClient(settings.get_mongo_url(), serverSelectionTimeoutMS=500).admin.command("ping")
+        return True
+    except PyMongoError:
+        return False
+
+
+@pytest.mark.asyncio
+async def test_claim_only_takes_free_due_reminders():
+    """Аренда берётся одним update_many только на наступившие и не занятые напоминания."""
+    collection = MagicMock()
+    collection.update_many = AsyncMock()
+    collection.find.return_value.to_list = AsyncMock(return_value=[])
+    repository = MongoReminderRepository(collection)
+    now = datetime.now(pytz.utc)
+    reminder_id = ObjectId()
+
+    await repository.claim(reminder_ids=[reminder_id], owner="a", now=now, lease_until=now + timedelta(minutes=1))
+
+    filter_ = collection.update_many.call_args.kwargs["filter"]
+    assert filter_["_id"] == {"$in": [reminder_id]}
+    assert filter_["fire_at"] == {"$lte": now}
+    assert filter_["lease_until"] == {"$not": {"$gt": now}}
+    token = collection.update_many.call_args.kwargs["update"]["$set"]["lease_token"]
+    # Чтение взятых напоминаний идёт по индексу `_id`, а не перебором коллекции
+    assert collection.find.call_args.kwargs["filter"] == {"_id": {"$in": [reminder_id]}, "lease_token": token}
+
+
+def _claim_worker(owner: str, results) -> None:
+    """Отдельный процесс-уведомитель: забирает в аренду всё, что успеет."""
+    async def run():
+        client = AsyncIOMotorClient(settings.get_mongo_url())
+        repository = MongoReminderRepository(client[settings.get_database_name()][LEASE_TEST_COLLECTION])
+        claimed = []
+        while True:
+            now = datetime.now(pytz.utc)
+            taken = []
+            async for batch in repository.iter_due(now=now, batch_size=50):
+                taken += await repository.claim(
+                    reminder_ids=[r["_id"] for r in batch], owner=owner, now=now, lease_until=now + timedelta(minutes=5)
+                )
+            if not taken:
+                break
+            claimed += [str(r["_id"]) for r in taken]
+        client.close()
+        return claimed
+
+    results.put(asyncio.run(run()))
+
+
+@pytest.mark.skipif(not mongo_available(), reason="нужен локальный mongod")
+def test_several_processes_claim_each_reminder_exactly_once():
+    """Несколько процессов-уведомителей делят напоминания без пересечений."""
+    collection = MongoClient(settings.get_mongo_url())[settings.get_database_name()][LEASE_TEST_COLLECTION]
+    collection.drop()
+    past = datetime.now(pytz.utc) - timedelta(minutes=1)
+    ids = collection.insert_many([
+        {"user_id": str(i % 7), "message": "test", "date": past, "fire_at": past, "recurring": None, "completed": False}
+        for i in range(500)
+    ]).inserted_ids
+
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    processes = [context.Process(target=_claim_worker, args=(f"node-{i}", results)) for i in range(4)]
+    for process in processes:
+        process.start()
+    claimed = [reminder_id for _ in processes for reminder_id in results.get(timeout=60)]
+    for process in processes:
+        process.join()
+    collection.drop()
+
+    assert len(claimed) == len(set(claimed)) == len(ids)
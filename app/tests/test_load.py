@@ -0,0 +1,51 @@
+import pytest
+from aiogram.fsm.storage.memory import MemoryStorage
+
+from app.bot.handlers import reminders, start
+from app.core.config import get_settings
+from app.repositories import reminder_repository
+from app.services import remineder_service
+from benchmarks.load import bind_handlers, build_dispatcher, percentile, run_load
+from benchmarks.run import memory_collections
+
+
+def handler_globals():
+    return [
+        start.user_service,
+        start.reminder_notification,
+        reminders.reminder_notification,
+        remineder_service.user_timezone_cache,
+        reminder_repository.user_timezone_cache,
+    ]
+
+
+@pytest.mark.asyncio
+async def test_load_scenarios_go_through_real_handlers():
+    collections = memory_collections()
+    dispatcher = build_dispatcher(storage=MemoryStorage())
+    before = handler_globals()
+
+    with bind_handlers(collections=collections, settings=get_settings()):
+        assert handler_globals() != before
+        result = await run_load(dispatcher=dispatcher, users=4, concurrency=2, reminders_per_user=2)
+
+    # После прогона хэндлеры снова работают с зависимостями бота
+    assert handler_globals() == before
+
+    assert result["errors"] == 0
+    assert result["updates_per_second"] > 0
+    # Каждый пользователь зарегистрировался, прошёл диалоги создания и удалил напоминания
+    assert len(collections.users.documents) == 4
+    assert result["steps"]["text"]["count"] == 8
+    assert result["steps"]["delete"]["count"] == 4
+    assert result["steps"]["confirm"]["count"] == 4
+    assert result["bot_api_calls"]["editMessageText"] == 12
+    assert set(result["latency"]) == {"p50_ms", "p95_ms", "p99_ms"}
+
+
+def test_percentile_uses_nearest_rank():
+    values = [float(number) for number in range(1, 101)]
+
+    assert percentile(values=values, q=50) == 50.0
+    assert percentile(values=values, q=99) == 99.0
+    assert percentile(values=[7.0], q=95) == 7.0
@@ -0,0 +1,146 @@
+import logging
+import threading
+import time
+from unittest.mock import MagicMock
+
+from pymongo.errors import BulkWriteError
+
+from app.core.logger import ThreadedMongoLogHandler
+
+
+def make_logger(handler: ThreadedMongoLogHandler, name: str) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    return logger
+
+
+def make_collection(release: threading.Event = None):
+    collection = MagicMock()
+
+    def insert_many(documents, ordered):
+        if release is not None:
+            release.wait(timeout=5)
+        return MagicMock(inserted_ids=[None] * len(documents))
+
+    collection.insert_many = MagicMock(side_effect=insert_many)
+    return collection
+
+
+def test_logs_are_written_in_batches_and_flushed_on_close():
+    """Логи пишутся через insert_many пачками, а close() дописывает остаток очереди."""
+    collection = make_collection()
+    handler = ThreadedMongoLogHandler(collection=collection, queue_size=10000, batch_size=100, flush_interval=60)
+    logger = make_logger(handler, "test_batches")
+
+    for index in range(1050):
+        logger.info("message %s", index)
+    handler.close()
+    logger.removeHandler(handler)
+
+    assert handler.written == 1050
+    assert collection.insert_many.call_count <= 11
+    assert all(call.kwargs["ordered"] is False for call in collection.insert_many.call_args_list)
+
+
+def test_full_queue_drops_low_level_records_first():
+    """При переполнении очереди DEBUG/INFO выбрасываются, а предупреждения вытесняют старые записи."""
+    release = threading.Event()
+    handler = ThreadedMongoLogHandler(
+        collection=make_collection(release), queue_size=5, batch_size=1, flush_interval=60, overflow_policy="drop_low_level"
+    )
+    logger = make_logger(handler, "test_overflow")
+
+    for index in range(20):
+        logger.info("info %s", index)
+    logger.warning("important")
+    queued = [document["message"] for document in list(handler.log_queue.queue)]
+    release.set()
+    handler.close()
+    logger.removeHandler(handler)
+
+    assert "important" in queued
+    assert handler.dropped > 0
+    assert handler.written + handler.dropped == 21
+
+
+def test_drop_low_level_never_evicts_errors_for_warnings():
+    """Предупреждение не вытесняет ошибку: без DEBUG/INFO в очереди выбрасывается само предупреждение."""
+    release = threading.Event()
+    handler = ThreadedMongoLogHandler(
+        collection=make_collection(release), queue_size=3, batch_size=1, flush_interval=60, overflow_policy="drop_low_level"
+    )
+    logger = make_logger(handler, "test_overflow_errors")
+
+    for index in range(6):
+        logger.error("error %s", index)
+    logger.warning("warning")
+    queued = [document["level"] for document in list(handler.log_queue.queue)]
+    release.set()
+    handler.close()
+    logger.removeHandler(handler)
+
+    assert "WARNING" not in queued
+    assert handler.written + handler.dropped == 7
+
+
+def test_close_does_not_hang_when_mongo_is_unreachable():
+    """Остановка ограничена по времени, даже если запись в MongoDB зависла."""
+    release = threading.Event()
+    handler = ThreadedMongoLogHandler(
+        collection=make_collection(release), queue_size=10, batch_size=1, flush_interval=60, close_timeout=0.2
+    )
+    logger = make_logger(handler, "test_close_timeout")
+    logger.error("stuck")
+
+    started = time.monotonic()
+    handler.close()
+    elapsed = time.monotonic() - started
+    release.set()
+    logger.removeHandler(handler)
+
+    assert elapsed < 2
+
+
+def test_flush_is_bounded_like_close():
+    """logging.shutdown() вызывает flush() до close(): ожидание очереди тоже ограничено по времени."""
+    release = threading.Event()
+    handler = ThreadedMongoLogHandler(
+        collection=make_collection(release), queue_size=10, batch_size=1, flush_interval=60, close_timeout=0.2
+    )
+    logger = make_logger(handler, "test_flush_timeout")
+    logger.error("stuck")
+    logger.error("waiting")
+
+    started = time.monotonic()
+    handler.flush()
+    elapsed = time.monotonic() - started
+    release.set()
+    handler.close()
+    logger.removeHandler(handler)
+
+    assert 0.1 < elapsed < 2
+
+
+def test_explicit_zero_close_timeout_is_kept():
+    handler = ThreadedMongoLogHandler(collection=MagicMock(), close_timeout=0)
+
+    assert handler.close_timeout == 0
+    handler.close()
+
+
+def test_unordered_write_errors_are_counted():
+    """Частичные ошибки insert_many учитываются, успешно вставленные записи — тоже."""
+    collection = MagicMock()
+    collection.insert_many = MagicMock(side_effect=BulkWriteError({"nInserted": 2, "writeErrors": [{"index": 1}]}))
+    handler = ThreadedMongoLogHandler(collection=collection, batch_size=10, flush_interval=60)
+    logger = make_logger(handler, "test_errors")
+
+    for index in range(3):
+        logger.error("error %s", index)
+    handler.close()
+    logger.removeHandler(handler)
+
+    assert handler.stats()["written"] == 2
+    assert handler.stats()["failed"] == 1
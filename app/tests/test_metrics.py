@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytz
+from aiogram import Bot
+from aiogram.client.telegram import TelegramAPIServer
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.bot.delivery import DeliveryEngine, DeliveryJob
+from app.bot.handler_metrics import HandlerMetricsMiddleware
+from app.bot.session import FILE_LABEL, TelegramSession, api_method_label
+from app.core.metrics import (
+    CONTENT_TYPE,
+    DELIVERY_LAG,
+    HANDLER_DURATION,
+    SENDS,
+    TELEGRAM_API_DURATION,
+    Counter,
+    Gauge,
+    Histogram,
+    Metric,
+    MetricsRegistry,
+    MetricsServer,
+)
+
+
+def test_registry_renders_prometheus_text_format():
+    """Гистограмма отдаёт накопительные корзины, сумму и количество; метки экранируются."""
+    registry = MetricsRegistry()
+    histogram = registry.register(Histogram(name="job_seconds", description="Длительность", labels=("kind",), buckets=(0.1, 1.0)))
+    counter = registry.register(Counter(name="jobs_total", description="Задания", labels=("outcome",)))
+    registry.register(Gauge(name="queue_depth", description="Очередь", collect=lambda: 7))
+
+    histogram.observe(0.05, kind="a")
+    histogram.observe(0.5, kind="a")
+    histogram.observe(3, kind="a")
+    counter.inc(outcome='say "hi"')
+    counter.inc(2, outcome='say "hi"')
+
+    lines = registry.render().splitlines()
+
+    assert "# TYPE job_seconds histogram" in lines
+    assert 'job_seconds_bucket{kind="a",le="0.1"} 1' in lines
+    assert 'job_seconds_bucket{kind="a",le="1"} 2' in lines
+    assert 'job_seconds_bucket{kind="a",le="+Inf"} 3' in lines
+    assert 'job_seconds_sum{kind="a"} 3.55' in lines
+    assert 'job_seconds_count{kind="a"} 3' in lines
+    assert 'jobs_total{outcome="say \\"hi\\""} 3' in lines
+    assert "queue_depth 7" in lines
+
+
+@pytest.mark.asyncio
+async def test_engine_counts_outcomes_and_delivery_lag():
+    """Успешная отправка увеличивает счётчик `sent` и записывает опоздание относительно `due_at`."""
+    bot = MagicMock()
+    bot.send_message = AsyncMock()
+    engine = DeliveryEngine(bot=bot, workers=2, global_rate=1000, per_chat_rate=1000, queue_size=10)
+    sent_before = SENDS.value(outcome="sent")
+    lag_before = DELIVERY_LAG.count()
+
+    due_at = datetime.now(pytz.utc) - timedelta(seconds=30)
+    await engine.submit(job=DeliveryJob(chat_id=1, text="test", due_at=due_at.replace(tzinfo=None)))
+    await engine.submit(job=DeliveryJob(chat_id=2, text="test"))
+    await engine.close()
+
+    assert SENDS.value(outcome="sent") - sent_before == 2
+    # Опоздание записывается только для сообщений с известным временем срабатывания
+    assert DELIVERY_LAG.count() - lag_before == 1
+
+
+@pytest.mark.asyncio
+async def test_session_records_api_latency_by_method(fake_telegram):
+    """Задержка Bot API пишется с меткой метода, токен в метрики не попадает."""
+    session = TelegramSession(api=TelegramAPIServer.from_base(fake_telegram.base_url))
+    bot = Bot(token="42:SECRET", session=session)
+    before = TELEGRAM_API_DURATION.count(method="sendMessage")
+
+    try:
+        await bot.send_message(chat_id=42, text="test")
+    finally:
+        await session.close()
+
+    assert TELEGRAM_API_DURATION.count(method="sendMessage") - before == 1
+    assert "SECRET" not in "\n".join(TELEGRAM_API_DURATION.render())
+
+
+
+def test_api_label_is_bounded_for_file_downloads():
+    """Скачивание файлов получает одну метку `file`, а не метку на каждый путь."""
+    assert api_method_label(path="/bot42:SECRET/sendMessage") == "sendMessage"
+    assert api_method_label(path="/prefix/bot42:SECRET/getFile") == "getFile"
+    assert api_method_label(path="/file/bot42:SECRET/photos/file_1.jpg") == FILE_LABEL
+    assert api_method_label(path="/file/bot42:SECRET/document.pdf") == FILE_LABEL
+    assert api_method_label(path="/") == FILE_LABEL
+
+
+def test_metric_without_samples_cannot_be_created():
+    class Broken(Metric):
+        type = "gauge"
+
+    with pytest.raises(TypeError):
+        Broken(name="broken", description="Без samples")
+
+
+@pytest.mark.asyncio
+async def test_handler_middleware_times_handler_by_name():
+    async def show_reminders(event, data):
+        return "ok"
+
+    middleware = HandlerMetricsMiddleware()
+    before = HANDLER_DURATION.count(handler="show_reminders")
+
+    result = await middleware(show_reminders, MagicMock(), {"handler": SimpleNamespace(callback=show_reminders)})
+
+    assert result == "ok"
+    assert HANDLER_DURATION.count(handler="show_reminders") - before == 1
+
+
+@pytest.mark.asyncio
+async def test_metrics_server_serves_refreshed_collectors():
+    """Асинхронные сборщики обновляются в фоне, а эндпоинт только отдаёт готовые значения."""
+    registry = MetricsRegistry()
+    active = registry.register(Gauge(name="reminders_active", description="Активные напоминания"))
+    count_active = AsyncMock(return_value=None, side_effect=lambda: active.set(5))
+    registry.add_collector(count_active)
+    await registry.refresh()
+
+    server = MetricsServer(registry=registry, path="/metrics", refresh_interval=30)
+    client = TestClient(TestServer(server.app))
+    await client.start_server()
+    try:
+        response = await client.get("/metrics")
+        body = await response.text()
+    finally:
+        await client.close()
+
+    assert response.status == 200
+    assert response.headers["Content-Type"] == CONTENT_TYPE
+    assert "reminders_active 5" in body.splitlines()
+    assert count_active.await_count == 1
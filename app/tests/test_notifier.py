@@ -0,0 +1,190 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytz
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from app.bot import middleware
+from app.bot.middleware import ReminderNotifier
+from app.core.config import get_settings
+from app.repositories.reminder_repository import MongoReminderRepository
+from app.services.catch_up import DIGEST_MAX_ITEMS, MESSAGE_MAX_LENGTH
+from app.services.scheduler import ReminderScheduler
+
+
+@pytest.fixture
+def notification_service(monkeypatch):
+    """Подменяет сервис уведомлений, которым пользуется ReminderNotifier."""
+    service = MagicMock()
+    service.get_user_timezones = AsyncMock(side_effect=lambda user_ids: {user_id: "UTC" for user_id in user_ids})
+    service.claim_reminders = AsyncMock(side_effect=lambda reminders, **kwargs: reminders)
+    service.schedule_confirmation_timeout = AsyncMock()
+    service.schedule_next_occurrence = AsyncMock(return_value=True)
+    service.schedule_missed = AsyncMock()
+    monkeypatch.setattr(middleware, "reminder_middleware_notification", service)
+    monkeypatch.setattr(middleware, "reminder_state_writer", MagicMock(flush=AsyncMock(), close=AsyncMock()))
+    monkeypatch.setattr(middleware, "audit_writer", MagicMock(record=AsyncMock()))
+    return service
+
+
+@pytest.fixture
+def notifier(monkeypatch):
+    # Отправляем напрямую через DeliveryEngine, без outbox в MongoDB
+    monkeypatch.setattr(get_settings(), "OUTBOX_ENABLED", False)
+    bot = MagicMock()
+    bot.send_message = AsyncMock()
+    return ReminderNotifier(bot=bot)
+
+
+@pytest.mark.asyncio
+async def test_one_shot_reminder_does_not_block_sweep(notifier, notification_service, monkeypatch):
+    """Разовое напоминание переводится в ожидание подтверждения без sleep внутри цикла."""
+    sleep = AsyncMock()
+    monkeypatch.setattr(middleware.asyncio, "sleep", sleep)
+    past = datetime(2025, 1, 1, 12, 0)
+    reminders = [
+        {"_id": ObjectId(), "user_id": "1", "date": past, "recurring": None, "message": "one"},
+        {"_id": ObjectId(), "user_id": "2", "date": past, "recurring": None, "message": "two"},
+    ]
+
+    await notifier.send_reminders(reminders=reminders)
+
+    assert notifier.bot.send_message.await_count == 2
+    assert notification_service.schedule_confirmation_timeout.await_count == 2
+    sleep.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_reload_sends_overdue_batches_and_schedules_only_the_window(notifier, notification_service, monkeypatch):
+    """Просроченные напоминания уходят в отправку пачками, в куче остаются только будущие."""
+    now = datetime.now(pytz.utc)
+    overdue = [
+        {"_id": ObjectId(), "user_id": str(i), "date": now - timedelta(hours=1), "fire_at": now - timedelta(minutes=10), "recurring": None, "message": "late"}
+        for i in range(5)
+    ]
+    upcoming = {"_id": ObjectId(), "user_id": "9", "date": now + timedelta(minutes=1), "fire_at": now + timedelta(minutes=1), "recurring": None, "message": "soon"}
+    batches = [overdue[:2], overdue[2:], [upcoming]]
+
+    async def iter_due_reminders(now, batch_size):
+        for batch in batches:
+            yield batch
+
+    notification_service.iter_due_reminders = iter_due_reminders
+    scheduler = ReminderScheduler(window=timedelta(minutes=5))
+    monkeypatch.setattr(middleware, "reminder_scheduler", scheduler)
+    enqueue = AsyncMock(side_effect=notifier.enqueue_reminders)
+    monkeypatch.setattr(notifier, "enqueue_reminders", enqueue)
+
+    await notifier.reload_schedule(now=now)
+
+    # Каждая пачка просроченных отправлена отдельно, без накопления всего долга в памяти
+    assert [len(call.kwargs["reminders"]) for call in enqueue.await_args_list] == [2, 3]
+    assert notifier.bot.send_message.await_count == 5
+    assert len(scheduler) == 1
+    assert scheduler.next_fire_at() == upcoming["fire_at"]
+
+
+def test_lease_outlives_full_delivery_queue(monkeypatch):
+    """Аренда не истекает, пока захваченное напоминание ждёт в заполненной очереди отправки."""
+    settings = get_settings()
+    monkeypatch.setattr(settings, "LEASE_SECONDS", 60)
+    monkeypatch.setattr(settings, "DELIVERY_QUEUE_SIZE", 10000)
+    monkeypatch.setattr(settings, "SWEEP_BATCH_SIZE", 500)
+    monkeypatch.setattr(settings, "DELIVERY_GLOBAL_RATE", 30.0)
+
+    lease = middleware.lease_duration(settings=settings)
+
+    drain = timedelta(seconds=(10000 + 500) / 30.0)
+    assert lease >= drain + timedelta(seconds=60)
+
+
+@pytest.mark.asyncio
+async def test_claim_uses_queue_aware_lease(notifier, notification_service):
+    """Напоминания захватываются на срок, покрывающий ожидание в очереди отправки."""
+    past = datetime(2025, 1, 1, 12, 0)
+    reminders = [{"_id": ObjectId(), "user_id": "1", "date": past, "recurring": None, "message": "one"}]
+
+    await notifier.send_reminders(reminders=reminders)
+
+    lease = notification_service.claim_reminders.await_args.kwargs["lease"]
+    settings = get_settings()
+    assert lease.total_seconds() >= settings.DELIVERY_QUEUE_SIZE / settings.DELIVERY_GLOBAL_RATE
+
+
+@pytest.mark.asyncio
+async def test_expire_confirmations_uses_single_indexed_update():
+    """Истёкшие подтверждения завершаются одним update_many по confirm_expires_at."""
+    collection = AsyncMock(spec=AsyncIOMotorCollection)
+    collection.update_many = AsyncMock(return_value=MagicMock(modified_count=3))
+    repository = MongoReminderRepository(collection)
+    now = datetime.now(pytz.utc)
+
+    expired = await repository.expire_confirmations(now=now)
+
+    assert expired == 3
+    filter_ = collection.update_many.call_args.kwargs["filter"]
+    assert filter_ == {"status": "awaiting_confirmation", "confirm_expires_at": {"$lte": now}}
+
+
+@pytest.mark.asyncio
+async def test_digest_mode_sends_one_message_per_user(notifier, notification_service):
+    """В режиме сводки наступившие напоминания пользователя уходят одним сообщением."""
+    notifier.digest_mode = True
+    past = datetime(2025, 1, 1, 12, 0)
+    one_shots = [{"_id": ObjectId(), "user_id": "1", "date": past, "recurring": None, "message": f"m{i}"} for i in range(2)]
+    recurring = {"_id": ObjectId(), "user_id": "1", "date": past, "recurring": "daily", "message": "daily"}
+    other = {"_id": ObjectId(), "user_id": "2", "date": past, "recurring": None, "message": "other"}
+
+    await notifier.send_reminders(reminders=[*one_shots, recurring, other])
+
+    assert notifier.bot.send_message.await_count == 2
+    digest = next(call.kwargs for call in notifier.bot.send_message.call_args_list if call.kwargs["chat_id"] == "1")
+    buttons = [row[0].callback_data for row in digest["reply_markup"].inline_keyboard]
+    assert buttons == [f"confirm_reminder:{reminder['_id']}" for reminder in one_shots]
+    assert notification_service.schedule_confirmation_timeout.await_count == 3
+    notification_service.schedule_next_occurrence.assert_awaited_once_with(reminder=recurring)
+
+
+@pytest.mark.asyncio
+async def test_user_digest_of_long_messages_fits_telegram_limit(notifier, notification_service):
+    """Сводка из длинных сообщений укладывается в 4096 символов и перечисляет каждое напоминание."""
+    notifier.digest_mode = True
+    past = datetime(2025, 1, 1, 12, 0)
+    reminders = [
+        {"_id": ObjectId(), "user_id": "1", "date": past, "recurring": None, "message": f"{i}" + "x" * 4000} for i in range(DIGEST_MAX_ITEMS)
+    ]
+
+    await notifier.send_reminders(reminders=reminders)
+
+    notifier.bot.send_message.assert_awaited_once()
+    text = notifier.bot.send_message.call_args.kwargs["text"]
+    assert len(text) <= MESSAGE_MAX_LENGTH
+    assert len(text.splitlines()) == DIGEST_MAX_ITEMS + 1
+
+
+@pytest.mark.asyncio
+async def test_suppress_chat_deactivates_user_and_reminders(notifier, notification_service, monkeypatch):
+    """Недоступный чат отключает пользователя и исключает его напоминания из выборки."""
+    user_service = MagicMock(set_user_active=AsyncMock())
+    monkeypatch.setattr(middleware, "user_service", user_service)
+    notification_service.set_user_active = AsyncMock(return_value=2)
+
+    await notifier.suppress_chat(chat_id=42, error=RuntimeError("Forbidden: bot was blocked by the user"))
+
+    user_service.set_user_active.assert_awaited_once_with(user_id="42", active=False, reason="Forbidden: bot was blocked by the user")
+    notification_service.set_user_active.assert_awaited_once_with(user_id="42", active=False)
+
+
+@pytest.mark.asyncio
+async def test_set_user_active_updates_open_reminders():
+    collection = MagicMock()
+    collection.update_many = AsyncMock(return_value=MagicMock(modified_count=3))
+    repository = MongoReminderRepository(collection)
+
+    assert await repository.set_user_active(user_id="42", active=False) == 3
+    collection.update_many.assert_awaited_once_with(
+        filter={"user_id": "42", "completed": False},
+        update={"$set": {"user_active": False}}
+    )
@@ -0,0 +1,218 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytz
+from aiogram.types import InlineKeyboardButton, InlineKeyboardMarkup
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+from app.bot import middleware
+from app.bot.delivery import DeliveryEngine, DeliveryJob
+from app.bot.middleware import ReminderNotifier
+from app.bot.outbox import DeliveryOutbox, backoff_delay, digest_key, occurrence_key
+from app.core.config import get_settings
+from app.repositories.outbox_repository import MongoOutboxRepository
+
+
+def make_outbox(repository, bot, max_attempts=3):
+    engine = DeliveryEngine(bot=bot, workers=2, global_rate=1000, per_chat_rate=1000, queue_size=100)
+    return DeliveryOutbox(
+        repository=repository,
+        engine=engine,
+        owner="test",
+        lease=timedelta(seconds=60),
+        max_attempts=max_attempts,
+        backoff_base=1.0,
+        backoff_max=60.0,
+        batch_size=100,
+        poll_interval=0.01,
+    )
+
+
+def test_backoff_grows_exponentially_with_jitter():
+    for attempt in range(1, 10):
+        delay = min(60.0, 2 ** (attempt - 1))
+        assert delay / 2 <= backoff_delay(attempt=attempt, base=1.0, cap=60.0) <= delay
+
+
+def test_idempotency_key_depends_on_occurrence():
+    reminder_id = ObjectId()
+    first = {"_id": reminder_id, "fire_at": datetime(2025, 1, 1, 9, 0)}
+    second = {"_id": reminder_id, "fire_at": datetime(2025, 1, 2, 9, 0)}
+
+    assert occurrence_key(reminder=first) == occurrence_key(reminder=dict(first))
+    assert occurrence_key(reminder=first) != occurrence_key(reminder=second)
+    assert digest_key(reminders=[first, second]) == digest_key(reminders=[second, first])
+
+
+@pytest.mark.asyncio
+async def test_enqueue_is_idempotent_upsert():
+    """Повторная постановка того же срабатывания не создаёт второе сообщение."""
+    collection = MagicMock()
+    collection.bulk_write = AsyncMock(return_value=MagicMock(upserted_ids={1: ObjectId()}))
+    repository = MongoOutboxRepository(collection)
+
+    now = datetime.now(pytz.utc)
+    entry = {"key": "a:1", "chat_id": "1", "text": "t"}
+
+    # Первое сообщение уже было в outbox: среди вставленных только второе
+    inserted = await repository.enqueue(entries=[entry, {**entry, "key": "a:2"}], now=now)
+
+    assert inserted == {"a:2"}
+
+    assert collection.bulk_write.call_args.args[0][0] == UpdateOne(
+        filter={"key": "a:1"},
+        update={"$setOnInsert": {**entry, "status": "pending", "attempts": 0, "next_attempt_at": now, "created_at": now}},
+        upsert=True
+    )
+
+
+@pytest.mark.asyncio
+async def test_submit_writes_outbox_before_state_change():
+    """Состояние напоминания меняется только после записи сообщения в outbox."""
+    calls = []
+    repository = MagicMock()
+    repository.enqueue = AsyncMock(side_effect=lambda entries, now: calls.append("enqueue") or {entry["key"] for entry in entries})
+    bot = MagicMock(send_message=AsyncMock())
+    outbox = make_outbox(repository=repository, bot=bot)
+    markup = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(text="ok", callback_data="confirm_reminder:1")]])
+
+    await outbox.submit(job=DeliveryJob(chat_id="1", text="t", reply_markup=markup, key="k", on_sent=AsyncMock(side_effect=lambda: calls.append("state"))))
+    await outbox.join()
+
+    assert calls == ["enqueue", "state"]
+    entry = repository.enqueue.call_args.kwargs["entries"][0]
+    assert entry["key"] == "k"
+    assert entry["reply_markup"]["inline_keyboard"][0][0]["callback_data"] == "confirm_reminder:1"
+    bot.send_message.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_process_batch_marks_delivered_retries_and_dead_letters():
+    entries = [
+        {"_id": 1, "key": "ok", "chat_id": "ok", "text": "t", "attempts": 0},
+        {"_id": 2, "key": "retry", "chat_id": "fail", "text": "t", "attempts": 0},
+        {"_id": 3, "key": "dead", "chat_id": "fail", "text": "t", "attempts": 2, "confirm_ids": ["r3"]},
+    ]
+    repository = MagicMock()
+    repository.claim = AsyncMock(return_value=entries)
+    repository.complete = AsyncMock()
+    repository.retry_operation = MagicMock(side_effect=MongoOutboxRepository.retry_operation)
+    repository.dead_operation = MagicMock(side_effect=MongoOutboxRepository.dead_operation)
+
+    async def send_message(chat_id, **kwargs):
+        if chat_id == "fail":
+            raise RuntimeError("network")
+
+    outbox = make_outbox(repository=repository, bot=MagicMock(send_message=send_message), max_attempts=3)
+    outbox.on_dead = AsyncMock()
+    now = datetime.now(pytz.utc)
+
+    assert await outbox.process_batch(now=now) == 3
+
+    assert repository.complete.call_args.kwargs["delivered_ids"] == [1]
+    retry = repository.retry_operation.call_args.kwargs
+    assert retry["entry_id"] == 2 and retry["attempts"] == 1 and retry["next_attempt_at"] > now
+    repository.dead_operation.assert_called_once_with(entry_id=3, attempts=3, error="network")
+    assert len(repository.complete.call_args.kwargs["operations"]) == 2
+    assert outbox.stats()["outbox_dead"] == 1
+    # Разовые напоминания недоставленного сообщения не остаются в ожидании отправки навсегда
+    outbox.on_dead.assert_awaited_once_with(["r3"])
+
+
+@pytest.mark.asyncio
+async def test_join_runs_on_sent_only_for_new_keys():
+    """Повторная постановка срабатывания, уже записанного в outbox, не меняет состояние напоминания."""
+    repository = MagicMock()
+    repository.enqueue = AsyncMock(return_value={"new"})
+    outbox = make_outbox(repository=repository, bot=MagicMock())
+    duplicate, new = AsyncMock(), AsyncMock()
+
+    await outbox.submit(job=DeliveryJob(chat_id="1", text="t", key="old", on_sent=duplicate))
+    await outbox.submit(job=DeliveryJob(chat_id="1", text="t", key="new", on_sent=new))
+    await outbox.join()
+
+    duplicate.assert_not_awaited()
+    new.assert_awaited_once()
+    assert outbox.stats()["outbox_enqueued"] == 1
+
+
+@pytest.mark.asyncio
+async def test_confirmation_window_starts_when_outbox_delivers(monkeypatch):
+    """
+    Разовое напоминание при записи в outbox только выходит из выборки наступивших,
+    а срок подтверждения начинается после фактической отправки циклом outbox.
+    """
+    stored = []
+    repository = MagicMock()
+    repository.enqueue = AsyncMock(side_effect=lambda entries, now: stored.extend(entries) or {entry["key"] for entry in entries})
+    repository.claim = AsyncMock(side_effect=lambda **kwargs: [{**entry, "_id": index, "attempts": 0} for index, entry in enumerate(stored)])
+    repository.complete = AsyncMock()
+    service = MagicMock()
+    service.get_user_timezones = AsyncMock(side_effect=lambda user_ids: {user_id: "UTC" for user_id in user_ids})
+    service.claim_reminders = AsyncMock(side_effect=lambda reminders, **kwargs: reminders)
+    service.schedule_queued = AsyncMock()
+    service.schedule_confirmation_timeout = AsyncMock()
+    monkeypatch.setattr(middleware, "reminder_middleware_notification", service)
+    monkeypatch.setattr(middleware, "audit_writer", MagicMock(record=AsyncMock()))
+    monkeypatch.setattr(middleware, "outbox_repository", repository)
+    monkeypatch.setattr(get_settings(), "OUTBOX_ENABLED", True)
+    notifier = ReminderNotifier(bot=MagicMock(send_message=AsyncMock()))
+    reminder_id = ObjectId()
+    reminder = {"_id": reminder_id, "user_id": "1", "date": datetime(2025, 1, 1, 12, 0), "recurring": None, "message": "m"}
+
+    await notifier.enqueue_reminders(reminders=[reminder])
+    await notifier.delivery.join()
+
+    service.schedule_queued.assert_awaited_once_with(reminder_id=str(reminder_id))
+    service.schedule_confirmation_timeout.assert_not_awaited()
+    assert stored[0]["confirm_ids"] == [str(reminder_id)]
+
+    sent_at = datetime.now(pytz.utc)
+    await notifier.outbox.process_batch(now=sent_at)
+
+    notifier.bot.send_message.assert_awaited_once()
+    kwargs = service.schedule_confirmation_timeout.call_args.kwargs
+    assert kwargs["reminder_id"] == str(reminder_id)
+    assert kwargs["expires_at"] >= sent_at + notifier.confirmation_timeout
+    await notifier.outbox.close()
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_updates_ttl_when_retention_changes():
+    """Смена срока хранения не роняет запуск: срок существующего TTL-индекса меняется через collMod."""
+    collection = MagicMock()
+    collection.name = "outbox"
+
+    async def create_index(keys, name, **options):
+        if name == "delivered_at_ttl":
+            raise OperationFailure("Index already exists with different options", code=85)
+
+    collection.create_index = AsyncMock(side_effect=create_index)
+    collection.database.command = AsyncMock()
+
+    await MongoOutboxRepository(collection).ensure_indexes(retention_seconds=7200)
+
+    collection.database.command.assert_awaited_once_with(
+        "collMod", "outbox", index={"name": "delivered_at_ttl", "expireAfterSeconds": 7200}
+    )
+
+
+@pytest.mark.asyncio
+async def test_claim_reads_taken_entries_by_id(make_cursor):
+    """Взятые сообщения читаются по `_id` кандидатов, а не перебором всего outbox по токену."""
+    ids = [ObjectId(), ObjectId()]
+    collection = MagicMock()
+    collection.find = MagicMock(side_effect=[
+        MagicMock(limit=MagicMock(return_value=make_cursor([{"_id": entry_id} for entry_id in ids]))),
+        MagicMock(to_list=AsyncMock(return_value=[])),
+    ])
+    collection.update_many = AsyncMock()
+    now = datetime.now(pytz.utc)
+
+    await MongoOutboxRepository(collection).claim(owner="a", now=now, lease_until=now + timedelta(minutes=1), limit=10)
+
+    token = collection.update_many.call_args.kwargs["update"]["$set"]["lease_token"]
+    assert collection.find.call_args.kwargs["filter"] == {"_id": {"$in": ids}, "lease_token": token}
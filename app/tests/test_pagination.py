@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bson import ObjectId
+
+from app.bot.handlers.reminders import (
+    DELETE_PAGE_PREFIX,
+    decode_cursor,
+    encode_cursor,
+    render_delete_page,
+    render_list_page,
+)
+from app.repositories.reminder_repository import LISTING_PROJECTION, MongoReminderRepository, ReminderPage
+
+START = datetime(2025, 1, 1, 9, 0)
+
+
+def make_reminders(count):
+    return [
+        {"_id": ObjectId(), "message": f"m{index}", "date": START + timedelta(hours=index), "recurring": None}
+        for index in range(count)
+    ]
+
+
+def make_repository(documents):
+    collection = MagicMock()
+    collection.find = MagicMock(return_value=MagicMock(to_list=AsyncMock(return_value=documents)))
+    return collection, MongoReminderRepository(collection)
+
+
+@pytest.mark.asyncio
+async def test_first_page_reads_limit_plus_one():
+    """Страница читает не больше limit + 1 документов с проекцией отображаемых полей."""
+    collection, repository = make_repository(make_reminders(4))
+
+    page = await repository.get_page(user_id="1", limit=3)
+
+    assert len(page.items) == 3 and page.has_next and not page.has_prev
+    kwargs = collection.find.call_args.kwargs
+    assert kwargs["filter"] == {"user_id": "1", "completed": False}
+    assert kwargs["projection"] == LISTING_PROJECTION
+    assert kwargs["limit"] == 4
+
+
+@pytest.mark.asyncio
+async def test_previous_page_uses_reverse_keyset():
+    reminders = make_reminders(2)
+    collection, repository = make_repository(list(reversed(reminders)))
+    cursor = (START + timedelta(hours=5), ObjectId())
+
+    page = await repository.get_page(user_id="1", limit=3, cursor=cursor, backward=True)
+
+    assert page.items == reminders
+    assert page.has_next and not page.has_prev
+    kwargs = collection.find.call_args.kwargs
+    assert kwargs["filter"]["$or"] == [{"date": {"$lt": cursor[0]}}, {"date": cursor[0], "_id": {"$lt": cursor[1]}}]
+    assert kwargs["sort"] == [("date", -1), ("_id", -1)]
+
+
+def test_cursor_fits_callback_data_and_round_trips():
+    reminder = {"_id": ObjectId(), "date": datetime(2025, 12, 31, 23, 59, 59, 999000)}
+
+    data = encode_cursor(DELETE_PAGE_PREFIX, "p", reminder)
+
+    assert len(data.encode()) <= 64
+    assert decode_cursor(data) == (True, (reminder["date"], reminder["_id"]))
+
+
+def test_rendered_pages_have_navigation_and_stay_short():
+    reminders = make_reminders(10)
+    for reminder in reminders:
+        reminder["message"] = "x" * 5000
+    page = ReminderPage(items=reminders, has_prev=True, has_next=True)
+
+    text, keyboard = render_list_page(page=page)
+    delete_keyboard = render_delete_page(page=page)
+
+    assert len(text) < 4096
+    assert [button.text for button in keyboard.inline_keyboard[0]] == ["⬅️ Назад", "Вперёд ➡️"]
+    assert len(delete_keyboard.inline_keyboard) == 11
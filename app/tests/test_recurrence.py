@@ -0,0 +1,75 @@
+from datetime import datetime
+
+import pytz
+
+from app.services.recurrence import RecurrenceRule, advance, describe_recurrence, next_occurrence
+
+MOSCOW = pytz.timezone("Europe/Moscow")
+BERLIN = pytz.timezone("Europe/Berlin")
+
+
+def at(user_tz, *args) -> datetime:
+    """Момент времени, заданный локальным временем пользователя."""
+    return user_tz.localize(datetime(*args)).astimezone(pytz.utc)
+
+
+def test_monthly_is_calendar_based_and_keeps_anchor_day():
+    """Ежемесячное на 31-е: в феврале — последний день месяца, в марте — снова 31-е."""
+    rule = RecurrenceRule.parse("monthly")
+    anchor = datetime(2025, 1, 31, 9, 0)
+
+    february = next_occurrence(rule, anchor, MOSCOW, after=at(MOSCOW, 2025, 1, 31, 9, 0))
+    march = next_occurrence(rule, anchor, MOSCOW, after=at(MOSCOW, 2025, 2, 28, 9, 0))
+
+    assert february == datetime(2025, 2, 28, 9, 0)
+    assert march == datetime(2025, 3, 31, 9, 0)
+
+
+def test_catch_up_jumps_straight_to_next_future_occurrence():
+    """После простоя повторяющееся напоминание переносится сразу в будущее, одним обновлением."""
+    reminder = {"recurring": "daily", "date": datetime(2025, 3, 1, 9, 0)}
+
+    update = advance(reminder, MOSCOW, now=at(MOSCOW, 2025, 3, 20, 12, 0))
+
+    assert update["date"] == datetime(2025, 3, 21, 9, 0)
+    assert update["fire_at"] == at(MOSCOW, 2025, 3, 21, 9, 0)
+    assert update["recurrence_anchor"] == datetime(2025, 3, 1, 9, 0)
+
+
+def test_daily_keeps_local_time_across_dst_change():
+    """Ежедневное в 09:00 остаётся в 09:00 по местному времени после перехода на летнее время."""
+    reminder = {"recurring": "daily", "date": datetime(2025, 3, 29, 9, 0)}
+
+    update = advance(reminder, BERLIN, now=at(BERLIN, 2025, 3, 29, 9, 0))
+
+    assert update["date"] == datetime(2025, 3, 30, 9, 0)
+    assert update["fire_at"] == datetime(2025, 3, 30, 7, 0, tzinfo=pytz.utc)
+
+
+def test_weekdays_skip_weekend():
+    """Напоминание по будням после пятницы срабатывает в понедельник."""
+    rule = RecurrenceRule.parse("weekdays")
+
+    result = next_occurrence(rule, datetime(2025, 7, 4, 8, 0), MOSCOW, after=at(MOSCOW, 2025, 7, 4, 8, 0))
+
+    assert result == datetime(2025, 7, 7, 8, 0)
+
+
+def test_minute_interval_does_not_flood_after_outage():
+    """Интервал в минуту после пятичасового простоя даёт одно ближайшее срабатывание, а не триста."""
+    rule = RecurrenceRule.parse({"freq": "interval", "seconds": 60})
+
+    result = next_occurrence(rule, datetime(2025, 7, 1, 8, 0), MOSCOW, after=at(MOSCOW, 2025, 7, 1, 13, 0, 30))
+
+    assert result == datetime(2025, 7, 1, 13, 1)
+
+
+def test_every_n_weeks_and_descriptions():
+    rule = RecurrenceRule.parse({"freq": "weekly", "interval": 2})
+
+    result = next_occurrence(rule, datetime(2025, 7, 1, 8, 0), MOSCOW, after=at(MOSCOW, 2025, 7, 9, 0, 0))
+
+    assert result == datetime(2025, 7, 15, 8, 0)
+    assert describe_recurrence("weekdays") == "По будням"
+    assert describe_recurrence(None) == "Однократно"
+    assert RecurrenceRule.parse(None) is None
@@ -2,11 +2,11 @@ import os
 import pytest
 import json
 from datetime import datetime
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorCollection
 from app.repositories.reminder_repository import MongoReminderRepository
-from app.services.remineder_service import ReminderService
+from app.services.remineder_service import ReminderService, to_utc_fire_time
 from aiogram.types import Message
 import pytz
 
@@ -73,6 +73,7 @@ async def test_add_reminder(reminder_service):
         "message": notification["message"],
         "date": date_obj, 
         "recurring": notification["recurring"],
+        "fire_at": date_obj,
     })
 
 
@@ -185,4 +186,33 @@ async def test_delete_invalid_reminder(reminder_service):
 
     result = await reminder_service.remove_reminder(TEST_DATA["users"][0]["user_id"], invalid_reminder_id)
 
-    assert result is False, "Ожидаем ошибку при удалении несуществующего напоминания"
\ No newline at end of file
+    assert result is False, "Ожидаем ошибку при удалении несуществующего напоминания"
+
+
+def test_to_utc_fire_time_localizes_naive_date():
+    """Naive-дата трактуется как время в часовом поясе пользователя."""
+    fire_at = to_utc_fire_time(datetime(2025, 7, 1, 12, 0), pytz.timezone("Europe/Moscow"))
+
+    assert fire_at == datetime(2025, 7, 1, 9, 0, tzinfo=pytz.utc)
+
+
+@pytest.mark.asyncio
+async def test_iter_due_streams_projected_batches(notification_repository, mock_notification_collection, make_cursor):
+    """Наступившие напоминания читаются курсором пачками и только с нужными полями."""
+    now = datetime(2025, 7, 1, 12, 0, tzinfo=pytz.utc)
+    documents = [{"_id": ObjectId(), "user_id": "1"} for _ in range(5)]
+    mock_notification_collection.find = MagicMock(return_value=make_cursor(documents))
+
+    batches = [batch async for batch in notification_repository.iter_due(now=now, batch_size=2)]
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+    kwargs = mock_notification_collection.find.call_args.kwargs
+    # Наступившие напоминания фильтруются по `completed` и `fire_at` на стороне MongoDB
+    assert kwargs["filter"] == {
+        "completed": False,
+        "user_active": {"$ne": False},
+        "fire_at": {"$lte": now},
+        "status": {"$nin": ["awaiting_confirmation", "queued"]},
+    }
+    assert set(kwargs["projection"]) == {"_id", "user_id", "date", "recurring", "message", "fire_at", "recurrence_anchor"}
+    assert kwargs["batch_size"] == 2
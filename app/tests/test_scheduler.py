@@ -0,0 +1,144 @@
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytz
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from app.repositories.reminder_repository import MongoReminderRepository
+from app.services.scheduler import ReminderScheduler
+
+
+NOW = datetime(2025, 7, 1, 12, 0, tzinfo=pytz.utc)
+
+
+def make_reminder(minutes: int) -> dict:
+    return {"_id": ObjectId(), "user_id": "1", "message": "test", "fire_at": NOW + timedelta(minutes=minutes)}
+
+
+@pytest.fixture
+def scheduler():
+    scheduler = ReminderScheduler(window=timedelta(minutes=10))
+    scheduler.load(reminders=[], horizon=NOW + scheduler.window)
+    return scheduler
+
+
+def test_pop_due_returns_reminders_in_fire_order(scheduler):
+    """Напоминания извлекаются по возрастанию fire_at и только наступившие."""
+    late, early, future = make_reminder(2), make_reminder(1), make_reminder(5)
+    for reminder in (late, early, future):
+        scheduler.schedule(reminder)
+
+    due = scheduler.pop_due(NOW + timedelta(minutes=3))
+
+    assert [r["_id"] for r in due] == [early["_id"], late["_id"]]
+    assert scheduler.next_fire_at() == future["fire_at"]
+
+
+def test_cancel_and_reschedule(scheduler):
+    """Отменённые не срабатывают, перенесённые срабатывают только в новое время."""
+    cancelled, moved = make_reminder(1), make_reminder(1)
+    scheduler.schedule(cancelled)
+    scheduler.schedule(moved)
+
+    scheduler.cancel(str(cancelled["_id"]))
+    scheduler.schedule({**moved, "fire_at": NOW + timedelta(minutes=4)})
+
+    assert scheduler.pop_due(NOW + timedelta(minutes=2)) == []
+    assert [r["_id"] for r in scheduler.pop_due(NOW + timedelta(minutes=4))] == [moved["_id"]]
+
+
+def test_reminders_beyond_window_are_not_kept(scheduler):
+    """Напоминания за горизонтом окна подхватываются следующей загрузкой, а не хранятся в куче."""
+    scheduler.schedule(make_reminder(60))
+
+    assert len(scheduler) == 0
+    assert scheduler.needs_reload(NOW + timedelta(minutes=10))
+
+
+def test_full_heap_shrinks_window_instead_of_growing():
+    """При заполненной куче окно сокращается до первого не поместившегося напоминания."""
+    scheduler = ReminderScheduler(window=timedelta(minutes=10), max_size=2)
+    scheduler.reset(horizon=NOW + scheduler.window)
+    for minutes in (1, 2, 3, 4):
+        scheduler.schedule(make_reminder(minutes))
+
+    assert len(scheduler) == 2
+    assert scheduler.horizon == NOW + timedelta(minutes=3)
+    assert scheduler.needs_reload(NOW + timedelta(minutes=3))
+
+
+def test_naive_mongo_dates_are_treated_as_utc(scheduler):
+    """Даты из MongoDB приходят без tzinfo и должны сравниваться как UTC."""
+    reminder = make_reminder(1)
+    reminder["fire_at"] = reminder["fire_at"].replace(tzinfo=None)
+    scheduler.schedule(reminder)
+
+    assert len(scheduler.pop_due(NOW + timedelta(minutes=1))) == 1
+
+
+@pytest.mark.asyncio
+async def test_repository_notifies_scheduler(scheduler):
+    """Создание и удаление через репозиторий сразу отражаются в планировщике."""
+    collection = AsyncMock(spec=AsyncIOMotorCollection)
+    inserted_id = ObjectId()
+    collection.insert_one = AsyncMock(return_value=MagicMock(inserted_id=inserted_id))
+    collection.delete_one = AsyncMock(return_value=MagicMock(deleted_count=0))
+    repository = MongoReminderRepository(collection, scheduler=scheduler)
+
+    await repository.create(data={"user_id": "1", "message": "test", "fire_at": NOW + timedelta(minutes=1)})
+    assert len(scheduler) == 1
+
+    await repository.delete(user_id="1", reminder_id=str(inserted_id))
+    assert len(scheduler) == 0
+
+
+def test_cancel_user_evicts_only_that_users_reminders(scheduler):
+    now = datetime.now(pytz.utc)
+    scheduler.load(reminders=[], horizon=now + timedelta(minutes=5))
+    own = [{"_id": ObjectId(), "user_id": "1", "fire_at": now - timedelta(seconds=index)} for index in range(3)]
+    other = {"_id": ObjectId(), "user_id": "2", "fire_at": now}
+    for reminder in [*own, other]:
+        scheduler.schedule(reminder)
+
+    assert scheduler.cancel_user(user_id="1") == 3
+    assert scheduler.pop_due(now) == [other]
+
+
+@pytest.mark.asyncio
+async def test_delete_all_uses_single_delete_many_and_audit_event(scheduler):
+    """Удаление всех напоминаний — один delete_many, одно событие аудита и очистка планировщика."""
+    collection = AsyncMock(spec=AsyncIOMotorCollection)
+    collection.delete_many = AsyncMock(return_value=MagicMock(deleted_count=3))
+    audit = MagicMock(record=AsyncMock())
+    scheduler.cancel_user = MagicMock(return_value=3)
+    repository = MongoReminderRepository(collection, scheduler=scheduler, audit=audit)
+
+    assert await repository.delete_all(user_id="1") == 3
+
+    collection.delete_many.assert_awaited_once_with(filter={"user_id": "1", "completed": False})
+    collection.insert_one.assert_not_called()
+    scheduler.cancel_user.assert_called_once_with(user_id="1")
+    audit.record.assert_awaited_once_with(event="deleted_all", user_id="1", count=3)
+
+
+@pytest.mark.asyncio
+async def test_reactivated_user_reminders_return_to_scheduler(scheduler, make_cursor):
+    """После /start возобновлённые напоминания пользователя сразу попадают в окно планировщика."""
+    reminders = [make_reminder(-5), make_reminder(3)]
+    collection = AsyncMock(spec=AsyncIOMotorCollection)
+    collection.update_many = AsyncMock(return_value=MagicMock(modified_count=2))
+    collection.find = MagicMock(return_value=make_cursor(reminders))
+    repository = MongoReminderRepository(collection, scheduler=scheduler)
+
+    assert await repository.set_user_active(user_id="1", active=True) == 2
+
+    filter_ = collection.find.call_args.kwargs["filter"]
+    assert filter_["user_id"] == "1" and filter_["fire_at"] == {"$lte": scheduler.horizon}
+    assert len(scheduler) == 2
+    assert [r["_id"] for r in scheduler.pop_due(NOW)] == [reminders[0]["_id"]]
+
+    await repository.set_user_active(user_id="1", active=False)
+
+    assert len(scheduler) == 0
@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import pytest
+from aiogram import Bot
+from aiogram.client.telegram import TelegramAPIServer
+
+from app.bot.session import JSON_ORJSON, TelegramSession, create_bot_session, json_functions
+from app.core.config import get_settings
+
+
+@pytest.mark.asyncio
+async def test_session_reuses_pooled_connections_and_reports_saturation(fake_telegram):
+    fake_telegram.delay = 0.02
+    session = TelegramSession(api=TelegramAPIServer.from_base(fake_telegram.base_url), limit=2)
+    bot = Bot(token="42:TEST", session=session)
+
+    try:
+        await asyncio.gather(*(bot.send_message(chat_id=42, text=f"#{i}") for i in range(10)))
+    finally:
+        await session.close()
+
+    stats = session.stats()
+    assert fake_telegram.methods() == ["sendMessage"] * 10
+    assert stats["http_requests"] == 10
+    assert stats["http_errors"] == 0
+    assert stats["http_in_flight"] == 0
+    assert stats["connections_created"] <= 2
+    assert stats["connections_reused"] >= 8
+    # Запросов больше, чем соединений в пуле: часть из них ждала свободное соединение
+    assert stats["pool_waits"] > 0
+    assert stats["pool_waiting"] == 0
+
+
+def test_session_is_built_from_settings(monkeypatch):
+    settings = get_settings()
+    monkeypatch.setattr(settings, "TELEGRAM_API_URL", "http://127.0.0.1:8081")
+    monkeypatch.setattr(settings, "TELEGRAM_REQUEST_TIMEOUT_SECONDS", 30.0)
+    monkeypatch.setattr(settings, "TELEGRAM_CONNECT_TIMEOUT_SECONDS", 2.0)
+
+    session = create_bot_session(settings=settings)
+
+    assert session.api.base == "http://127.0.0.1:8081/bot{token}/{method}"
+    assert session.connect_timeout == 2.0
+    assert session.timeout == 30.0
+
+
+@pytest.mark.asyncio
+async def test_client_session_gets_configured_connector_and_trace():
+    """Параметры пула и трассировка метрик попадают в ClientSession через публичный конструктор."""
+    session = TelegramSession(limit=7, limit_per_host=3, keepalive_timeout=15.0)
+
+    client = await session.create_session()
+    try:
+        assert (client.connector.limit, client.connector.limit_per_host) == (7, 3)
+        assert client.trace_configs
+        assert await session.create_session() is client
+    finally:
+        await session.close()
+
+
+def test_orjson_functions_match_stdlib():
+    pytest.importorskip("orjson")
+    functions = json_functions(backend=JSON_ORJSON)
+    value = {"inline_keyboard": [[{"text": "✅ Подтвердить", "callback_data": "confirm_reminder:1"}]]}
+
+    assert json.loads(functions["json_dumps"](value)) == value
+    assert functions["json_loads"](json.dumps(value)) == value
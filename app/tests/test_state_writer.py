@@ -0,0 +1,76 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+from app.repositories.reminder_repository import MongoReminderRepository
+from app.repositories.reminder_state_writer import ReminderStateWriter
+
+
+def make_operation():
+    return MongoReminderRepository.advance_operation(reminder_id=str(ObjectId()), update={"date": None})
+
+
+@pytest.fixture
+def collection():
+    collection = MagicMock()
+    collection.bulk_write = AsyncMock(side_effect=lambda operations, ordered: MagicMock(modified_count=len(operations)))
+    return collection
+
+
+@pytest.mark.asyncio
+async def test_operations_are_flushed_in_batches(collection):
+    """Тысяча обновлений записывается несколькими неупорядоченными bulk_write, а не тысячей запросов."""
+    writer = ReminderStateWriter(collection=collection, max_operations=300, flush_interval=60)
+
+    for _ in range(1000):
+        await writer.add(operation=make_operation())
+    await writer.close()
+
+    assert collection.bulk_write.await_count == 4
+    assert all(call.kwargs["ordered"] is False for call in collection.bulk_write.await_args_list)
+    assert writer.written == 1000 and len(writer) == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_flush_keeps_operations(collection):
+    """При недоступности MongoDB операции остаются в буфере и записываются следующей попыткой."""
+    writer = ReminderStateWriter(collection=collection, max_operations=10, flush_interval=60)
+    await writer.add(operation=make_operation())
+    collection.bulk_write.side_effect = [ConnectionError("down"), MagicMock(modified_count=1)]
+
+    with pytest.raises(ConnectionError):
+        await writer.flush()
+    assert len(writer) == 1
+
+    await writer.close()
+    assert len(writer) == 0 and writer.written == 1
+
+
+@pytest.mark.asyncio
+async def test_buffer_is_capped_while_mongo_is_down(collection):
+    """Во время недоступности MongoDB буфер не растёт сверх лимита, выброшенное считается."""
+    collection.bulk_write.side_effect = ConnectionError("down")
+    writer = ReminderStateWriter(collection=collection, max_operations=10, flush_interval=60, max_buffered=25)
+
+    for _ in range(100):
+        try:
+            await writer.add(operation=make_operation())
+        except ConnectionError:
+            pass
+
+    assert len(writer) == 25
+    assert writer.stats()["dropped"] == 75
+
+
+@pytest.mark.asyncio
+async def test_write_errors_do_not_block_the_batch(collection):
+    """Ошибки отдельных операций учитываются, остальные операции пачки не теряются."""
+    collection.bulk_write.side_effect = BulkWriteError({"writeErrors": [{"index": 0, "errmsg": "bad"}]})
+    writer = ReminderStateWriter(collection=collection, max_operations=10, flush_interval=60)
+    await writer.add(operation=make_operation())
+
+    await writer.flush()
+
+    assert writer.errors == 1 and len(writer) == 0
@@ -0,0 +1,60 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytz
+
+from app.repositories.users_repository import MongoUserRepository
+from app.services.timezone_cache import UserTimezoneCache, get_tzinfo
+
+
+@pytest.fixture
+def users_collection(make_cursor):
+    users = {"1": "Europe/Moscow", "2": "Asia/Tokyo"}
+    collection = MagicMock()
+    collection.find = MagicMock(side_effect=lambda filter, projection: make_cursor(
+        [{"user_id": user_id, "timezone": users[user_id]} for user_id in filter["user_id"]["$in"] if user_id in users]
+    ))
+    collection.update_one = AsyncMock()
+    return collection
+
+
+@pytest.mark.asyncio
+async def test_resolve_many_uses_one_query_per_batch(users_collection):
+    """Промахи разрешаются одним `$in`, повторные обращения обслуживаются из кэша."""
+    cache = UserTimezoneCache(collection=users_collection, maxsize=100, ttl=60)
+
+    result = await cache.resolve_many(user_ids=["1", "2", "1", "unknown"])
+    assert result == {"1": "Europe/Moscow", "2": "Asia/Tokyo", "unknown": "UTC"}
+    assert users_collection.find.call_count == 1
+
+    await cache.resolve_many(user_ids=["2", "unknown"])
+    assert users_collection.find.call_count == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_and_evicted_entries_are_reloaded(users_collection):
+    """Записи с истёкшим TTL и вытесненные по LRU запрашиваются заново."""
+    cache = UserTimezoneCache(collection=users_collection, maxsize=1, ttl=0)
+
+    await cache.get(user_id="1")
+    await cache.get(user_id="1")
+
+    assert users_collection.find.call_count == 2
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_user_repository_invalidates_cache(users_collection):
+    """Смена часового пояса сбрасывает закэшированное значение."""
+    cache = UserTimezoneCache(collection=users_collection, maxsize=100, ttl=60)
+    repository = MongoUserRepository(users_collection, timezone_cache=cache)
+    await cache.get(user_id="1")
+
+    await repository.update_timezone(user_id="1", timezone="Asia/Tokyo")
+
+    assert len(cache) == 0
+
+
+def test_get_tzinfo_is_memoized_and_tolerates_unknown_zones():
+    assert get_tzinfo("Europe/Moscow") is get_tzinfo("Europe/Moscow")
+    assert get_tzinfo("Mars/Olympus") is pytz.utc
@@ -0,0 +1,118 @@
+import asyncio
+import json
+from unittest.mock import MagicMock
+
+import pytest
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.client.telegram import TelegramAPIServer
+from aiogram.types import Message
+from aiohttp.test_utils import TestClient, TestServer
+
+from app.bot.webhook import SECRET_TOKEN_HEADER, WebhookServer
+
+SECRET = "test-secret"
+PATH = "/telegram/webhook"
+
+
+def make_update(update_id, text="ping"):
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": 0,
+            "chat": {"id": 42, "type": "private"},
+            "from": {"id": 42, "is_bot": False, "first_name": "Test"},
+            "text": text,
+        },
+    }
+
+
+@pytest.fixture
+async def telegram(fake_telegram):
+    bot = Bot(token="42:TEST", session=AiohttpSession(api=TelegramAPIServer.from_base(fake_telegram.base_url)))
+    yield fake_telegram, bot
+    await bot.session.close()
+
+
+async def make_client(webhook):
+    client = TestClient(TestServer(webhook.app))
+    await client.start_server()
+    return client
+
+
+@pytest.mark.asyncio
+async def test_webhook_end_to_end(telegram):
+    fake, bot = telegram
+    router = Router()
+
+    @router.message(F.text == "ping")
+    async def pong(message: Message):
+        await message.answer(text="pong")
+
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    webhook = WebhookServer(dispatcher=dispatcher, bot=bot, path=PATH, secret=SECRET, max_in_flight=10)
+    client = await make_client(webhook=webhook)
+
+    try:
+        await webhook.register(url="https://bot.example.com" + PATH)
+        method, params = fake.calls[0]
+        assert method == "setWebhook"
+        assert params["secret_token"] == SECRET
+        assert json.loads(params["allowed_updates"]) == ["message"]
+
+        response = await client.post(PATH, json=make_update(update_id=1), headers={SECRET_TOKEN_HEADER: "wrong"})
+        assert response.status == 401
+
+        # Не-ASCII заголовок — тоже 401, а не ошибка сервера
+        response = await webhook.handle(request=MagicMock(headers={SECRET_TOKEN_HEADER: "секрет"}))
+        assert response.status == 401
+
+        response = await client.post(PATH, json=make_update(update_id=2), headers={SECRET_TOKEN_HEADER: SECRET})
+        assert response.status == 200
+        await webhook.join()
+
+        method, params = fake.calls[-1]
+        assert method == "sendMessage"
+        assert (params["chat_id"], params["text"]) == ("42", "pong")
+        assert (webhook.received, webhook.rejected) == (1, 2)
+
+        await webhook.unregister()
+        assert fake.methods() == ["setWebhook", "sendMessage", "deleteWebhook"]
+    finally:
+        await client.close()
+
+
+@pytest.mark.asyncio
+async def test_webhook_limits_updates_in_flight(telegram):
+    _, bot = telegram
+    router = Router()
+    active = 0
+    peak = 0
+
+    @router.message()
+    async def slow(message: Message):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+
+    dispatcher = Dispatcher()
+    dispatcher.include_router(router)
+    webhook = WebhookServer(dispatcher=dispatcher, bot=bot, path=PATH, secret=SECRET, max_in_flight=2)
+    client = await make_client(webhook=webhook)
+
+    try:
+        responses = await asyncio.gather(*(
+            client.post(PATH, json=make_update(update_id=i), headers={SECRET_TOKEN_HEADER: SECRET})
+            for i in range(6)
+        ))
+        await webhook.join()
+    finally:
+        await client.close()
+
+    assert [response.status for response in responses] == [200] * 6
+    assert webhook.received == 6
+    assert peak == 2
@@ -0,0 +1,6 @@
+"""
+Замеры производительности уведомителя: проверка наступивших напоминаний на фейковом боте
+(с MongoDB или коллекциями в памяти) и планировщик в памяти.
+
+Запуск: `python manage.py bench [--backend mongo] [--users N] [--reminders N] ...`.
+"""
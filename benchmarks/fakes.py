@@ -0,0 +1,222 @@
+import asyncio
+from collections import Counter
+from copy import deepcopy
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+from bson import ObjectId
+from pymongo import monitoring
+
+from app.services.scheduler import as_utc
+
+_MISSING = object()
+
+
+class FakeBot:
+    """Заменитель `aiogram.Bot` для уведомителя: запоминает сообщения и отвечает мгновенно (или через `latency`)."""
+
+    def __init__(self, latency: float = 0.0) -> None:
+        self.latency: float = latency
+        self.session = None
+        self.sent: List[Tuple[Any, str]] = []
+
+    async def send_message(self, chat_id: Any, text: str, reply_markup: Any = None, **kwargs: Any) -> None:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        self.sent.append((chat_id, text))
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Считает команды, отправленные драйвером в MongoDB (каждая — один round trip)."""
+
+    def __init__(self) -> None:
+        self.commands: Counter = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.commands.values())
+
+    def reset(self) -> None:
+        self.commands.clear()
+
+    def started(self, event: monitoring.CommandStartedEvent) -> None:
+        self.commands[event.command_name] += 1
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent) -> None:
+        pass
+
+    def failed(self, event: monitoring.CommandFailedEvent) -> None:
+        pass
+
+
+def _compare_value(value: Any) -> Any:
+    # В MongoDB даты хранятся в UTC без часового пояса — сравниваем их как aware
+    return as_utc(value) if isinstance(value, datetime) else value
+
+
+def _matches_condition(value: Any, condition: Any) -> bool:
+    if not (isinstance(condition, dict) and condition and all(key.startswith("$") for key in condition)):
+        return value is not _MISSING and _compare_value(value) == _compare_value(condition)
+
+    for operator, operand in condition.items():
+        if operator == "$not":
+            if _matches_condition(value, operand):
+                return False
+            continue
+        if operator == "$ne":
+            if value is not _MISSING and _compare_value(value) == _compare_value(operand):
+                return False
+            continue
+        if operator == "$nin":
+            if value is not _MISSING and value in operand:
+                return False
+            continue
+        if value is _MISSING or value is None:
+            return False
+        if operator == "$in":
+            if value not in operand:
+                return False
+        elif operator in ("$lt", "$lte", "$gt", "$gte"):
+            left, right = _compare_value(value), _compare_value(operand)
+            if not {"$lt": left < right, "$lte": left <= right, "$gt": left > right, "$gte": left >= right}[operator]:
+                return False
+        else:
+            raise NotImplementedError(f"Оператор {operator} не поддерживается коллекцией в памяти")
+    return True
+
+
+def matches(document: Dict[str, Any], filter: Dict[str, Any]) -> bool:
+    return all(
+        any(matches(document=document, filter=branch) for branch in condition) if key == "$or"
+        else _matches_condition(document.get(key, _MISSING), condition)
+        for key, condition in filter.items()
+    )
+
+
+class InMemoryCursor:
+    def __init__(self, documents: List[Dict[str, Any]], projection: Optional[Dict[str, int]]) -> None:
+        self._documents = documents
+        self._projection = projection
+        self._limit = 0
+
+    def sort(self, key: Union[str, List[Tuple[str, int]]], direction: int = 1) -> "InMemoryCursor":
+        keys = [(key, direction)] if isinstance(key, str) else key
+        # Устойчивая сортировка от младшего ключа к старшему
+        for field, field_direction in reversed(keys):
+            self._documents.sort(key=lambda document: _compare_value(document.get(field)), reverse=field_direction < 0)
+        return self
+
+    def limit(self, limit: int) -> "InMemoryCursor":
+        self._limit = limit
+        return self
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        return [document async for document in self]
+
+    async def __aiter__(self):
+        documents = self._documents[:self._limit] if self._limit else self._documents
+        for document in documents:
+            yield self._project(document=document)
+
+    def _project(self, document: Dict[str, Any]) -> Dict[str, Any]:
+        if not self._projection:
+            return deepcopy(document)
+        fields = {key for key, include in self._projection.items() if include}
+        if self._projection.get("_id", 1):
+            fields.add("_id")
+        return {key: deepcopy(value) for key, value in document.items() if key in fields}
+
+
+class InMemoryCollection:
+    """
+    Минимальная коллекция в памяти с интерфейсом Motor — ровно то, что нужно проверке
+    наступивших напоминаний и хэндлерам. `bulk_write` только считается: состояние после
+    отправки в замере не перечитывается. Каждый вызов считается одним round trip.
+    """
+
+    def __init__(self, documents: Iterable[Dict[str, Any]] = ()) -> None:
+        self.documents: List[Dict[str, Any]] = list(documents)
+        self.commands: Counter = Counter()
+
+    @property
+    def total(self) -> int:
+        return sum(self.commands.values())
+
+    def reset(self) -> None:
+        self.commands.clear()
+
+    def _select(self, filter: Optional[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Документы под фильтр; выборка по `_id: {$in: [...]}` идёт через множество, а не перебором списка."""
+        filter = dict(filter or {})
+        documents = self.documents
+        ids = filter.get("_id")
+        if isinstance(ids, dict) and set(ids) == {"$in"}:
+            wanted = set(filter.pop("_id")["$in"])
+            documents = [document for document in documents if document.get("_id") in wanted]
+        return [document for document in documents if matches(document=document, filter=filter)]
+
+    def find(self, filter: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, int]] = None, **kwargs: Any) -> InMemoryCursor:
+        self.commands["find"] += 1
+        cursor = InMemoryCursor(documents=self._select(filter=filter), projection=projection)
+        if kwargs.get("sort"):
+            cursor.sort(kwargs["sort"])
+        return cursor.limit(kwargs.get("limit") or 0)
+
+    async def find_one(self, filter: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Optional[Dict[str, Any]]:
+        self.commands["find"] += 1
+        documents = self._select(filter=filter)
+        return deepcopy(documents[0]) if documents else None
+
+    async def insert_one(self, document: Dict[str, Any], **kwargs: Any) -> SimpleNamespace:
+        self.commands["insert"] += 1
+        document.setdefault("_id", ObjectId())
+        self.documents.append(deepcopy(document))
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    async def insert_many(self, documents: List[Dict[str, Any]], **kwargs: Any) -> SimpleNamespace:
+        self.commands["insert"] += 1
+        self.documents.extend(deepcopy(documents))
+        return SimpleNamespace(inserted_ids=[document.get("_id") for document in documents])
+
+    async def update_one(self, filter: Dict[str, Any], update: Dict[str, Any], upsert: bool = False, **kwargs: Any) -> SimpleNamespace:
+        self.commands["update"] += 1
+        documents = self._select(filter=filter)[:1]
+        if not documents and upsert:
+            document = {"_id": ObjectId(), **{key: value for key, value in filter.items() if not key.startswith("$")}}
+            self.documents.append(document)
+            documents = [document]
+        self._apply(documents=documents, update=update)
+        return SimpleNamespace(modified_count=len(documents), matched_count=len(documents))
+
+    async def update_many(self, filter: Dict[str, Any], update: Dict[str, Any], **kwargs: Any) -> SimpleNamespace:
+        self.commands["update"] += 1
+        documents = self._select(filter=filter)
+        self._apply(documents=documents, update=update)
+        return SimpleNamespace(modified_count=len(documents))
+
+    async def delete_one(self, filter: Dict[str, Any], **kwargs: Any) -> SimpleNamespace:
+        return await self._delete(filter=filter, limit=1)
+
+    async def delete_many(self, filter: Dict[str, Any], **kwargs: Any) -> SimpleNamespace:
+        return await self._delete(filter=filter)
+
+    async def _delete(self, filter: Dict[str, Any], limit: int = 0) -> SimpleNamespace:
+        self.commands["delete"] += 1
+        documents = self._select(filter=filter)
+        deleted = {id(document) for document in (documents[:limit] if limit else documents)}
+        self.documents = [document for document in self.documents if id(document) not in deleted]
+        return SimpleNamespace(deleted_count=len(deleted))
+
+    @staticmethod
+    def _apply(documents: List[Dict[str, Any]], update: Dict[str, Any]) -> None:
+        now = datetime.utcnow()
+        for document in documents:
+            document.update(update.get("$set", {}))
+            document.update({key: now for key in update.get("$currentDate", {})})
+            for key in update.get("$unset", {}):
+                document.pop(key, None)
+
+    async def bulk_write(self, operations: List[Any], **kwargs: Any) -> SimpleNamespace:
+        self.commands["update"] += 1
+        return SimpleNamespace(modified_count=len(operations))
@@ -0,0 +1,335 @@
+"""
+Генератор нагрузки на хэндлеры: синтетические обновления Telegram (/start, диалог создания
+напоминания, список и удаление, подтверждение) проходят через `Dispatcher.feed_update`
+с настоящими роутерами из `app/bot/handlers` и ботом-заглушкой, который отвечает сразу.
+
+Запуск: `python manage.py load --users 200 --concurrency 1 10 50 100`.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.fsm.storage.base import BaseStorage
+from aiogram.fsm.storage.memory import MemoryStorage
+from aiogram.methods import EditMessageReplyMarkup, EditMessageText, SendMessage
+from aiogram.types import Chat, InlineKeyboardMarkup, Message, Update
+
+from app.bot.handlers import help, reminders, start
+from app.core.config import Settings, get_settings
+from app.repositories import reminder_repository
+from app.repositories.audit_writer import AuditEventWriter
+from app.repositories.reminder_repository import MongoReminderRepository
+from app.repositories.users_repository import MongoUserRepository, UserService
+from app.services import remineder_service
+from app.services.remineder_service import ReminderService
+from app.services.scheduler import ReminderScheduler
+from app.services.timezone_cache import UserTimezoneCache
+from benchmarks.run import RESULTS_DIR, current_commit, memory_collections, mongo_collections
+from benchmarks.sweep import BenchCollections, replaced_globals
+
+# Ответы пользователей в диалогах
+TIMEZONE = "Europe/Moscow"
+FREQUENCY = "Ежедневные"
+
+# Перцентили задержки обработки обновления
+PERCENTILES = (50, 95, 99)
+
+
+class StubSession(BaseSession):
+    """
+    Сессия бота без сети: на любой метод сразу возвращает правдоподобный результат
+    и запоминает последнюю inline-клавиатуру в каждом чате, чтобы сценарий мог нажать её кнопки.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.keyboards: Dict[Any, InlineKeyboardMarkup] = {}
+        self._message_ids = itertools.count(start=1)
+
+    async def make_request(self, bot: Bot, method: Any, timeout: Optional[int] = None) -> Any:
+        self.calls[method.__api_method__] += 1
+        if isinstance(method, SendMessage) and isinstance(method.reply_markup, InlineKeyboardMarkup):
+            self.keyboards[method.chat_id] = method.reply_markup
+        if isinstance(method, (SendMessage, EditMessageText, EditMessageReplyMarkup)):
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.now(),
+                chat=Chat(id=method.chat_id or 0, type="private"),
+                text=getattr(method, "text", None),
+            )
+        return True
+
+    async def stream_content(self, url: str, headers: Optional[Dict[str, Any]] = None, timeout: int = 30,
+                             chunk_size: int = 65536, raise_for_status: bool = True) -> AsyncGenerator[bytes, None]:
+        raise NotImplementedError
+        yield b""
+
+    async def close(self) -> None:
+        pass
+
+    def buttons(self, chat_id: Any, prefix: str) -> List[str]:
+        """callback_data кнопок последней клавиатуры чата, начинающиеся с `prefix`."""
+        markup = self.keyboards.get(chat_id)
+        if markup is None:
+            return []
+        return [button.callback_data for row in markup.inline_keyboard for button in row
+                if button.callback_data and button.callback_data.startswith(prefix)]
+
+
+@contextmanager
+def bind_handlers(collections: BenchCollections, settings: Settings) -> Iterator[AuditEventWriter]:
+    """
+    Подключает хэндлеры к коллекциям замера: свои репозитории, кэш часовых поясов и аудит.
+    Зависимости модулей подменяются только на время блока `with`.
+    """
+    timezone_cache = UserTimezoneCache(
+        collection=collections.users,
+        maxsize=settings.TIMEZONE_CACHE_SIZE,
+        ttl=settings.TIMEZONE_CACHE_TTL_SECONDS,
+    )
+    audit = AuditEventWriter(
+        collection=collections.audit,
+        max_events=settings.AUDIT_FLUSH_SIZE,
+        flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+    )
+    service = ReminderService(repository=MongoReminderRepository(
+        collection=collections.notifications,
+        scheduler=ReminderScheduler(window=timedelta(seconds=settings.SCHEDULER_WINDOW_SECONDS)),
+        audit=audit,
+    ))
+
+    user_service = UserService(repository=MongoUserRepository(collections.users, timezone_cache=timezone_cache))
+
+    with replaced_globals(start, user_service=user_service, reminder_notification=service), \
+            replaced_globals(reminders, reminder_notification=service), \
+            replaced_globals(remineder_service, user_timezone_cache=timezone_cache), \
+            replaced_globals(reminder_repository, user_timezone_cache=timezone_cache):
+        yield audit
+
+
+def build_dispatcher(storage: BaseStorage) -> Dispatcher:
+    """Диспетчер с роутерами бота (роутер подключается только к одному диспетчеру на процесс)."""
+    dispatcher = Dispatcher(storage=storage)
+    dispatcher.include_router(start.router)
+    dispatcher.include_router(reminders.router)
+    dispatcher.include_router(help.router)
+    return dispatcher
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Перцентиль по ближайшему рангу (значения отсортированы)."""
+    return values[max(0, math.ceil(q / 100 * len(values)) - 1)]
+
+
+def summarize(latencies: List[float]) -> Dict[str, float]:
+    values = sorted(latencies)
+    return {f"p{q}_ms": round(percentile(values=values, q=q) * 1000, 3) for q in PERCENTILES}
+
+
+class LoadRun:
+    """Один прогон нагрузки: сценарии пользователей, задержки по шагам и ошибки."""
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, session: StubSession) -> None:
+        self._dispatcher = dispatcher
+        self._bot = bot
+        self._session = session
+        self._update_ids = itertools.count(start=1)
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Dict[str, int] = defaultdict(int)
+
+    async def feed(self, step: str, payload: Dict[str, Any]) -> None:
+        update = Update.model_validate({"update_id": next(self._update_ids), **payload}, context={"bot": self._bot})
+        started = time.perf_counter()
+        try:
+            await self._dispatcher.feed_update(bot=self._bot, update=update)
+        except Exception:
+            self.errors[step] += 1
+        self.latencies[step].append(time.perf_counter() - started)
+
+    async def message(self, step: str, user_id: int, text: str) -> None:
+        await self.feed(step=step, payload={"message": {
+            "message_id": next(self._update_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id=user_id),
+            "text": text,
+        }})
+
+    async def callback(self, step: str, user_id: int, data: str, reply_markup: Optional[InlineKeyboardMarkup] = None) -> None:
+        message: Dict[str, Any] = {
+            "message_id": next(self._update_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "text": "…",
+        }
+        if reply_markup is not None:
+            message["reply_markup"] = reply_markup.model_dump(exclude_none=True)
+        await self.feed(step=step, payload={"callback_query": {
+            "id": str(next(self._update_ids)),
+            "from": self._user(user_id=user_id),
+            "chat_instance": "load",
+            "data": data,
+            "message": message,
+        }})
+
+    async def scenario(self, user_id: int, reminders_per_user: int) -> None:
+        """Путь нового пользователя: регистрация, создание напоминаний, список, удаление, подтверждение."""
+        await self.message(step="start", user_id=user_id, text="/start")
+        await self.message(step="timezone", user_id=user_id, text=TIMEZONE)
+
+        for number in range(reminders_per_user):
+            recurring = number % 3 == 0
+            date = datetime.utcnow() + timedelta(days=1, minutes=number)
+            await self.message(step="create", user_id=user_id, text="Создать напоминание")
+            await self.message(step="text", user_id=user_id, text=f"Напоминание {number} пользователя {user_id}")
+            await self.message(step="date", user_id=user_id, text=date.strftime("%Y-%m-%d %H:%M"))
+            await self.message(step="recurring", user_id=user_id, text="Да" if recurring else "Нет")
+            if recurring:
+                await self.message(step="frequency", user_id=user_id, text=FREQUENCY)
+
+        await self.message(step="list", user_id=user_id, text="Список напоминаний")
+        for data in self._session.buttons(chat_id=user_id, prefix=f"{reminders.LIST_PAGE_PREFIX}:")[:1]:
+            await self.callback(step="list_page", user_id=user_id, data=data)
+
+        await self.message(step="delete_menu", user_id=user_id, text="Удалить напоминание")
+        await self.message(step="delete_pick", user_id=user_id, text="Удалить конкретное напоминание")
+        reminder_ids = [data.split(":")[1] for data in self._session.buttons(chat_id=user_id, prefix="delete_reminder:")]
+        if reminder_ids:
+            await self.callback(step="delete", user_id=user_id, data=f"delete_reminder:{reminder_ids[0]}")
+        if len(reminder_ids) > 1:
+            confirm = InlineKeyboardMarkup.model_validate({"inline_keyboard": [
+                [{"text": "✅ Подтвердить", "callback_data": f"confirm_reminder:{reminder_ids[1]}"}]
+            ]})
+            await self.callback(step="confirm", user_id=user_id, data=f"confirm_reminder:{reminder_ids[1]}", reply_markup=confirm)
+
+        await self.message(step="delete_all", user_id=user_id, text="Удалить все напоминания")
+        await self.callback(step="delete_all_confirm", user_id=user_id, data="delete_all_reminders")
+
+    @staticmethod
+    def _user(user_id: int) -> Dict[str, Any]:
+        return {"id": user_id, "is_bot": False, "first_name": "Load", "username": f"load{user_id}"}
+
+
+async def run_load(
+    dispatcher: Dispatcher,
+    users: int,
+    concurrency: int,
+    reminders_per_user: int,
+    first_user_id: int = 1_000_000,
+) -> Dict[str, Any]:
+    """
+    Прогон с `concurrency` одновременно активными пользователями (каждый проходит свой
+    сценарий последовательно, как в реальном чате). Возвращает пропускную способность
+    и перцентили задержки обработки обновлений — всего и по шагам сценария.
+    """
+    session = StubSession()
+    bot = Bot(token="42:LOAD", session=session)
+    run = LoadRun(dispatcher=dispatcher, bot=bot, session=session)
+    semaphore = asyncio.Semaphore(value=concurrency)
+
+    async def user(user_id: int) -> None:
+        async with semaphore:
+            await run.scenario(user_id=user_id, reminders_per_user=reminders_per_user)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user(user_id=first_user_id + number) for number in range(users)))
+    elapsed = time.perf_counter() - started
+
+    all_latencies = [latency for latencies in run.latencies.values() for latency in latencies]
+    return {
+        "concurrency": concurrency,
+        "users": users,
+        "updates": len(all_latencies),
+        "seconds": round(elapsed, 3),
+        "updates_per_second": round(len(all_latencies) / elapsed, 1),
+        "errors": sum(run.errors.values()),
+        "latency": summarize(latencies=all_latencies),
+        "steps": {step: {"count": len(latencies), **summarize(latencies=latencies)} for step, latencies in run.latencies.items()},
+        "bot_api_calls": dict(session.calls),
+    }
+
+
+async def run_levels(args: argparse.Namespace) -> Dict[str, Any]:
+    settings: Settings = get_settings()
+    client = None
+    if args.backend == "mongo":
+        client, collections = mongo_collections(url=args.mongo_url or settings.get_mongo_url(), database=args.database, settings=settings)
+        from app.bot.fsm_storage import MongoFSMStorage
+        storage: BaseStorage = MongoFSMStorage(
+            collection=client[args.database]["fsm"],
+            cache_size=settings.get_fsm_cache_size(),
+            cache_ttl=settings.FSM_CACHE_TTL_SECONDS,
+        )
+    else:
+        collections = memory_collections()
+        storage = MemoryStorage()
+
+    dispatcher = build_dispatcher(storage=storage)
+    levels: List[Dict[str, Any]] = []
+    try:
+        with bind_handlers(collections=collections, settings=settings) as audit:
+            for index, concurrency in enumerate(args.concurrency):
+                levels.append(await run_load(
+                    dispatcher=dispatcher,
+                    users=args.users,
+                    concurrency=concurrency,
+                    reminders_per_user=args.reminders_per_user,
+                    first_user_id=1_000_000 * (index + 1),
+                ))
+                await audit.flush()
+    finally:
+        if client is not None:
+            if not args.keep_data:
+                await client.drop_database(args.database)
+            client.close()
+
+    return {
+        "commit": current_commit(),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "backend": args.backend,
+        "max_updates_per_second": max(level["updates_per_second"] for level in levels),
+        "levels": levels,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Синтетическая нагрузка на хэндлеры бота")
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory", help="Где хранить данные и состояния диалогов")
+    parser.add_argument("--mongo-url", default=None, help="MongoDB для --backend mongo (по умолчанию из настроек)")
+    parser.add_argument("--database", default="telebot_load", help="Отдельная база прогона (удаляется после него)")
+    parser.add_argument("--keep-data", action="store_true", help="Не удалять базу прогона")
+    parser.add_argument("--users", type=int, default=200, help="Пользователей на каждый уровень конкурентности")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100], help="Одновременно активных пользователей")
+    parser.add_argument("--reminders-per-user", type=int, default=3)
+    parser.add_argument("--output", type=Path, default=None, help="Файл результатов (по умолчанию benchmarks/results/)")
+    args = parser.parse_args()
+
+    report = asyncio.run(main=run_levels(args=args))
+
+    output: Path = args.output or RESULTS_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%S}-{report['commit'] or 'unknown'}-load.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+    for level in report["levels"]:
+        latency = level["latency"]
+        print(
+            f"concurrency={level['concurrency']:>4}: {level['updates_per_second']:>9} upd/s, "
+            f"p50={latency['p50_ms']} ms, p95={latency['p95_ms']} ms, p99={latency['p99_ms']} ms, ошибок {level['errors']}"
+        )
+    print(f"Максимум: {report['max_updates_per_second']} обновлений в секунду")
+    print(f"✅ Результаты сохранены в {output}")
+
+
+if __name__ == "__main__":
+    main()
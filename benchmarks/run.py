@@ -0,0 +1,178 @@
+import argparse
+import asyncio
+import json
+import platform
+import subprocess
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from app.core.config import Settings, get_settings
+from benchmarks.fakes import CommandCounter, InMemoryCollection
+from benchmarks.scheduler import run_scheduler
+from benchmarks.sweep import BenchCollections, run_sweep
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+# Метрики, которые сравниваются с предыдущим результатом (True — чем больше, тем лучше)
+COMPARED_METRICS = {
+    "reminders_per_second": True,
+    "round_trips_per_reminder": False,
+    "peak_memory_mb": False,
+}
+
+
+def memory_collections() -> BenchCollections:
+    notifications, users, audit = InMemoryCollection(), InMemoryCollection(), InMemoryCollection()
+    collections = (notifications, users, audit)
+
+    def reset() -> None:
+        for collection in collections:
+            collection.reset()
+
+    def commands() -> Dict[str, int]:
+        total: Dict[str, int] = {}
+        for collection in collections:
+            for name, count in collection.commands.items():
+                total[name] = total.get(name, 0) + count
+        return total
+
+    return BenchCollections(notifications=notifications, users=users, audit=audit, reset=reset, commands=commands)
+
+
+async def seed_memory(collections: BenchCollections, users: List[Dict[str, Any]], reminders: List[Dict[str, Any]]) -> None:
+    collections.users.documents = list(users)
+    collections.notifications.documents = list(reminders)
+    collections.audit.documents = []
+
+
+def mongo_collections(url: str, database: str, settings: Settings):
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(host=url, event_listeners=[counter], **settings.get_mongo_client_options())
+    db = client[database]
+    collections = BenchCollections(
+        notifications=db["notifications"],
+        users=db["users"],
+        audit=db["audit"],
+        reset=counter.reset,
+        commands=lambda: dict(counter.commands),
+    )
+    return client, collections
+
+
+async def seed_mongo(collections: BenchCollections, users: List[Dict[str, Any]], reminders: List[Dict[str, Any]]) -> None:
+    for collection, documents in ((collections.users, users), (collections.notifications, reminders)):
+        await collection.delete_many({})
+        for start in range(0, len(documents), 10000):
+            await collection.insert_many([dict(document) for document in documents[start:start + 10000]], ordered=False)
+    await collections.audit.delete_many({})
+
+
+def current_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            args=["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run_benchmarks(args: argparse.Namespace) -> Dict[str, Any]:
+    settings: Settings = get_settings()
+    results: List[Dict[str, Any]] = []
+
+    if "scheduler" in args.only:
+        results.append(run_scheduler(users=args.users, reminders=args.reminders, repeat=args.repeat))
+
+    if "sweep" in args.only:
+        client = None
+        if args.backend == "mongo":
+            client, collections = mongo_collections(url=args.mongo_url or settings.get_mongo_url(), database=args.database, settings=settings)
+            from app.repositories.reminder_repository import MongoReminderRepository
+            await MongoReminderRepository(collection=collections.notifications).ensure_indexes()
+            await collections.users.create_index("user_id")
+
+            async def seed(users, reminders):
+                await seed_mongo(collections=collections, users=users, reminders=reminders)
+        else:
+            collections = memory_collections()
+
+            async def seed(users, reminders):
+                await seed_memory(collections=collections, users=users, reminders=reminders)
+
+        try:
+            result = await run_sweep(
+                collections=collections,
+                seed=seed,
+                users=args.users,
+                reminders=args.reminders,
+                repeat=args.repeat,
+                bot_latency=args.bot_latency,
+            )
+            results.append({**result, "backend": args.backend})
+        finally:
+            if client is not None:
+                if not args.keep_data:
+                    await client.drop_database(args.database)
+                client.close()
+
+    return {
+        "commit": current_commit(),
+        "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "results": results,
+    }
+
+
+def compare(current: Dict[str, Any], previous: Dict[str, Any]) -> List[str]:
+    """Строки сравнения с предыдущим прогоном по одинаковым замерам."""
+    lines: List[str] = []
+    previous_results = {(result["benchmark"], result.get("backend")): result for result in previous.get("results", [])}
+    for result in current["results"]:
+        baseline = previous_results.get((result["benchmark"], result.get("backend")))
+        if baseline is None:
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            if metric not in result or not baseline.get(metric):
+                continue
+            change = (result[metric] - baseline[metric]) / baseline[metric] * 100
+            worse = change < 0 if higher_is_better else change > 0
+            lines.append(
+                f"{result['benchmark']}.{metric}: {baseline[metric]} → {result[metric]} ({change:+.1f}%)"
+                + (" ⚠️" if worse and abs(change) >= 5 else "")
+            )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Замеры производительности уведомителя")
+    parser.add_argument("--backend", choices=["memory", "mongo"], default="memory", help="Где хранить напоминания замера")
+    parser.add_argument("--mongo-url", default=None, help="MongoDB для --backend mongo (по умолчанию из настроек)")
+    parser.add_argument("--database", default="telebot_bench", help="Отдельная база замера (удаляется после прогона)")
+    parser.add_argument("--keep-data", action="store_true", help="Не удалять базу замера")
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--reminders", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=3, help="Число замеряемых прогонов")
+    parser.add_argument("--bot-latency", type=float, default=0.0, help="Задержка ответа фейкового бота, с")
+    parser.add_argument("--only", nargs="+", choices=["sweep", "scheduler"], default=["sweep", "scheduler"])
+    parser.add_argument("--output", type=Path, default=None, help="Файл результатов (по умолчанию benchmarks/results/)")
+    parser.add_argument("--compare", type=Path, default=None, help="Предыдущий файл результатов для сравнения")
+    args = parser.parse_args()
+
+    report = asyncio.run(main=run_benchmarks(args=args))
+
+    output: Path = args.output or RESULTS_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%S}-{report['commit'] or 'unknown'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, ensure_ascii=False, indent=2))
+
+    print(json.dumps(report["results"], ensure_ascii=False, indent=2))
+    print(f"✅ Результаты сохранены в {output}")
+    if args.compare is not None:
+        for line in compare(current=report, previous=json.loads(args.compare.read_text())):
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
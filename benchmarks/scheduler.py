@@ -0,0 +1,40 @@
+import statistics
+import time
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+import pytz
+
+from app.services.scheduler import ReminderScheduler
+from benchmarks.seed import make_due_reminders, make_users
+
+
+def run_scheduler(users: int, reminders: int, repeat: int) -> Dict[str, Any]:
+    """Замер планировщика в памяти: загрузка окна (`load`) и выборка наступивших (`pop_due`)."""
+    user_documents = make_users(count=users)
+    load_times, pop_times = [], []
+
+    for run in range(repeat):
+        now = datetime.now(pytz.utc)
+        documents = make_due_reminders(users=user_documents, count=reminders, now=now, seed=run)
+        scheduler = ReminderScheduler(window=timedelta(minutes=5))
+
+        started = time.perf_counter()
+        scheduler.load(reminders=documents, horizon=now + scheduler.window)
+        load_times.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        due = scheduler.pop_due(now)
+        pop_times.append(time.perf_counter() - started)
+        assert len(due) == reminders
+
+    load, pop = statistics.median(load_times), statistics.median(pop_times)
+    return {
+        "benchmark": "scheduler",
+        "users": users,
+        "reminders": reminders,
+        "repeat": repeat,
+        "load_seconds": load,
+        "pop_due_seconds": pop,
+        "reminders_per_second": round(reminders / (load + pop), 1),
+    }
@@ -0,0 +1,46 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import pytz
+from bson import ObjectId
+
+# Часовые пояса тестовых пользователей
+TIMEZONES = ("UTC", "Europe/Moscow", "Europe/Berlin", "America/New_York", "Asia/Tokyo")
+
+# Доля повторяющихся напоминаний и их правила
+RECURRING_SHARE = 0.3
+RECURRING_RULES = ("daily", "weekly", "monthly", "weekdays")
+
+
+def make_users(count: int) -> List[Dict[str, Any]]:
+    return [
+        {"user_id": str(100000 + number), "username": f"user{number}", "timezone": TIMEZONES[number % len(TIMEZONES)]}
+        for number in range(count)
+    ]
+
+
+def make_due_reminders(users: List[Dict[str, Any]], count: int, now: datetime, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    Напоминания, наступившие за последнюю минуту (в пределах досылки без пропуска),
+    равномерно распределённые по пользователям. Даты хранятся так же, как их пишет бот:
+    `date` — локальное время пользователя, `fire_at` — UTC без часового пояса.
+    """
+    rng = random.Random(seed)
+    reminders: List[Dict[str, Any]] = []
+    for number in range(count):
+        user = users[number % len(users)]
+        fire_at: datetime = now - timedelta(seconds=rng.uniform(1, 60))
+        recurring = rng.choice(RECURRING_RULES) if rng.random() < RECURRING_SHARE else None
+        reminders.append({
+            "_id": ObjectId(),
+            "user_id": user["user_id"],
+            "message": f"Напоминание №{number}",
+            "date": fire_at.astimezone(tz=pytz.timezone(user["timezone"])).replace(tzinfo=None, microsecond=0),
+            "fire_at": fire_at.astimezone(tz=pytz.utc).replace(tzinfo=None),
+            "recurring": recurring,
+            "completed": False,
+            "status": "created",
+            "timestamp": now.replace(tzinfo=None),
+        })
+    return reminders
@@ -0,0 +1,169 @@
+import statistics
+import time
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from types import ModuleType
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import pytz
+
+from app.bot import middleware
+from app.bot.middleware import ReminderNotifier
+from app.core.config import Settings, get_settings
+from app.repositories.audit_writer import AuditEventWriter
+from app.repositories.reminder_repository import MongoReminderRepository
+from app.repositories.reminder_state_writer import ReminderStateWriter
+from app.services import remineder_service
+from app.services.remineder_service import ReminderServiceNotificationMiddleware
+from app.services.scheduler import ReminderScheduler
+from app.services.timezone_cache import UserTimezoneCache
+from benchmarks.fakes import FakeBot
+from benchmarks.seed import make_due_reminders, make_users
+
+
+@dataclass
+class BenchCollections:
+    """
+    Коллекции замера и счётчик round trip'ов к ним: `reset()` обнуляет счётчик,
+    `commands()` возвращает число команд по типам.
+    """
+
+    notifications: Any
+    users: Any
+    audit: Any
+    reset: Callable[[], None]
+    commands: Callable[[], Dict[str, int]]
+
+
+@contextmanager
+def replaced_globals(module: ModuleType, **values: Any) -> Iterator[None]:
+    """Подменяет глобальные зависимости модуля на время блока и затем возвращает прежние."""
+    previous: Dict[str, Any] = {name: getattr(module, name) for name in values}
+    for name, value in values.items():
+        setattr(module, name, value)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            setattr(module, name, value)
+
+
+@contextmanager
+def build_notifier(collections: BenchCollections, bot: FakeBot, settings: Settings) -> Iterator[ReminderNotifier]:
+    """
+    Уведомитель поверх коллекций замера: те же репозиторий, буферы записи и кэш
+    часовых поясов, что и в боте, но с отдельными экземплярами и холодным кэшем.
+    Зависимости модулей подменяются только на время блока `with`.
+    """
+    audit = AuditEventWriter(
+        collection=collections.audit,
+        max_events=settings.AUDIT_FLUSH_SIZE,
+        flush_interval=settings.AUDIT_FLUSH_INTERVAL_SECONDS,
+        max_buffered=settings.AUDIT_BUFFER_LIMIT,
+    )
+    state_writer = ReminderStateWriter(
+        collection=collections.notifications,
+        max_operations=settings.STATE_FLUSH_SIZE,
+        flush_interval=settings.STATE_FLUSH_INTERVAL_MS / 1000,
+        max_buffered=settings.STATE_BUFFER_LIMIT,
+    )
+    scheduler = ReminderScheduler(window=timedelta(seconds=settings.SCHEDULER_WINDOW_SECONDS), max_size=settings.SCHEDULER_MAX_SIZE)
+    repository = MongoReminderRepository(collection=collections.notifications, scheduler=scheduler, audit=audit)
+
+    timezone_cache = UserTimezoneCache(
+        collection=collections.users,
+        maxsize=settings.TIMEZONE_CACHE_SIZE,
+        ttl=settings.TIMEZONE_CACHE_TTL_SECONDS,
+    )
+
+    with replaced_globals(
+        middleware,
+        reminder_middleware_notification=ReminderServiceNotificationMiddleware(repository=repository, state_writer=state_writer),
+        reminder_state_writer=state_writer,
+        reminder_scheduler=scheduler,
+        audit_writer=audit,
+    ), replaced_globals(remineder_service, user_timezone_cache=timezone_cache):
+        yield ReminderNotifier(bot=bot, settings=settings)
+
+
+async def run_sweep(
+    collections: BenchCollections,
+    seed: Callable[[List[Dict[str, Any]], List[Dict[str, Any]]], Any],
+    users: int,
+    reminders: int,
+    repeat: int,
+    bot_latency: float = 0.0,
+) -> Dict[str, Any]:
+    """
+    Замер рабочего пути уведомителя: `reload_schedule` загружает окно планировщика
+    (напоминания заполняются так, чтобы к загрузке они ещё не наступили), затем
+    `reminder_scheduler.pop_due` отдаёт наступившие, и они уходят через `send_reminders`
+    (`enqueue_reminders`, доставка, запись состояния и аудита) — как в цикле `start`.
+    Перед каждым прогоном коллекции заполняются заново. Последний прогон выполняется
+    под tracemalloc — только ради пиковой памяти.
+    """
+    # Фейковый бот отвечает сразу, лимиты Telegram замер не ограничивают; outbox не участвует.
+    # Меняем копию: общие настройки процесса замер не трогает
+    settings: Settings = get_settings().model_copy(update={
+        "OUTBOX_ENABLED": False,
+        "DELIVERY_GLOBAL_RATE": 1_000_000.0,
+        "DELIVERY_PER_CHAT_RATE": 1_000_000.0,
+    })
+
+    user_documents = make_users(count=users)
+    latencies: List[float] = []
+    commands: Dict[str, int] = {}
+    sent = 0
+    peak_memory: Optional[int] = None
+
+    for run in range(repeat + 1):
+        traced = run == repeat
+        seeded_at: datetime = datetime.now(pytz.utc)
+        await seed(user_documents, make_due_reminders(users=user_documents, count=reminders, now=seeded_at, seed=run))
+
+        bot = FakeBot(latency=bot_latency)
+        with build_notifier(collections=collections, bot=bot, settings=settings) as notifier:
+            collections.reset()
+            if traced:
+                tracemalloc.start()
+
+            started = time.perf_counter()
+            # Окно загружается до самого раннего из напоминаний (они наступили не раньше минуты назад)
+            await notifier.reload_schedule(now=seeded_at - timedelta(seconds=61))
+            while True:
+                now: datetime = datetime.now(pytz.utc)
+                if middleware.reminder_scheduler.needs_reload(now):
+                    await notifier.reload_schedule(now=now)
+                due: List[Dict[str, Any]] = middleware.reminder_scheduler.pop_due(now)
+                if not due:
+                    break
+                await notifier.send_reminders(reminders=due)
+            await middleware.audit_writer.flush()
+            elapsed = time.perf_counter() - started
+
+            if traced:
+                peak_memory = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+            else:
+                latencies.append(elapsed)
+                commands = collections.commands()
+                sent = len(bot.sent)
+            await notifier.close()
+
+    median = statistics.median(latencies)
+    round_trips = sum(commands.values())
+    return {
+        "benchmark": "sweep",
+        "users": users,
+        "reminders": reminders,
+        "repeat": repeat,
+        "sent": sent,
+        "latency_seconds": {"min": min(latencies), "median": median, "max": max(latencies)},
+        "reminders_per_second": round(reminders / median, 1),
+        "round_trips": round_trips,
+        "round_trips_per_reminder": round(round_trips / reminders, 4),
+        "round_trips_by_command": dict(sorted(commands.items())),
+        "peak_memory_mb": round(peak_memory / 2 ** 20, 2),
+    }
@@ -1,9 +1,24 @@
 import argparse
 import subprocess
 import os
+from typing import List, Optional
 
-def start_bot() -> None:
-    subprocess.run(["poetry", "run", "python", "scripts/start_bot.py"])
+def start_bot(mode: Optional[str] = None) -> None:
+    if mode is not None:
+        os.environ["BOT_MODE"] = mode  # Переопределяет BOT_MODE из .env
+    subprocess.run(args=["poetry", "run", "python", "scripts/start_bot.py"], env=os.environ)
+
+def run_migrations() -> None:
+    subprocess.run(["poetry", "run", "python", "scripts/migrate.py"])
+
+def run_archive() -> None:
+    subprocess.run(["poetry", "run", "python", "scripts/archive.py"])
+
+def run_bench(options: List[str]) -> None:
+    subprocess.run(["poetry", "run", "python", "-m", "benchmarks", *options])
+
+def run_load(options: List[str]) -> None:
+    subprocess.run(["poetry", "run", "python", "-m", "benchmarks.load", *options])
 
 def run_tests() -> None:
     os.environ["TESTING"] = "True"  # Устанавливаем перед импортами
@@ -11,13 +26,24 @@ def run_tests() -> None:
 
 def main() -> None:
     parser = argparse.ArgumentParser()
-    parser.add_argument("command", choices=["start", "test"])
-    args = parser.parse_args()
+    parser.add_argument("command", choices=["start", "test", "migrate", "archive", "bench", "load"])
+    parser.add_argument("--mode", choices=["polling", "webhook"], help="Способ получения обновлений для start")
+    # Остальные аргументы передаются замерам: manage.py bench --backend mongo --reminders 50000,
+    # manage.py load --users 500 --concurrency 10 100
+    args, options = parser.parse_known_args()
 
     if args.command == "start":
-        start_bot()
+        start_bot(mode=args.mode)
     elif args.command == "test":
         run_tests()
+    elif args.command == "migrate":
+        run_migrations()
+    elif args.command == "archive":
+        run_archive()
+    elif args.command == "bench":
+        run_bench(options=options)
+    elif args.command == "load":
+        run_load(options=options)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
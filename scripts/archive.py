@@ -0,0 +1,18 @@
+import asyncio
+from datetime import datetime
+
+from app.dependencies.reminder_dependencies import reminder_archiver
+
+
+async def run_archive() -> None:
+    await reminder_archiver.ensure_indexes()
+    archived = await reminder_archiver.run_once(now=datetime.utcnow())
+    print(f"✅ Архивация завершена: перенесено {archived} выполненных напоминаний (режим {reminder_archiver.mode})")
+
+
+def main() -> None:
+    asyncio.run(main=run_archive())
+
+
+if __name__ == "__main__":
+    main()
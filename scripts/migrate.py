@@ -0,0 +1,76 @@
+import asyncio
+import logging
+from typing import List
+
+from pymongo import UpdateOne
+
+from app.core.mongo_collections import notification_collection
+from app.services.remineder_service import to_utc_fire_time
+from app.services.timezone_cache import get_tzinfo, user_timezone_cache
+from app.dependencies.reminder_dependencies import reminder_middleware_notification
+
+logger: logging.Logger = logging.getLogger(name="app_logger")
+
+BATCH_SIZE = 500
+
+
+async def backfill_fire_at() -> int:
+    """Проставляет `fire_at` (время срабатывания в UTC) напоминаниям, созданным до его появления."""
+    operations: List[UpdateOne] = []
+    updated = 0
+
+    cursor = notification_collection.find(
+        filter={"completed": False, "fire_at": {"$exists": False}, "date": {"$exists": True}},
+        projection={"_id": 1, "user_id": 1, "date": 1}
+    )
+    async for reminder in cursor:
+        user_timezone: str = await user_timezone_cache.get(user_id=reminder["user_id"])
+        fire_at = to_utc_fire_time(date=reminder["date"], user_tz=get_tzinfo(zone=user_timezone))
+        operations.append(UpdateOne(filter={"_id": reminder["_id"]}, update={"$set": {"fire_at": fire_at}}))
+
+        if len(operations) >= BATCH_SIZE:
+            result = await notification_collection.bulk_write(operations, ordered=False)
+            updated += result.modified_count
+            operations = []
+
+    if operations:
+        result = await notification_collection.bulk_write(operations, ordered=False)
+        updated += result.modified_count
+
+    return updated
+
+
+async def remove_legacy_audit_documents() -> int:
+    """Удаляет из коллекции напоминаний старые записи об удалении (теперь они пишутся в аудит)."""
+    result = await notification_collection.delete_many(
+        filter={"status": "deleted", "date": {"$exists": False}}
+    )
+    return result.deleted_count
+
+
+async def backfill_completed_at() -> int:
+    """Проставляет `completed_at` выполненным напоминаниям (время создания или текущее), чтобы их можно было архивировать."""
+    result = await notification_collection.update_many(
+        filter={"completed": True, "completed_at": {"$exists": False}},
+        update=[{"$set": {"completed_at": {"$ifNull": ["$timestamp", "$$NOW"]}}}]
+    )
+    return result.modified_count
+
+
+async def run_migrations() -> None:
+    await reminder_middleware_notification.ensure_indexes()
+    updated = await backfill_fire_at()
+    removed = await remove_legacy_audit_documents()
+    completed = await backfill_completed_at()
+    print(
+        f"✅ Миграция завершена: fire_at проставлен у {updated} напоминаний, удалено {removed} старых записей аудита, "
+        f"completed_at проставлен у {completed} выполненных"
+    )
+
+
+def main() -> None:
+    asyncio.run(main=run_migrations())
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,34 @@
 from logging import Logger
+from typing import Optional
 from aiogram import Bot, Dispatcher
 import asyncio
-from app.core.logger import Logger
+from app.core.logger import Logger, ThreadedMongoLogHandler
 from app.bot.handlers import start, reminders, help
+from app.bot.fsm_storage import MongoFSMStorage, create_fsm_storage
+from app.bot.handler_metrics import HandlerMetricsMiddleware
 from app.bot.middleware import ReminderNotifier
+from app.bot.session import create_bot_session
+from app.bot.webhook import WebhookServer
+from app.dependencies.reminder_dependencies import (
+    audit_writer,
+    outbox_repository,
+    reminder_archiver,
+    reminder_middleware_notification,
+    reminder_state_writer,
+)
 from app.core.config import Settings, get_settings
+from app.core.database import mongo_registry
+from app.core.metrics import ACTIVE_REMINDERS, Counter, MetricsServer, registry, watch_log_handler
+from app.core.mongo_collections import fsm_collection
 
 settings: Settings = get_settings()
 
 
 logger: Logger = Logger.setup_logger()
 
-bot = Bot(token=settings.BOT_TOKEN)
-dp = Dispatcher()
+# Одна сессия с настроенным пулом соединений на уведомления и хэндлеры
+bot = Bot(token=settings.BOT_TOKEN, session=create_bot_session(settings=settings))
+dp = Dispatcher(storage=create_fsm_storage(settings=settings, collection=fsm_collection))
 reminder_notifier = ReminderNotifier(bot=bot)
 
 # Подключаем хэндлеры
@@ -20,13 +36,93 @@ dp.include_router(start.router)
 dp.include_router(reminders.router)
 dp.include_router(help.router)
 
+if settings.METRICS_ENABLED:
+    # Inner-middleware вызывается только для обновлений, нашедших хэндлер
+    dp.message.middleware(HandlerMetricsMiddleware())
+    dp.callback_query.middleware(HandlerMetricsMiddleware())
+
 async def run_bot():
     logger.info("🚀 Запуск бота...")
-    
+
+    # Индексы для выборки наступивших напоминаний, outbox, аудита, архивации и диалогов
+    await reminder_middleware_notification.ensure_indexes()
+    await outbox_repository.ensure_indexes(retention_seconds=settings.OUTBOX_RETENTION_SECONDS)
+    await audit_writer.ensure_indexes(retention_seconds=settings.AUDIT_RETENTION_DAYS * 24 * 3600)
+    await reminder_archiver.ensure_indexes()
+    if isinstance(dp.storage, MongoFSMStorage):
+        await dp.storage.ensure_indexes(ttl_seconds=settings.FSM_STATE_TTL_SECONDS)
+
     # Запускаем напоминания в фоне
     asyncio.create_task(coro=reminder_notifier.start())
+    asyncio.create_task(coro=reminder_notifier.run_confirmation_timeouts())
+    asyncio.create_task(coro=reminder_state_writer.run())
+    asyncio.create_task(coro=audit_writer.run())
+    asyncio.create_task(coro=reminder_archiver.run(interval=settings.ARCHIVE_INTERVAL_SECONDS))
+    if reminder_notifier.outbox is not None:
+        asyncio.create_task(coro=reminder_notifier.outbox.run())
+
+    metrics_server: Optional[MetricsServer] = await start_metrics() if settings.METRICS_ENABLED else None
+
+    try:
+        if settings.BOT_MODE == "webhook":
+            await run_webhook()
+        else:
+            await dp.start_polling(bot)
+    finally:
+        # Не теряем накопленные обновления состояния при остановке
+        reminder_archiver.stop()
+        if metrics_server is not None:
+            await metrics_server.stop()
+        await reminder_notifier.close()
+        await audit_writer.close()
+        await dp.storage.close()
+        await bot.session.close()
+        # Дописываем логи до закрытия общих клиентов MongoDB
+        for handler in logger.handlers:
+            handler.close()
+        mongo_registry.close()
+
+async def start_metrics() -> MetricsServer:
+    """Запускает эндпоинт метрик и подключает сборщики, которым нужны объекты процесса."""
+    async def count_active_reminders() -> None:
+        ACTIVE_REMINDERS.set(await reminder_middleware_notification.count_active_reminders())
+
+    registry.add_collector(count_active_reminders)
+    registry.register(Counter(
+        name="reminder_state_dropped_total",
+        description="Обновления состояния напоминаний, выброшенные при переполнении буфера",
+        collect=lambda: reminder_state_writer.dropped,
+    ))
+    registry.register(Counter(
+        name="audit_events_dropped_total",
+        description="События аудита, выброшенные при переполнении буфера",
+        collect=lambda: audit_writer.dropped,
+    ))
+    for handler in logger.handlers:
+        if isinstance(handler, ThreadedMongoLogHandler):
+            watch_log_handler(handler=handler)
+
+    server = MetricsServer(registry=registry, path=settings.METRICS_PATH, refresh_interval=settings.METRICS_REFRESH_SECONDS)
+    await server.start(host=settings.METRICS_HOST, port=settings.METRICS_PORT)
+    return server
+
+async def run_webhook() -> None:
+    if not settings.WEBHOOK_BASE_URL or not settings.WEBHOOK_SECRET:
+        raise ValueError("Для режима webhook нужны WEBHOOK_BASE_URL и WEBHOOK_SECRET")
 
-    await dp.start_polling(bot)
+    server = WebhookServer(
+        dispatcher=dp,
+        bot=bot,
+        path=settings.WEBHOOK_PATH,
+        secret=settings.WEBHOOK_SECRET,
+        max_in_flight=settings.WEBHOOK_MAX_IN_FLIGHT,
+    )
+    await server.serve(
+        host=settings.WEBHOOK_HOST,
+        port=settings.WEBHOOK_PORT,
+        url=settings.get_webhook_url(),
+        delete_on_shutdown=settings.WEBHOOK_DELETE_ON_SHUTDOWN
+    )
 
 def main() -> None:
     asyncio.run(main=run_bot())